@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Peak Python memory while exporting analyses with their recommendations:
+loading everything through the ORM into one JSON document against the
+streaming GET /export generator. The streaming peak should stay flat as
+--rows grows.
+
+Run from the task_1_solution_architect directory:
+    python benchmarks/bench_export.py [--rows 5000] [--database /tmp/bench_export.db]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from src.models import ProblemAnalysis, TechRecommendation, db  # noqa: E402
+from src.services.export_service import export_stream  # noqa: E402
+from src.utils import json_backend  # noqa: E402
+from src.utils.ids import new_id  # noqa: E402
+
+
+def populate(rows):
+    statement = "Our food bank tracks donated inventory in spreadsheets and loses perishable stock. " * 4
+    for start in range(0, rows, 1000):
+        analyses, recommendations = [], []
+        for _ in range(min(1000, rows - start)):
+            problem_id = new_id('P')
+            analyses.append({
+                'problem_id': problem_id, 'problem_statement': statement, 'description': statement,
+                'clarifying_questions': ['How many volunteers handle intake each week?'] * 3,
+                'analysis_mode': 'basic', 'created_at': datetime.utcnow(),
+            })
+            recommendations.append({
+                'problem_id': problem_id, 'solution_summary': statement,
+                'recommended_tech_stack': ['Airtable', 'Zapier', 'Twilio'],
+                'initial_steps': ['Migrate spreadsheets', 'Pilot with one site'],
+                'analysis_mode': 'basic', 'created_at': datetime.utcnow(),
+            })
+        db.session.execute(ProblemAnalysis.__table__.insert(), analyses)
+        db.session.execute(TechRecommendation.__table__.insert(), recommendations)
+        db.session.commit()
+
+
+def orm_export():
+    documents = []
+    for analysis in ProblemAnalysis.query.all():
+        document = analysis.to_dict()
+        document['recommendations'] = [r.to_dict() for r in analysis.recommendations]
+        documents.append(document)
+    return len(json_backend.dumps_bytes(documents))
+
+
+def streaming_export():
+    return sum(len(chunk) for chunk in export_stream('ndjson'))
+
+
+def measure(label, fn):
+    db.session.remove()
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {size / 1e6:8.1f} MB output  peak {peak / 1e6:8.1f} MB  {seconds:6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--database', default='/tmp/bench_export.db')
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        os.remove(args.database)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{args.database}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'json_serializer': json_backend.dumps,
+        'json_deserializer': json_backend.loads,
+    }
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        populate(args.rows)
+        print(f"{args.rows} analyses, one recommendation each")
+        measure('ORM load + one JSON', orm_export)
+        measure('streaming NDJSON', streaming_export)
+    os.remove(args.database)
+
+
+if __name__ == '__main__':
+    main()
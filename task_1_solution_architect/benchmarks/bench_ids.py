@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Insert cost into a table with a unique problem_id index: the previous random
+IDs (P + 8 hex characters) against time-ordered ULID-based IDs, plus the
+chance of a collision among that many IDs.
+
+Run from the task_1_solution_architect directory:
+    python benchmarks/bench_ids.py [--rows 200000] [--database /tmp/bench_ids.db]
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.ids import new_id  # noqa: E402
+
+
+def legacy_id():
+    return f"P{str(uuid.uuid4().hex[:8]).upper()}"
+
+
+def collision_probability(count, bits):
+    # Birthday bound
+    return -math.expm1(-count * (count - 1) / 2 / 2 ** bits)
+
+
+def insert(path, make_id, rows, batch=1000):
+    if os.path.exists(path):
+        os.remove(path)
+    connection = sqlite3.connect(path)
+    # A small page cache makes index locality visible, as on a large production table
+    connection.execute("PRAGMA cache_size = -2000")
+    connection.execute("CREATE TABLE problem_analysis (id INTEGER PRIMARY KEY, problem_id VARCHAR(64) UNIQUE NOT NULL)")
+    started = time.perf_counter()
+    collisions = 0
+    for _ in range(rows // batch):
+        for _ in range(batch):
+            try:
+                connection.execute("INSERT INTO problem_analysis (problem_id) VALUES (?)", (make_id(),))
+            except sqlite3.IntegrityError:
+                collisions += 1
+        connection.commit()
+    seconds = time.perf_counter() - started
+    connection.close()
+    os.remove(path)
+    return seconds, collisions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--database', default='/tmp/bench_ids.db')
+    args = parser.parse_args()
+
+    print(f"{args.rows} inserts")
+    for label, make_id, bits in [('random P + 8 hex', legacy_id, 32), ('ULID', lambda: new_id('P'), 80)]:
+        seconds, collisions = insert(args.database, make_id, args.rows)
+        print(f"{label:<18} {seconds / args.rows * 1e6:7.2f} us/insert  "
+              f"collisions {collisions:>4}  P(any collision) {collision_probability(args.rows, bits):.2e}")
+
+
+if __name__ == '__main__':
+    main()
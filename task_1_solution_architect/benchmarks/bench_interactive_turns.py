@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Round trips, wall-clock time and tokens per completed interactive session with
+one question per turn versus a prioritized set of questions per turn, run
+against the mock LLM backend (fixed latency per call, token counts
+estimated from prompt and response length). Sessions run to the
+7-question maximum.
+
+Run from the task_1_solution_architect directory:
+    python benchmarks/bench_interactive_turns.py [--sessions 20] [--latency-ms 300]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LLM_BACKENDS', '[{"type": "mock"}]')
+os.environ.setdefault('LLM_CACHE_MAX_ENTRIES', '0')
+
+from src.services.interactive_service import InteractiveQuestioningService  # noqa: E402
+from src.services.llm_backends import llm_backends  # noqa: E402
+from src.utils.metrics import metrics  # noqa: E402
+
+
+def _tokens():
+    timings = metrics.snapshot()['timings']
+    return sum(summary['total'] for name, summary in timings.items()
+               if name.startswith(('llm.prompt_tokens.', 'llm.completion_tokens.')))
+
+
+def run(per_turn, sessions):
+    tokens_before = _tokens()
+    round_trips = 0
+    started = time.perf_counter()
+    for i in range(sessions):
+        turn = InteractiveQuestioningService.start_questioning(
+            f"Session {i}: our food bank cannot track donated inventory across three warehouses",
+            'Community Food Bank', 'Denver, CO', questions_per_turn=per_turn
+        )
+        round_trips += 1
+        problem_id = turn['problem_id']
+        while not turn.get('completed'):
+            questions = turn.get('questions') or [turn['question']]
+            turn = InteractiveQuestioningService.continue_questioning(
+                problem_id, [f"Answer to: {question}" for question in questions]
+            )
+            round_trips += 1
+    elapsed = time.perf_counter() - started
+    tokens = _tokens() - tokens_before
+    print(f"{per_turn} per turn: {round_trips / sessions:4.1f} round trips  "
+          f"{elapsed / sessions * 1000:7.0f} ms wall-clock  {tokens / sessions:7.0f} tokens per session")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    args = parser.parse_args()
+    for backend in llm_backends.backends:
+        backend.latency_ms = args.latency_ms
+    for per_turn in (1, 2, 3):
+        run(per_turn, args.sessions)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for the three JSON hot spots on a large comprehensive-solution
+payload: response encoding (Flask provider), DB JSON column serialization and
+LLM response parsing. Compares the stdlib json module with the active backend
+(orjson when installed).
+
+Run from the task_1_solution_architect directory:
+    python benchmarks/bench_json.py [--items 200] [--iterations 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils import json_backend  # noqa: E402
+
+DEMO_CASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'demo_cases', '2_enhanced_analysis', 'community_center_interactive.json')
+
+
+def build_payload(items):
+    with open(DEMO_CASE, encoding='utf-8') as f:
+        solution = json.load(f)['step_3_complete_analysis']['expected_response']
+    line = solution['recommended_tech_stack'][0]
+    return {
+        'success': True,
+        'analysis_summary': solution['solution_summary'] * 4,
+        'solution_summary': solution['solution_summary'] * 4,
+        'recommended_tech_stack': [f"{line} ({i}) – nonprofit pricing ‘NGO’" for i in range(items)],
+        'initial_steps': [f"{step} [{i}]" for i in range(items // 4) for step in solution['initial_steps']],
+        'success_metrics': [f"Metric {i} - measured quarterly" for i in range(items)],
+        'risk_mitigation': [f"Risk {i} - mitigation and contingency plan" for i in range(items)],
+        'ethical_considerations': [f"Consideration {i} - privacy, accessibility, equity" for i in range(items)],
+    }
+
+
+def bench(label, stdlib_fn, backend_fn, iterations):
+    stdlib_s = timeit.timeit(stdlib_fn, number=iterations)
+    backend_s = timeit.timeit(backend_fn, number=iterations)
+    per_call = lambda seconds: seconds / iterations * 1e6
+    print(f"{label:<28} stdlib {per_call(stdlib_s):9.1f} us   "
+          f"{json_backend.backend.name:<6} {per_call(backend_s):9.1f} us   "
+          f"speedup x{stdlib_s / backend_s:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    payload = build_payload(args.items)
+    document = json.dumps(payload)
+    print(f"payload: {len(document) / 1024:.1f} KiB, backend: {json_backend.backend.name}")
+
+    # Flask's DefaultJSONProvider settings: sorted keys, ASCII escaping, compact separators
+    bench('response encoding',
+          lambda: json.dumps(payload, sort_keys=True, ensure_ascii=True, separators=(',', ':')).encode(),
+          lambda: json_backend.dumps_bytes(payload, sort_keys=True),
+          args.iterations)
+    bench('DB JSON column serialize',
+          lambda: json.dumps(payload['recommended_tech_stack']),
+          lambda: json_backend.dumps(payload['recommended_tech_stack']),
+          args.iterations)
+    bench('LLM response parse',
+          lambda: json.loads(document),
+          lambda: json_backend.loads(document),
+          args.iterations)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Queue wait of interactive LLM calls while background (bulk) calls saturate
+the limiter, with priority classes against every call scheduled alike.
+Calls are simulated with sleeps; no model is contacted.
+
+Run from the task_1_solution_architect directory:
+    python benchmarks/bench_llm_priority.py [--bulk-workers 24] [--interactive 60] [--call-ms 50]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.llm_limiter import LLMLimiter  # noqa: E402
+
+
+def simulate(limiter, interactive_priority, bulk_priority, args):
+    stop = threading.Event()
+    waits = []
+
+    def bulk_worker():
+        while not stop.is_set():
+            limiter.acquire('org:bulk', bulk_priority)
+            time.sleep(args.call_ms / 1000)
+            limiter.release(bulk_priority)
+
+    def interactive_user():
+        for _ in range(args.interactive // 4):
+            started = time.perf_counter()
+            limiter.acquire('org:person', interactive_priority)
+            waits.append((time.perf_counter() - started) * 1000)
+            time.sleep(args.call_ms / 1000)
+            limiter.release(interactive_priority)
+            time.sleep(args.call_ms / 1000)
+
+    bulk = [threading.Thread(target=bulk_worker, daemon=True) for _ in range(args.bulk_workers)]
+    for thread in bulk:
+        thread.start()
+    time.sleep(0.2)
+    users = [threading.Thread(target=interactive_user) for _ in range(4)]
+    for thread in users:
+        thread.start()
+    for thread in users:
+        thread.join()
+    stop.set()
+    for thread in bulk:
+        thread.join()
+    waits.sort()
+    return statistics.median(waits), waits[int(len(waits) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bulk-workers', type=int, default=24)
+    parser.add_argument('--interactive', type=int, default=60)
+    parser.add_argument('--call-ms', type=float, default=50)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.bulk_workers} bulk workers, {args.concurrency} slots, {args.call_ms:.0f} ms per call")
+    for label, interactive, bulk in [('all calls standard', 'standard', 'standard'),
+                                     ('priority classes', 'interactive', 'bulk')]:
+        limiter = LLMLimiter(rate_per_min=0, max_concurrency=args.concurrency, weights={})
+        p50, p99 = simulate(limiter, interactive, bulk, args)
+        print(f"{label:<20} interactive queue wait p50 {p50:7.1f} ms  p99 {p99:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
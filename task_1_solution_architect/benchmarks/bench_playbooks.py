@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Latency of the offline playbook engine: index build from demo_cases and
+per-statement matching (target: well under 10 ms per match).
+
+Run from the task_1_solution_architect directory:
+    python benchmarks/bench_playbooks.py [--iterations 5000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.playbooks import PlaybookEngine, load_demo_playbooks  # noqa: E402
+
+STATEMENTS = [
+    "Our food bank needs help with inventory management",
+    "We run a soup kitchen and have trouble with volunteer scheduling across three sites, "
+    "relying on paper sign-up sheets and phone calls that lead to missed shifts",
+    "Our animal rescue cannot keep track of adoptions, fosters and follow-up visits",
+    "We need a new website and online ticketing for our community theatre group",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args()
+
+    build_s = timeit.timeit(lambda: PlaybookEngine(load_demo_playbooks()), number=20) / 20
+    engine = PlaybookEngine(load_demo_playbooks())
+    print(f"index build ({len(engine.playbooks)} playbooks): {build_s * 1000:.2f} ms")
+
+    for statement in STATEMENTS:
+        seconds = timeit.timeit(lambda: engine.match(statement), number=args.iterations)
+        playbook, confidence = engine.match(statement)
+        name = playbook['playbook_id'] if playbook else '-'
+        print(f"{seconds / args.iterations * 1e6:8.1f} us  confidence {confidence:.2f}  "
+              f"{name:<30} {statement[:50]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Per-request cost of validating /recommend bodies: the previous approach
+(request.get_json, a separate validator pass, then per-field sanitize calls
+in the route) against the declarative RequestSchema (Content-Length check,
+one parse, one validate-and-sanitize pass). Also shows the cost of a large
+body, which the old path parsed in full before rejecting.
+
+Run from the task_1_solution_architect directory:
+    python benchmarks/bench_request_validation.py [--iterations 5000] [--large-mb 8]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, request  # noqa: E402
+
+from src.utils.validators import RECOMMEND_REQUEST, RequestValidator  # noqa: E402
+
+# No MAX_CONTENT_LENGTH, as before this change
+app = Flask(__name__)
+
+
+def legacy_recommend():
+    """
+    The validation and sanitization steps /recommend performed before RequestSchema
+    """
+    if not request.is_json:
+        return None
+    data = request.get_json()
+    if not data:
+        return None
+    for field in ('problem_id', 'description', 'clarifying_questions'):
+        if field not in data:
+            return None
+    if not isinstance(data['problem_id'], str) or not isinstance(data['description'], str):
+        return None
+    if not isinstance(data['clarifying_questions'], list):
+        return None
+    if not data['problem_id'].strip() or not data['description'].strip():
+        return None
+    for question in data['clarifying_questions']:
+        if not isinstance(question, str):
+            return None
+    if data.get('analysis_mode', 'basic') not in ['basic', 'enhanced']:
+        return None
+    data = request.get_json()
+    return {
+        'problem_id': RequestValidator.sanitize_input(data['problem_id']),
+        'description': RequestValidator.sanitize_input(data['description']),
+        'clarifying_questions': [RequestValidator.sanitize_input(q) for q in data['clarifying_questions']],
+    }
+
+
+def schema_recommend():
+    payload, error, _ = RECOMMEND_REQUEST.parse()
+    return payload
+
+
+def run(label, fn, body, iterations):
+    def once():
+        with app.test_request_context('/recommend', method='POST', data=body,
+                                      content_type='application/json'):
+            fn()
+    seconds = timeit.timeit(once, number=iterations)
+    print(f"{label:<34} {seconds / iterations * 1e6:10.1f} us/request")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--large-mb', type=int, default=8)
+    args = parser.parse_args()
+
+    typical = json.dumps({
+        'problem_id': 'P879FF680',
+        'description': 'The core operational challenge is the lack of an efficient system to track '
+                       'and manage food inventory, leading to potential waste, shortages, or overstocking.',
+        'clarifying_questions': ['We currently use paper logs and spreadsheets',
+                                 'We have major issues with perishable items expiring before distribution'],
+    })
+    large = json.dumps({
+        'problem_id': 'P879FF680',
+        'description': 'd',
+        'clarifying_questions': ['padding text ' * 64] * (args.large_mb * 1024 * 1024 // 840),
+    })
+
+    print(f"typical body ({len(typical)} bytes)")
+    run("  legacy get_json + validator", legacy_recommend, typical, args.iterations)
+    run("  RequestSchema", schema_recommend, typical, args.iterations)
+    print(f"large body ({len(large) / 1024 / 1024:.1f} MB)")
+    run("  legacy get_json + validator", legacy_recommend, large, 5)
+    run("  RequestSchema (rejected early)", schema_recommend, large, 5)
+
+
+if __name__ == '__main__':
+    main()
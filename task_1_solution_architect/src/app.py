@@ -3,10 +3,16 @@ import logging
 from flask import Flask
 from werkzeug.middleware.proxy_fix import ProxyFix
 from src import load_env
+from src.utils import json_backend
+from src.utils.http_cache import PrecomputedResponse
+from src.utils.logging_config import configure_logging, init_request_logging
+from src.utils.metrics import metrics
+from src.utils.profiling import init_profiling
+from src.utils.validators import REQUEST_MAX_BODY_BYTES, BodyLimitedRequest
 
 
 # Configure logging
-logging.basicConfig(level=logging.DEBUG)
+configure_logging()
 
 # Import db from models to avoid circular import
 from src import models
@@ -15,8 +21,14 @@ db = models.db
 
 # Create the app
 app = Flask(__name__)
+app.json = json_backend.FastJSONProvider(app)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+# Backstop for bodies without a Content-Length; schemas enforce their own (lower) limits
+app.config["MAX_CONTENT_LENGTH"] = REQUEST_MAX_BODY_BYTES
+app.request_class = BodyLimitedRequest
+init_request_logging(app)
+init_profiling(app)
 
 # Configure the database
 db_url = os.environ.get("DATABASE_URL")
@@ -27,6 +39,8 @@ app.config["SQLALCHEMY_DATABASE_URI"] = db_url
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
+    "json_serializer": json_backend.dumps,
+    "json_deserializer": json_backend.loads,
 }
 
 # Initialize the app with the extension
@@ -43,66 +57,140 @@ from src.routes.analyze import analyze_bp
 from src.routes.recommend import recommend_bp
 from src.routes.interactive_questioning import questioning_bp
 from src.routes.problem_structuring import structuring_bp
+from src.routes.jobs import jobs_bp
+from src.routes.export import export_bp
+from src.routes.imports import imports_bp
+from src.routes.experiments import experiments_bp
+from src.routes.solve import solve_bp
+from src.services.job_queue import job_queue
+from src.services.prompt_experiments import prompt_experiments
+from src.services.warmup import warmup
 
 
 app.register_blueprint(analyze_bp)
 app.register_blueprint(recommend_bp)
 app.register_blueprint(questioning_bp)
 app.register_blueprint(structuring_bp)
+app.register_blueprint(jobs_bp)
+app.register_blueprint(export_bp)
+app.register_blueprint(imports_bp)
+app.register_blueprint(experiments_bp)
+app.register_blueprint(solve_bp)
+
+# Start background job workers
+job_queue.init_app(app)
+# Record prompt experiment observations in the background
+prompt_experiments.init_app(app)
+# Warm the playbook and similarity indexes and the LLM response cache in the background
+warmup.init_app(app)
+
+INDEX_RESPONSE = PrecomputedResponse({
+    "message": "AI Architect for Nonprofit Solutions API",
+    "version": "1.0.0",
+    "endpoints": {
+        "analyze": {
+            "method": "POST",
+            "url": "/analyze",
+            "description": "Analyze nonprofit problem statements (basic/enhanced)"
+        },
+        "get_analysis": {
+            "method": "GET",
+            "url": "/analyze/<problem_id>",
+            "description": "Fetch a stored analysis (cacheable, supports If-None-Match)"
+        },
+        "analyze_interactive": {
+            "method": "POST",
+            "url": "/analyze/interactive",
+            "description": "Start interactive questioning session (enhanced mode)"
+        },
+        "continue_interactive": {
+            "method": "POST",
+            "url": "/analyze/interactive/continue",
+            "description": "Continue interactive questioning with answer"
+        },
+        "complete_interactive": {
+            "method": "POST",
+            "url": "/analyze/interactive/complete",
+            "description": "Complete analysis with comprehensive solution"
+        },
+        "recommend": {
+            "method": "POST", 
+            "url": "/recommend",
+            "description": "Generate technical recommendations"
+        },
+        "solve": {
+            "method": "POST",
+            "url": "/solve",
+            "description": "Analyze and recommend in one request; \"stream\": true sends each stage as an NDJSON line"
+        },
+        "get_recommendations": {
+            "method": "GET",
+            "url": "/recommend/<problem_id>",
+            "description": "Fetch stored recommendations for a problem (supports If-None-Match)"
+        },
+        "structure_problem_start": {
+            "method": "POST",
+            "url": "/problem/structure/start",
+            "description": "Start guided problem statement structuring"
+        },
+        "structure_problem_continue": {
+            "method": "POST",
+            "url": "/problem/structure/continue",
+            "description": "Continue structured problem development"
+        },
+        "structure_problem_complete": {
+            "method": "POST",
+            "url": "/problem/structure/complete",
+            "description": "Generate final structured problem statement"
+        },
+        "get_job": {
+            "method": "GET",
+            "url": "/jobs/<job_id>",
+            "description": "Poll a background job started with \"async\": true"
+        },
+        "export": {
+            "method": "GET",
+            "url": "/export",
+            "description": "Stream analyses with their recommendations as NDJSON or CSV (format, since, until, mode, compress)"
+        },
+        "import": {
+            "method": "POST",
+            "url": "/import",
+            "description": "Import a CSV of problem statements; only statements not analyzed before are queued"
+        },
+        "experiments": {
+            "method": "GET",
+            "url": "/experiments",
+            "description": "Compare latency, tokens and parse failures of prompt variants (experiment, since)"
+        },
+        "warmup": {
+            "method": "GET",
+            "url": "/warmup",
+            "description": "Cache warm-up progress and LLM cache hit ratio before and after warm-up"
+        }
+    }
+})
 
 @app.route('/')
 def index():
-    return {
-        "message": "AI Architect for Nonprofit Solutions API",
-        "version": "1.0.0",
-        "endpoints": {
-            "analyze": {
-                "method": "POST",
-                "url": "/analyze",
-                "description": "Analyze nonprofit problem statements (basic/enhanced)"
-            },
-            "analyze_interactive": {
-                "method": "POST",
-                "url": "/analyze/interactive",
-                "description": "Start interactive questioning session (enhanced mode)"
-            },
-            "continue_interactive": {
-                "method": "POST",
-                "url": "/analyze/interactive/continue",
-                "description": "Continue interactive questioning with answer"
-            },
-            "complete_interactive": {
-                "method": "POST",
-                "url": "/analyze/interactive/complete",
-                "description": "Complete analysis with comprehensive solution"
-            },
-            "recommend": {
-                "method": "POST", 
-                "url": "/recommend",
-                "description": "Generate technical recommendations"
-            },
-            "structure_problem_start": {
-                "method": "POST",
-                "url": "/problem/structure/start",
-                "description": "Start guided problem statement structuring"
-            },
-            "structure_problem_continue": {
-                "method": "POST",
-                "url": "/problem/structure/continue",
-                "description": "Continue structured problem development"
-            },
-            "structure_problem_complete": {
-                "method": "POST",
-                "url": "/problem/structure/complete",
-                "description": "Generate final structured problem statement"
-            }
-        }
-    }
+    return INDEX_RESPONSE.serve()
+
+@app.route('/metrics')
+def get_metrics():
+    return metrics.snapshot()
+
+@app.route('/warmup')
+def get_warmup():
+    return warmup.status()
 
 @app.errorhandler(404)
 def not_found(error):
     return {"error": "Endpoint not found", "message": "Please check the API documentation for valid endpoints."}, 404
 
+@app.errorhandler(413)
+def payload_too_large(error):
+    return {"error": "payload_too_large", "message": f"Request body must be at most {REQUEST_MAX_BODY_BYTES} bytes", "status_code": 413}, 413
+
 @app.errorhandler(500)
 def internal_error(error):
     return {"error": "Internal server error", "message": "An unexpected error occurred. Please try again."}, 500
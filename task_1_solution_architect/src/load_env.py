@@ -18,7 +18,7 @@ def load_env_file():
         for env_filename in env_filenames:
             env_path = os.path.join(base_dir, env_filename)
             if os.path.exists(env_path):
-                logger.info(f"Loading environment variables from {env_path}")
+                logger.info("Loading environment variables from %s", env_path)
                 with open(env_path, 'r', encoding='utf-8') as f:
                     for line in f:
                         line = line.strip()
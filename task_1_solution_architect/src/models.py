@@ -47,3 +47,83 @@ class TechRecommendation(db.Model):
             'analysis_mode': self.analysis_mode,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+class BackgroundJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(64), unique=True, nullable=False)
+    job_type = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON)
+    callback_url = db.Column(db.String(2048))
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, succeeded, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (db.Index('ix_background_job_status_run_after', 'status', 'run_after'),)
+
+    def to_dict(self):
+        data = {
+            'job_id': self.job_id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+        if self.callback_url:
+            data['callback_url'] = self.callback_url
+        if self.status == 'succeeded':
+            data['result'] = self.result
+        elif self.error:
+            data['error'] = self.error
+        return data
+
+class WebhookDeadLetter(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(64), nullable=False, index=True)
+    callback_url = db.Column(db.String(2048), nullable=False)
+    event = db.Column(db.String(50), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'callback_url': self.callback_url,
+            'event': self.event,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class StatementFingerprint(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # SHA-256 of the normalized problem statement
+    statement_hash = db.Column(db.String(64), unique=True, nullable=False)
+    problem_id = db.Column(db.String(64), nullable=False, index=True)
+    source = db.Column(db.String(20), default='api')  # 'api', 'import' or 'backfill'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class PromptObservation(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    experiment = db.Column(db.String(64), nullable=False)
+    variant = db.Column(db.String(64), nullable=False)
+    call_type = db.Column(db.String(64), nullable=False)
+    model = db.Column(db.String(64))
+    latency_ms = db.Column(db.Float, nullable=False)
+    prompt_tokens = db.Column(db.Integer)
+    completion_tokens = db.Column(db.Integer)
+    parse_failed = db.Column(db.Boolean, default=False, nullable=False)
+    degraded = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_prompt_observation_experiment_created_at', 'experiment', 'created_at'),)
@@ -1,43 +1,73 @@
 from flask import Blueprint, request, jsonify
 import logging
+from src.models import ProblemAnalysis
 from src.services.analysis_service import AnalysisService
-from src.utils.validators import RequestValidator
+from src.services.circuit_breaker import CircuitOpenError
+from src.services.llm_limiter import tenant_limited
+from src.utils.deadlines import Deadline, DeadlineExceeded
+from src.utils.validators import ANALYZE_REQUEST, validated_json
 from src.utils.helpers import (
     create_error_response,
     create_success_response,
     log_request_info,
     validate_openai_key,
 )
+from src.utils.http_cache import (
+    IMMUTABLE_CACHE_CONTROL,
+    PrecomputedResponse,
+    conditional_json_response,
+)
 
 analyze_bp = Blueprint('analyze', __name__)
 logger = logging.getLogger(__name__)
 
+ANALYSIS_MODES_RESPONSE = PrecomputedResponse({
+    "success": True,
+    "modes": {
+        "basic": {
+            "name": "Basic Analysis",
+            "description": "Quick analysis focusing on core operational challenges and essential technical gaps",
+            "features": [
+                "Concise problem identification",
+                "Essential clarifying questions",
+                "Fast processing time"
+            ]
+        },
+        "enhanced": {
+            "name": "Enhanced Analysis", 
+            "description": "Comprehensive analysis considering nonprofit-specific constraints and strategic factors",
+            "features": [
+                "Root cause analysis",
+                "Organizational impact assessment",
+                "Strategic clarifying questions",
+                "Resource constraint evaluation",
+                "Change management considerations"
+            ]
+        }
+    }
+})
+
 @analyze_bp.route('/analyze', methods=['POST'])
-def analyze_problem():
+@validated_json(ANALYZE_REQUEST)
+@tenant_limited()
+def analyze_problem(data):
     """
     Analyze nonprofit problem statements
     Supports both basic and enhanced analysis modes
     """
     try:
+        deadline = Deadline.from_request()
+        
         # Validate OpenAI API key
         validate_openai_key()
         
-        # Validate request
-        is_valid, error_message = RequestValidator.validate_analyze_request()
-        if not is_valid:
-            return create_error_response(error_message)
-        
-        # Get request data
-        data = request.get_json()
         log_request_info('/analyze', data)
         
-        # Sanitize input
-        problem_statement = RequestValidator.sanitize_input(data['problem_statement'])
-        
         # Perform analysis (always basic mode for /analyze endpoint)
         result = AnalysisService.analyze_problem(
-            problem_statement=problem_statement,
-            analysis_mode='basic'
+            problem_statement=data['problem_statement'],
+            analysis_mode='basic',
+            deadline=deadline
         )
         
         # Return only specified fields for simple analysis
@@ -46,13 +76,25 @@ def analyze_problem():
             'description': result['description'],
             'clarifying_questions': result['clarifying_questions']
         }
+        if result.get('degraded'):
+            simple_result['degraded'] = True
+        if result.get('playbook_id'):
+            simple_result['playbook_id'] = result['playbook_id']
+        if result.get('reused'):
+            simple_result['reused'] = True
+        if result.get('similar_problems'):
+            simple_result['similar_problems'] = result['similar_problems']
         
-        logger.info(f"Analysis completed successfully: {result['problem_id']}")
+        logger.info("Analysis completed successfully: %s", result['problem_id'])
         
         return create_success_response(simple_result)
         
+    except DeadlineExceeded as e:
+        return create_error_response(str(e), status_code=504, error_type="deadline_exceeded")
+    except CircuitOpenError as e:
+        return create_error_response(str(e), status_code=503, error_type="service_unavailable")
     except Exception as e:
-        logger.error(f"Analysis endpoint error: {e}")
+        logger.error("Analysis endpoint error: %s", e)
         if "API key" in str(e).lower():
             return create_error_response(
                 "OpenAI API configuration error. Please check your API key.",
@@ -71,27 +113,14 @@ def get_analysis_modes():
     """
     Get available analysis modes and their descriptions
     """
-    return create_success_response({
-        "modes": {
-            "basic": {
-                "name": "Basic Analysis",
-                "description": "Quick analysis focusing on core operational challenges and essential technical gaps",
-                "features": [
-                    "Concise problem identification",
-                    "Essential clarifying questions",
-                    "Fast processing time"
-                ]
-            },
-            "enhanced": {
-                "name": "Enhanced Analysis", 
-                "description": "Comprehensive analysis considering nonprofit-specific constraints and strategic factors",
-                "features": [
-                    "Root cause analysis",
-                    "Organizational impact assessment",
-                    "Strategic clarifying questions",
-                    "Resource constraint evaluation",
-                    "Change management considerations"
-                ]
-            }
-        }
-    })
+    return ANALYSIS_MODES_RESPONSE.serve()
+
+@analyze_bp.route('/analyze/<problem_id>', methods=['GET'])
+def get_analysis(problem_id):
+    """
+    Fetch a stored analysis; stored analyses never change, so they are cacheable forever
+    """
+    analysis = ProblemAnalysis.query.filter_by(problem_id=problem_id).first()
+    if not analysis:
+        return create_error_response(f"Problem ID {problem_id} not found", status_code=404, error_type="not_found")
+    return conditional_json_response({"success": True, **analysis.to_dict()}, IMMUTABLE_CACHE_CONTROL)
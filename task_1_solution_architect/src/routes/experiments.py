@@ -0,0 +1,55 @@
+from datetime import datetime
+import logging
+
+import click
+from flask import Blueprint, request
+
+from src.services.job_queue import job_queue
+from src.services.prompt_experiments import CONTROL, prompt_experiments
+from src.utils.helpers import create_error_response, create_success_response
+
+experiments_bp = Blueprint('experiments', __name__, cli_group=None)
+logger = logging.getLogger(__name__)
+
+
+@experiments_bp.route('/experiments', methods=['GET'])
+def experiment_report():
+    """
+    Compare the prompt variants of each experiment (optionally one experiment, since a date)
+    """
+    try:
+        since = datetime.fromisoformat(request.args['since']) if request.args.get('since') else None
+    except ValueError:
+        return create_error_response("since must be an ISO 8601 date, e.g. 2025-01-31")
+    try:
+        report = prompt_experiments.report(request.args.get('experiment'), since)
+    except Exception as e:
+        logger.error("Experiment report error: %s", e)
+        return create_error_response(f"Experiment report failed: {str(e)}", status_code=500, error_type="report_error")
+    return create_success_response({'experiments': report})
+
+
+@experiments_bp.cli.command('experiment-report')
+@click.option('--experiment', help='Only this experiment')
+@click.option('--since', type=click.DateTime(), help='Only calls recorded since this date')
+def experiment_report_command(experiment, since):
+    """
+    Print the prompt variant comparison of each experiment
+    """
+    job_queue.stop()
+    report = prompt_experiments.report(experiment, since)
+    if not report:
+        click.echo("No prompt experiment observations recorded")
+    for name, result in report.items():
+        click.echo(f"{name}{'' if result['running'] else ' (not running)'}")
+        click.echo(f"  {'variant':<12}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}"
+                   f"{'prompt tok':>12}{'compl. tok':>12}{'parse fail':>12}")
+        for variant, summary in result['variants'].items():
+            click.echo(f"  {variant:<12}{summary['calls']:>7}{summary['latency_ms']['p50']:>10.0f}"
+                       f"{summary['latency_ms']['p95']:>10.0f}{summary['prompt_tokens'] or 0:>12.0f}"
+                       f"{summary['completion_tokens'] or 0:>12.0f}{summary['parse_failure_rate']:>12.1%}")
+        for variant, change in result['vs_control'].items():
+            click.echo(f"  {variant} vs {CONTROL}: latency p50 {change['latency_p50_change_pct']}%, "
+                       f"p95 {change['latency_p95_change_pct']}%, prompt tokens {change['prompt_tokens_change_pct']}%, "
+                       f"completion tokens {change['completion_tokens_change_pct']}%, "
+                       f"parse failure rate {change['parse_failure_rate_change']:+.1%}")
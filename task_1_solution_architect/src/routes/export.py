@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+import logging
+import os
+
+from flask import Blueprint, Response, request, stream_with_context
+
+from src.services.export_service import export_stream
+from src.utils.helpers import create_error_response, has_bearer_token
+
+export_bp = Blueprint('export', __name__)
+logger = logging.getLogger(__name__)
+
+# Bearer token required by GET /export; the endpoint is disabled while unset
+EXPORT_TOKEN = os.environ.get('EXPORT_TOKEN', '')
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def _parse_date(name):
+    """
+    Parse an ISO 8601 date or datetime query parameter as naive UTC, like the stored timestamps
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+@export_bp.route('/export', methods=['GET'])
+def export_data():
+    """
+    Stream every analysis joined with its recommendations as NDJSON or CSV
+    """
+    if not EXPORT_TOKEN:
+        return create_error_response("Export is not enabled on this server", status_code=404, error_type="not_found")
+    if not has_bearer_token(EXPORT_TOKEN):
+        return create_error_response("A valid export token is required", status_code=401, error_type="unauthorized")
+
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return create_error_response(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    mode = request.args.get('mode')
+    if mode is not None and mode not in ('basic', 'enhanced'):
+        return create_error_response("mode must be one of: basic, enhanced")
+    compress = request.args.get('compress', '')
+    if compress not in ('', 'gzip'):
+        return create_error_response("compress must be gzip")
+    try:
+        since = _parse_date('since')
+        until = _parse_date('until')
+    except ValueError:
+        return create_error_response("since and until must be ISO 8601 dates, e.g. 2025-01-31")
+
+    response = Response(
+        stream_with_context(export_stream(export_format, since, until, mode, compress=bool(compress))),
+        mimetype=EXPORT_FORMATS[export_format]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="export.{export_format}"'
+    response.headers['Cache-Control'] = 'no-store'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,80 @@
+import io
+import logging
+import os
+
+import click
+from flask import Blueprint, request
+
+from src.services.import_service import CSVImportError, backfill_fingerprints, import_statements
+from src.services.job_queue import job_queue
+from src.utils.helpers import create_error_response, create_success_response, has_bearer_token
+from src.utils.validators import body_limit
+
+imports_bp = Blueprint('imports', __name__, cli_group=None)
+logger = logging.getLogger(__name__)
+
+# Bearer token required by POST /import; the endpoint is disabled while unset
+IMPORT_TOKEN = os.environ.get('IMPORT_TOKEN', '')
+IMPORT_MAX_BODY_BYTES = int(os.environ.get('IMPORT_MAX_BODY_BYTES', str(10 * 1024 * 1024)))
+
+
+@imports_bp.route('/import', methods=['POST'])
+@body_limit(IMPORT_MAX_BODY_BYTES)
+def import_csv():
+    """
+    Import problem statements from a CSV body (or a multipart 'file' upload),
+    queueing analyses only for statements not analyzed before
+    """
+    if not IMPORT_TOKEN:
+        return create_error_response("Import is not enabled on this server", status_code=404, error_type="not_found")
+    if not has_bearer_token(IMPORT_TOKEN):
+        return create_error_response("A valid import token is required", status_code=401, error_type="unauthorized")
+
+    column = request.args.get('column', 'problem_statement')
+    analysis_mode = request.args.get('mode', 'basic')
+    if analysis_mode not in ('basic', 'enhanced'):
+        return create_error_response("mode must be one of: basic, enhanced")
+
+    upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+    stream = upload.stream if upload else request.stream
+    try:
+        lines = io.TextIOWrapper(io.BufferedReader(stream) if upload is None else stream,
+                                 encoding='utf-8-sig', newline='')
+        summary = import_statements(lines, column, analysis_mode)
+    except (CSVImportError, UnicodeDecodeError) as e:
+        return create_error_response(f"Invalid CSV: {str(e)}")
+    except Exception as e:
+        logger.error("Import error: %s", e)
+        return create_error_response(f"Import failed: {str(e)}", status_code=500, error_type="import_error")
+    return create_success_response(summary, status_code=202 if summary['queued'] else 200)
+
+
+@imports_bp.cli.command('import-csv')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--column', default='problem_statement', show_default=True, help='CSV column holding the statements')
+@click.option('--mode', type=click.Choice(['basic', 'enhanced']), default='basic', show_default=True)
+def import_csv_command(path, column, mode):
+    """
+    Queue analyses for the new problem statements in a CSV file
+    """
+    # This process only queues the work; the server's workers run it
+    job_queue.stop()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        try:
+            summary = import_statements(f, column, mode)
+        except CSVImportError as e:
+            raise click.ClickException(str(e))
+    for result in summary['results']:
+        if result['status'] == 'invalid':
+            click.echo(f"row {result['row']}: {result['error']}", err=True)
+    click.echo(f"{summary['rows']} rows: {summary['queued']} queued, {summary['duplicate']} already analyzed, "
+               f"{summary['invalid']} invalid" + (" (truncated)" if summary['truncated'] else ""))
+
+
+@imports_bp.cli.command('backfill-fingerprints')
+def backfill_fingerprints_command():
+    """
+    Fingerprint analyses stored before deduplication existed
+    """
+    job_queue.stop()
+    click.echo(f"{backfill_fingerprints()} fingerprints added")
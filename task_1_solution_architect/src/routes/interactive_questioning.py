@@ -1,11 +1,23 @@
 from flask import Blueprint, request, jsonify
 import logging
 
+from src.services.circuit_breaker import CircuitOpenError
 from src.services.interactive_service import InteractiveQuestioningService
-from src.utils.validators import RequestValidator
+from src.services.job_queue import job_queue
+from src.services.llm_limiter import tenant_limited
+from src.services.webhooks import validate_callback_url
+from src.utils.deadlines import Deadline, DeadlineExceeded
+from src.utils.validators import (
+    INTERACTIVE_COMPLETE_REQUEST,
+    INTERACTIVE_CONTINUE_REQUEST,
+    INTERACTIVE_START_REQUEST,
+    validated_json,
+)
 from src.utils.helpers import (
     create_error_response,
+    create_job_accepted_response,
     create_success_response,
+    is_async_request,
     log_request_info,
     validate_openai_key,
 )
@@ -13,61 +25,40 @@ from src.utils.helpers import (
 questioning_bp = Blueprint('questioning', __name__)
 logger = logging.getLogger(__name__)
 
+def _session_organization(data):
+    return InteractiveQuestioningService.session_organization(data['problem_id'])
+
 @questioning_bp.route('/analyze/interactive', methods=['POST'])
-def start_interactive_analysis():
+@validated_json(INTERACTIVE_START_REQUEST)
+@tenant_limited(priority='interactive')
+def start_interactive_analysis(data):
     """
     Start an interactive questioning session for enhanced analysis
     """
     try:
-        validate_openai_key()
+        deadline = Deadline.from_request()
         
-        data = request.get_json()
-        if not data or 'problem_statement' not in data:
-            return create_error_response("Missing required field: problem_statement")
-        
-        # Check for required enhanced analysis fields
-        if 'organization_name' not in data:
-            return create_error_response("Missing required field: organization_name")
-        if 'geographic_location' not in data:
-            return create_error_response("Missing required field: geographic_location")
-        
-        # Check if structured problem statement is provided
-        structured_problem = data.get('structured_problem_statement')
-        if structured_problem:
-            # Validate structured problem statement fields
-            required_fields = ['we_are', 'we_are_trying_to', 'but', 'because', 'which_makes_us_feel']
-            missing_fields = [field for field in required_fields if not structured_problem.get(field)]
-            if missing_fields:
-                return create_error_response(f"Missing structured problem statement fields: {', '.join(missing_fields)}")
+        validate_openai_key()
         
         log_request_info('/analyze/interactive', data)
         
-        problem_statement = RequestValidator.sanitize_input(data['problem_statement'])
-        organization_name = RequestValidator.sanitize_input(data['organization_name'])
-        geographic_location = RequestValidator.sanitize_input(data['geographic_location'])
-        
-        # Process structured problem statement if provided
-        if structured_problem:
-            structured_statement = {
-                'we_are': RequestValidator.sanitize_input(structured_problem['we_are']),
-                'we_are_trying_to': RequestValidator.sanitize_input(structured_problem['we_are_trying_to']),
-                'but': RequestValidator.sanitize_input(structured_problem['but']),
-                'because': RequestValidator.sanitize_input(structured_problem['because']),
-                'which_makes_us_feel': RequestValidator.sanitize_input(structured_problem['which_makes_us_feel'])
-            }
-        else:
-            structured_statement = None
-        
         # Start interactive questioning session with organization context
         result = InteractiveQuestioningService.start_questioning(
-            problem_statement, organization_name, geographic_location, structured_statement
+            data['problem_statement'], data['organization_name'], data['geographic_location'],
+            data.get('structured_problem_statement'),
+            questions_per_turn=data.get('questions_per_turn'),
+            deadline=deadline
         )
         
-        logger.info(f"Interactive questioning started: {result['problem_id']}")
+        logger.info("Interactive questioning started: %s", result['problem_id'])
         return create_success_response(result)
         
+    except DeadlineExceeded as e:
+        return create_error_response(str(e), status_code=504, error_type="deadline_exceeded")
+    except CircuitOpenError as e:
+        return create_error_response(str(e), status_code=503, error_type="service_unavailable")
     except Exception as e:
-        logger.error(f"Interactive analysis start error: {e}")
+        logger.error("Interactive analysis start error: %s", e)
         return create_error_response(
             f"Failed to start interactive analysis: {str(e)}",
             status_code=500,
@@ -75,30 +66,39 @@ def start_interactive_analysis():
         )
 
 @questioning_bp.route('/analyze/interactive/continue', methods=['POST'])
-def continue_interactive_analysis():
+@validated_json(INTERACTIVE_CONTINUE_REQUEST)
+@tenant_limited(organization=_session_organization, priority='interactive')
+def continue_interactive_analysis(data):
     """
-    Continue the interactive questioning session with user's answer
+    Continue the interactive questioning session with the user's answer, or
+    answers to every question of a multi-question turn
     """
     try:
-        validate_openai_key()
+        deadline = Deadline.from_request()
         
-        data = request.get_json()
-        if not data or 'problem_id' not in data or 'answer' not in data:
-            return create_error_response("Missing required fields: problem_id, answer")
+        validate_openai_key()
         
         log_request_info('/analyze/interactive/continue', data)
         
-        problem_id = RequestValidator.sanitize_input(data['problem_id'])
-        answer = RequestValidator.sanitize_input(data['answer'])
+        problem_id = data['problem_id']
+        answers = data.get('answers') or ([data['answer']] if data.get('answer') else None)
+        if not answers:
+            return create_error_response("Missing required field: answer (or answers)")
         
         # Continue questioning
-        result = InteractiveQuestioningService.continue_questioning(problem_id, answer)
+        result = InteractiveQuestioningService.continue_questioning(problem_id, answers, deadline=deadline)
         
-        logger.info(f"Interactive questioning continued: {problem_id}")
+        logger.info("Interactive questioning continued: %s", problem_id)
         return create_success_response(result)
         
+    except DeadlineExceeded as e:
+        return create_error_response(str(e), status_code=504, error_type="deadline_exceeded")
+    except CircuitOpenError as e:
+        return create_error_response(str(e), status_code=503, error_type="service_unavailable")
+    except ValueError as e:
+        return create_error_response(str(e))
     except Exception as e:
-        logger.error(f"Interactive questioning continue error: {e}")
+        logger.error("Interactive questioning continue error: %s", e)
         return create_error_response(
             f"Failed to continue questioning: {str(e)}",
             status_code=500,
@@ -106,31 +106,60 @@ def continue_interactive_analysis():
         )
 
 @questioning_bp.route('/analyze/interactive/complete', methods=['POST'])
-def complete_interactive_analysis():
+@validated_json(INTERACTIVE_COMPLETE_REQUEST)
+@tenant_limited(organization=_session_organization)
+def complete_interactive_analysis(data):
     """
     Complete the interactive analysis and generate comprehensive recommendations
     """
     try:
-        validate_openai_key()
+        deadline = Deadline.from_request()
         
-        data = request.get_json()
-        if not data or 'problem_id' not in data:
-            return create_error_response("Missing required field: problem_id")
+        validate_openai_key()
         
         log_request_info('/analyze/interactive/complete', data)
         
-        problem_id = RequestValidator.sanitize_input(data['problem_id'])
+        problem_id = data['problem_id']
+        
+        if is_async_request(data):
+            session = InteractiveQuestioningService.questioning_sessions.get(problem_id)
+            if session is None:
+                return create_error_response("No questioning session found for this problem ID", status_code=404, error_type="not_found")
+            callback_url = data.get('callback_url')
+            if callback_url is not None:
+                callback_error = validate_callback_url(callback_url)
+                if callback_error:
+                    return create_error_response(callback_error)
+            job = job_queue.enqueue('interactive_complete', {'problem_id': problem_id, 'session': session},
+                                    callback_url=callback_url)
+            logger.info("Interactive analysis completion queued: %s as %s", problem_id, job.job_id)
+            return create_job_accepted_response(job)
         
         # Generate final comprehensive analysis and recommendations
-        result = InteractiveQuestioningService.generate_comprehensive_solution(problem_id)
+        result = InteractiveQuestioningService.generate_comprehensive_solution(problem_id, deadline=deadline)
         
-        logger.info(f"Interactive analysis completed: {problem_id}")
+        logger.info("Interactive analysis completed: %s", problem_id)
         return create_success_response(result)
         
+    except DeadlineExceeded as e:
+        return create_error_response(str(e), status_code=504, error_type="deadline_exceeded")
+    except CircuitOpenError as e:
+        return create_error_response(str(e), status_code=503, error_type="service_unavailable")
     except Exception as e:
-        logger.error(f"Interactive analysis completion error: {e}")
+        logger.error("Interactive analysis completion error: %s", e)
         return create_error_response(
             f"Failed to complete interactive analysis: {str(e)}",
             status_code=500,
             error_type="interactive_completion_error"
-        )
\ No newline at end of file
+        )
+
+def _run_interactive_complete_job(payload):
+    """
+    Background job: generate the comprehensive solution for a session
+    """
+    problem_id = payload['problem_id']
+    # The session snapshot lets the job run in another process or after a restart
+    InteractiveQuestioningService.questioning_sessions.setdefault(problem_id, payload['session'])
+    return InteractiveQuestioningService.generate_comprehensive_solution(problem_id)
+
+job_queue.register('interactive_complete', _run_interactive_complete_job)
@@ -0,0 +1,20 @@
+from flask import Blueprint
+import logging
+
+from src.services.job_queue import job_queue
+from src.utils.helpers import create_error_response, create_success_response
+
+jobs_bp = Blueprint('jobs', __name__)
+logger = logging.getLogger(__name__)
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Poll a background job for its status, and its result once it has succeeded
+    """
+    job = job_queue.get(job_id)
+    if not job:
+        return create_error_response(f"Job {job_id} not found", status_code=404, error_type="not_found")
+    response, status_code = create_success_response(job.to_dict())
+    response.headers['Cache-Control'] = 'no-store'
+    return response, status_code
@@ -1,10 +1,21 @@
 from flask import Blueprint, request, jsonify
 import logging
+from src.services.job_queue import job_queue
+from src.services.llm_limiter import tenant_limited
 from src.services.problem_structuring_service import ProblemStructuringService
-from src.utils.validators import RequestValidator
+from src.services.webhooks import validate_callback_url
+from src.utils.deadlines import Deadline, DeadlineExceeded
+from src.utils.validators import (
+    STRUCTURE_COMPLETE_REQUEST,
+    STRUCTURE_CONTINUE_REQUEST,
+    STRUCTURE_START_REQUEST,
+    validated_json,
+)
 from src.utils.helpers import (
     create_error_response,
+    create_job_accepted_response,
     create_success_response,
+    is_async_request,
     log_request_info,
     validate_openai_key,
 )
@@ -14,29 +25,31 @@ structuring_bp = Blueprint('structuring', __name__)
 logger = logging.getLogger(__name__)
 
 @structuring_bp.route('/problem/structure/start', methods=['POST'])
-def start_problem_structuring():
+@validated_json(STRUCTURE_START_REQUEST)
+@tenant_limited(priority='interactive')
+def start_problem_structuring(data):
     """
     Start guided problem statement structuring for nonprofits
     """
     try:
-        validate_openai_key()
+        deadline = Deadline.from_request()
         
-        data = request.get_json()
-        if not data or 'initial_challenge' not in data:
-            return create_error_response("Missing required field: initial_challenge")
+        validate_openai_key()
         
         log_request_info('/problem/structure/start', data)
         
-        initial_challenge = RequestValidator.sanitize_input(data['initial_challenge'])
+        initial_challenge = data['initial_challenge']
         
         # Start structured problem development
-        result = ProblemStructuringService.start_structuring(initial_challenge)
+        result = ProblemStructuringService.start_structuring(initial_challenge, mode=data.get('mode'), deadline=deadline)
         
-        logger.info(f"Problem structuring started: {result['structuring_id']}")
+        logger.info("Problem structuring started: %s", result['structuring_id'])
         return create_success_response(result)
         
+    except DeadlineExceeded as e:
+        return create_error_response(str(e), status_code=504, error_type="deadline_exceeded")
     except Exception as e:
-        logger.error(f"Problem structuring start error: {e}")
+        logger.error("Problem structuring start error: %s", e)
         return create_error_response(
             f"Failed to start problem structuring: {str(e)}",
             status_code=500,
@@ -44,30 +57,32 @@ def start_problem_structuring():
         )
 
 @structuring_bp.route('/problem/structure/continue', methods=['POST'])
-def continue_problem_structuring():
+@validated_json(STRUCTURE_CONTINUE_REQUEST)
+@tenant_limited(priority='interactive')
+def continue_problem_structuring(data):
     """
     Continue the structured problem statement development
     """
     try:
-        validate_openai_key()
+        deadline = Deadline.from_request()
         
-        data = request.get_json()
-        if not data or 'structuring_id' not in data or 'response' not in data:
-            return create_error_response("Missing required fields: structuring_id, response")
+        validate_openai_key()
         
         log_request_info('/problem/structure/continue', data)
         
-        structuring_id = RequestValidator.sanitize_input(data['structuring_id'])
-        response = RequestValidator.sanitize_input(data['response'])
+        structuring_id = data['structuring_id']
+        response = data['response']
         
         # Continue structuring
-        result = ProblemStructuringService.continue_structuring(structuring_id, response)
+        result = ProblemStructuringService.continue_structuring(structuring_id, response, deadline=deadline)
         
-        logger.info(f"Problem structuring continued: {structuring_id}")
+        logger.info("Problem structuring continued: %s", structuring_id)
         return create_success_response(result)
         
+    except DeadlineExceeded as e:
+        return create_error_response(str(e), status_code=504, error_type="deadline_exceeded")
     except Exception as e:
-        logger.error(f"Problem structuring continue error: {e}")
+        logger.error("Problem structuring continue error: %s", e)
         return create_error_response(
             f"Failed to continue structuring: {str(e)}",
             status_code=500,
@@ -75,31 +90,58 @@ def continue_problem_structuring():
         )
 
 @structuring_bp.route('/problem/structure/complete', methods=['POST'])
-def complete_problem_structuring():
+@validated_json(STRUCTURE_COMPLETE_REQUEST)
+@tenant_limited()
+def complete_problem_structuring(data):
     """
     Complete problem structuring and generate well-formed problem statement
     """
     try:
-        validate_openai_key()
+        deadline = Deadline.from_request()
         
-        data = request.get_json()
-        if not data or 'structuring_id' not in data:
-            return create_error_response("Missing required field: structuring_id")
+        validate_openai_key()
         
         log_request_info('/problem/structure/complete', data)
         
-        structuring_id = RequestValidator.sanitize_input(data['structuring_id'])
+        structuring_id = data['structuring_id']
+        
+        if is_async_request(data):
+            session = ProblemStructuringService.structuring_sessions.get(structuring_id)
+            if session is None:
+                return create_error_response("No structuring session found for this ID", status_code=404, error_type="not_found")
+            callback_url = data.get('callback_url')
+            if callback_url is not None:
+                callback_error = validate_callback_url(callback_url)
+                if callback_error:
+                    return create_error_response(callback_error)
+            job = job_queue.enqueue('structure_complete', {'structuring_id': structuring_id, 'session': session},
+                                    callback_url=callback_url)
+            logger.info("Problem structuring completion queued: %s as %s", structuring_id, job.job_id)
+            return create_job_accepted_response(job)
         
         # Generate final structured problem statement
-        result = ProblemStructuringService.complete_structuring(structuring_id)
+        result = ProblemStructuringService.complete_structuring(structuring_id, deadline=deadline)
         
-        logger.info(f"Problem structuring completed: {structuring_id}")
+        logger.info("Problem structuring completed: %s", structuring_id)
         return create_success_response(result)
         
+    except DeadlineExceeded as e:
+        return create_error_response(str(e), status_code=504, error_type="deadline_exceeded")
     except Exception as e:
-        logger.error(f"Problem structuring completion error: {e}")
+        logger.error("Problem structuring completion error: %s", e)
         return create_error_response(
             f"Failed to complete structuring: {str(e)}",
             status_code=500,
             error_type="structuring_completion_error"
-        )
\ No newline at end of file
+        )
+
+def _run_structure_complete_job(payload):
+    """
+    Background job: generate the final structured problem statement
+    """
+    structuring_id = payload['structuring_id']
+    # The session snapshot lets the job run in another process or after a restart
+    ProblemStructuringService.structuring_sessions.setdefault(structuring_id, payload['session'])
+    return ProblemStructuringService.complete_structuring(structuring_id)
+
+job_queue.register('structure_complete', _run_structure_complete_job)
@@ -1,66 +1,143 @@
 from flask import Blueprint, request, jsonify
 import logging
 
+from src.models import ProblemAnalysis, TechRecommendation
 from src.services.analysis_service import AnalysisService
-from src.utils.validators import RequestValidator
+from src.services.circuit_breaker import CircuitOpenError
+from src.services.job_queue import job_queue
+from src.services.llm_limiter import tenant_limited
+from src.services.webhooks import validate_callback_url
+from src.utils.deadlines import Deadline, DeadlineExceeded
+from src.utils.validators import RECOMMEND_REQUEST, validated_json
 from src.utils.helpers import (
     create_error_response,
+    create_job_accepted_response,
     create_success_response,
+    is_async_request,
     log_request_info,
     validate_openai_key,
 )
+from src.utils.http_cache import (
+    REVALIDATE_CACHE_CONTROL,
+    PrecomputedResponse,
+    conditional_json_response,
+)
 
 
 recommend_bp = Blueprint('recommend', __name__)
 logger = logging.getLogger(__name__)
 
+RECOMMENDATION_MODES_RESPONSE = PrecomputedResponse({
+    "success": True,
+    "modes": {
+        "basic": {
+            "name": "AI Quick Win (Basic)",
+            "description": "Lean, low-cost AI solution tailored for nonprofits with fast time-to-value.",
+            "features": [
+                "Uses 3–5 AI tools max (SaaS and/or 1 OSS)",
+                "Focus on immediate impact and low maintenance",
+                "Tight budget bands and clear KPIs",
+                "Step-by-step actions deliverable this week"
+            ]
+        },
+        "enhanced": {
+            "name": "AI Strategy (Enhanced)",
+            "description": "Comprehensive AI architecture and rollout plan for sustainable nonprofit impact.",
+            "features": [
+                "Phased roadmap with 5–8 components",
+                "Governance, change management, and enablement notes",
+                "Observability and model quality checks",
+                "Scale plan with privacy & compliance in mind"
+            ]
+        }
+    }
+})
+
+def _simple_recommendation(result):
+    """
+    Return only specified fields for simple analysis
+    """
+    simple_result = {
+        'solution_summary': result['solution_summary'],
+        'recommended_tech_stack': result['recommended_tech_stack'],
+        'initial_steps': result['initial_steps']
+    }
+    if result.get('degraded'):
+        simple_result['degraded'] = True
+    if result.get('playbook_id'):
+        simple_result['playbook_id'] = result['playbook_id']
+    return simple_result
+
+def _run_recommend_job(payload):
+    """
+    Background job: generate recommendations for an analyzed problem
+    """
+    result = AnalysisService.generate_recommendation(
+        problem_id=payload['problem_id'],
+        description=payload['description'],
+        clarifying_questions=payload['clarifying_questions'],
+        analysis_mode='basic'
+    )
+    return _simple_recommendation(result)
+
+job_queue.register('recommend', _run_recommend_job)
+
 @recommend_bp.route('/recommend', methods=['POST'])
-def generate_recommendations():
+@validated_json(RECOMMEND_REQUEST)
+@tenant_limited()
+def generate_recommendations(data):
     """
     Generate technical recommendations based on problem analysis
     Supports both basic and enhanced recommendation modes
     """
     try:
+        deadline = Deadline.from_request()
+        
         # Validate OpenAI API key
         validate_openai_key()
         
-        # Validate request
-        is_valid, error_message = RequestValidator.validate_recommend_request()
-        if not is_valid:
-            return create_error_response(error_message)
-        
-        # Get request data
-        data = request.get_json()
         log_request_info('/recommend', data)
         
-        # Sanitize input
-        problem_id = RequestValidator.sanitize_input(data['problem_id'])
-        description = RequestValidator.sanitize_input(data['description'])
-        clarifying_questions = [
-            RequestValidator.sanitize_input(q) for q in data['clarifying_questions']
-        ]
+        problem_id = data['problem_id']
+        description = data['description']
+        clarifying_questions = data['clarifying_questions']
+        
+        if is_async_request(data):
+            if not ProblemAnalysis.query.filter_by(problem_id=problem_id).first():
+                return create_error_response(f"Problem ID {problem_id} not found", status_code=404, error_type="not_found")
+            callback_url = data.get('callback_url')
+            if callback_url is not None:
+                callback_error = validate_callback_url(callback_url)
+                if callback_error:
+                    return create_error_response(callback_error)
+            job = job_queue.enqueue('recommend', {
+                'problem_id': problem_id,
+                'description': description,
+                'clarifying_questions': clarifying_questions
+            }, callback_url=callback_url)
+            logger.info("Recommendations queued: %s as %s", problem_id, job.job_id)
+            return create_job_accepted_response(job)
         
         # Generate recommendations (always basic mode for /recommend endpoint)
         result = AnalysisService.generate_recommendation(
             problem_id=problem_id,
             description=description,
             clarifying_questions=clarifying_questions,
-            analysis_mode='basic'
+            analysis_mode='basic',
+            deadline=deadline
         )
+        simple_result = _simple_recommendation(result)
         
-        # Return only specified fields for simple analysis
-        simple_result = {
-            'solution_summary': result['solution_summary'],
-            'recommended_tech_stack': result['recommended_tech_stack'],
-            'initial_steps': result['initial_steps']
-        }
-        
-        logger.info(f"Recommendations generated successfully: {problem_id}")
+        logger.info("Recommendations generated successfully: %s", problem_id)
         
         return create_success_response(simple_result)
         
+    except DeadlineExceeded as e:
+        return create_error_response(str(e), status_code=504, error_type="deadline_exceeded")
+    except CircuitOpenError as e:
+        return create_error_response(str(e), status_code=503, error_type="service_unavailable")
     except Exception as e:
-        logger.error(f"Recommend endpoint error: {e}")
+        logger.error("Recommend endpoint error: %s", e)
         if "not found" in str(e).lower():
             return create_error_response(
                 str(e),
@@ -82,27 +159,23 @@ def generate_recommendations():
 
 @recommend_bp.route('/recommend/modes', methods=['GET'])
 def get_recommendation_modes():
-    return create_success_response({
-        "modes": {
-            "basic": {
-                "name": "AI Quick Win (Basic)",
-                "description": "Lean, low-cost AI solution tailored for nonprofits with fast time-to-value.",
-                "features": [
-                    "Uses 3–5 AI tools max (SaaS and/or 1 OSS)",
-                    "Focus on immediate impact and low maintenance",
-                    "Tight budget bands and clear KPIs",
-                    "Step-by-step actions deliverable this week"
-                ]
-            },
-            "enhanced": {
-                "name": "AI Strategy (Enhanced)",
-                "description": "Comprehensive AI architecture and rollout plan for sustainable nonprofit impact.",
-                "features": [
-                    "Phased roadmap with 5–8 components",
-                    "Governance, change management, and enablement notes",
-                    "Observability and model quality checks",
-                    "Scale plan with privacy & compliance in mind"
-                ]
-            }
-        }
-    })
+    return RECOMMENDATION_MODES_RESPONSE.serve()
+
+@recommend_bp.route('/recommend/<problem_id>', methods=['GET'])
+def get_stored_recommendations(problem_id):
+    """
+    Fetch stored recommendations for a problem. Each row is immutable but new
+    rows can be added, so clients revalidate with If-None-Match.
+    """
+    recommendations = (
+        TechRecommendation.query.filter_by(problem_id=problem_id)
+        .order_by(TechRecommendation.created_at)
+        .all()
+    )
+    if not recommendations:
+        return create_error_response(f"No recommendations found for problem ID {problem_id}", status_code=404, error_type="not_found")
+    return conditional_json_response({
+        "success": True,
+        "problem_id": problem_id,
+        "recommendations": [recommendation.to_dict() for recommendation in recommendations]
+    }, REVALIDATE_CACHE_CONTROL)
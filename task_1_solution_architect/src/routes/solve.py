@@ -0,0 +1,124 @@
+import contextvars
+import logging
+
+from flask import Blueprint, Response, stream_with_context
+
+from src.services.analysis_service import AnalysisService
+from src.services.circuit_breaker import CircuitOpenError
+from src.services.llm_limiter import tenant_limited
+from src.utils.deadlines import Deadline, DeadlineExceeded
+from src.utils.helpers import (
+    create_error_response,
+    create_success_response,
+    log_request_info,
+    validate_openai_key,
+)
+from src.utils.json_backend import dumps
+from src.utils.validators import SOLVE_REQUEST, validated_json
+
+solve_bp = Blueprint('solve', __name__)
+logger = logging.getLogger(__name__)
+
+# Fields returned per stage, as (always present, only when set)
+STAGE_FIELDS = {
+    'analysis': (('problem_id', 'description', 'clarifying_questions'),
+                 ('degraded', 'playbook_id', 'reused', 'similar_problems')),
+    'recommendation': (('solution_summary', 'recommended_tech_stack', 'initial_steps'),
+                       ('degraded', 'playbook_id')),
+}
+
+
+def _stage_fields(stage, result):
+    fields, flags = STAGE_FIELDS[stage]
+    return {
+        **{name: result[name] for name in fields},
+        **{name: result[name] for name in flags if result.get(name)},
+    }
+
+
+def _error(e):
+    """
+    Error type and message reported for a failed recommendation stage
+    """
+    if isinstance(e, DeadlineExceeded):
+        error_type = "deadline_exceeded"
+    elif isinstance(e, CircuitOpenError):
+        error_type = "service_unavailable"
+    else:
+        error_type = "recommendation_error"
+    return {'error': error_type, 'message': str(e)}
+
+
+def _stage_line(stage, result):
+    if stage == 'recommendation_error':
+        return dumps({'stage': 'error', **_error(result)}) + '\n'
+    return dumps({'stage': stage, **_stage_fields(stage, result)}) + '\n'
+
+
+@solve_bp.route('/solve', methods=['POST'])
+@validated_json(SOLVE_REQUEST)
+@tenant_limited()
+def solve_problem(data):
+    """
+    Analyze a problem statement and generate recommendations in one request,
+    optionally streaming each stage as an NDJSON line as soon as it is ready
+    """
+    try:
+        deadline = Deadline.from_request()
+
+        validate_openai_key()
+
+        log_request_info('/solve', data)
+
+        stages = AnalysisService.solve(
+            data['problem_statement'], deadline=deadline, stop_on_questions=data['stop_on_questions']
+        )
+        # The analysis stage runs before responding, so its errors get a proper status code
+        analysis = next(stages)[1]
+
+        if data['stream']:
+            # Later stages run after the view returns, outside the tenant and priority context
+            context = contextvars.copy_context()
+
+            def stream():
+                yield _stage_line('analysis', analysis)
+                while True:
+                    try:
+                        stage = context.run(next, stages, None)
+                    except Exception as e:
+                        logger.error("Solve stream error: %s", e)
+                        yield dumps({'stage': 'error', 'error': 'solve_error', 'message': str(e)}) + '\n'
+                        return
+                    if stage is None:
+                        return
+                    yield _stage_line(*stage)
+
+            response = Response(stream_with_context(stream()), mimetype='application/x-ndjson')
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+
+        result = {
+            'problem_id': analysis['problem_id'],
+            'analysis': _stage_fields('analysis', analysis),
+            'recommendation': None
+        }
+        for stage, stage_result in stages:
+            if stage == 'recommendation':
+                result['recommendation'] = _stage_fields('recommendation', stage_result)
+            else:
+                result['recommendation_error'] = _error(stage_result)
+
+        logger.info("Solve pipeline completed: %s", result['problem_id'])
+        return create_success_response(result)
+
+    except DeadlineExceeded as e:
+        return create_error_response(str(e), status_code=504, error_type="deadline_exceeded")
+    except CircuitOpenError as e:
+        return create_error_response(str(e), status_code=503, error_type="service_unavailable")
+    except Exception as e:
+        logger.error("Solve endpoint error: %s", e)
+        return create_error_response(
+            f"Solve pipeline failed: {str(e)}",
+            status_code=500,
+            error_type="solve_error"
+        )
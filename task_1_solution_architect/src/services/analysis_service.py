@@ -1,63 +1,207 @@
-import uuid
 import logging
 
-from src.models import db, ProblemAnalysis, TechRecommendation
+from src.models import db, ProblemAnalysis, StatementFingerprint, TechRecommendation
 import logging
+from src.services.circuit_breaker import CircuitOpenError
+from src.services.fingerprints import record_fingerprint, statement_hash
 from src.services.openai_service import OpenAIService
+from src.services.similarity import SIMILARITY_REUSE_THRESHOLD, similarity_index
+from src.services.playbooks import (
+    PLAYBOOK_FALLBACK_THRESHOLD,
+    PLAYBOOK_FAST_PATH_THRESHOLD,
+    playbook_engine,
+)
+from src.utils.deadlines import DeadlineExceeded
 from src.utils.helpers import clean_unicode, clean_unicode_list
+from src.utils.ids import new_id
+from src.utils.metrics import metrics
 
 
 logger = logging.getLogger(__name__)
 
 class AnalysisService:
     @staticmethod
-    def analyze_problem(problem_statement, analysis_mode='basic'):
+    def analyze_problem(problem_statement, analysis_mode='basic', deadline=None, problem_id=None):
         """
-        Analyze a nonprofit problem statement using specified mode
+        Analyze a nonprofit problem statement using specified mode.
+        `problem_id` is generated unless one was reserved beforehand (bulk imports).
+        If the deadline leaves no room for an LLM call, a stored analysis of the
+        same statement is returned instead (marked degraded).
+
+        Basic statements that closely match a sector playbook are answered from
+        the playbook without an LLM call; while the LLM circuit is open, weaker
+        playbook matches are used as a fallback (marked degraded).
+
+        Near-duplicates of stored statements are listed in similar_problems;
+        above SIMILARITY_REUSE_THRESHOLD the earlier analysis is returned.
         """
         try:
+            similar = similarity_index.query(problem_statement)
+            if problem_id is None and similar and SIMILARITY_REUSE_THRESHOLD > 0:
+                reused = AnalysisService._reuse_analysis(similar[0], analysis_mode.lower())
+                if reused is not None:
+                    reused['similar_problems'] = similar
+                    return reused
+            
             # Generate unique problem ID
-            problem_id = f"P{str(uuid.uuid4().hex[:8]).upper()}"
+            problem_id = problem_id or new_id("P")
             
-            # Choose analysis method based on mode
-            if analysis_mode.lower() == 'enhanced':
-                analysis_result = OpenAIService.analyze_problem_enhanced(problem_statement)
-            else:
-                analysis_result = OpenAIService.analyze_problem_basic(problem_statement)
+            analysis_result = AnalysisService._analysis_result(problem_statement, analysis_mode, deadline)
             
             # Clean and sanitize response text to handle Unicode characters
             description = clean_unicode(analysis_result.get('description', ''))
             questions = clean_unicode_list(analysis_result.get('clarifying_questions', []))
             
             # Store analysis in database
-            analysis_record = ProblemAnalysis()
-            analysis_record.problem_id = problem_id
-            analysis_record.problem_statement = problem_statement
-            analysis_record.description = description
-            analysis_record.clarifying_questions = questions
-            analysis_record.analysis_mode = analysis_mode.lower()
-            
-            db.session.add(analysis_record)
+            db.session.add(AnalysisService._analysis_record(
+                problem_id, problem_statement, description, questions, analysis_mode
+            ))
             db.session.commit()
+            AnalysisService._index_analysis(problem_id, problem_statement)
             
-            logger.info(f"Problem analysis completed: {problem_id} (mode: {analysis_mode})")
+            logger.info("Problem analysis completed: %s (mode: %s)", problem_id, analysis_mode)
             
-            return {
+            result = {
                 'problem_id': problem_id,
                 'description': analysis_result.get('description', ''),
                 'clarifying_questions': analysis_result.get('clarifying_questions', []),
                 'analysis_mode': analysis_mode.lower()
             }
+            if analysis_result.get('degraded'):
+                result['degraded'] = True
+            if analysis_result.get('playbook_id'):
+                result['playbook_id'] = analysis_result['playbook_id']
+            if similar:
+                result['similar_problems'] = similar
+            return result
             
+        except CircuitOpenError:
+            db.session.rollback()
+            raise
+        except DeadlineExceeded:
+            db.session.rollback()
+            prior = AnalysisService._stored_analysis(problem_statement)
+            if prior is None:
+                raise
+            return prior
         except Exception as e:
-            logger.error(f"Analysis service error: {e}")
+            logger.error("Analysis service error: %s", e)
             db.session.rollback()
             raise Exception(f"Problem analysis failed: {str(e)}")
 
     @staticmethod
-    def generate_recommendation(problem_id, description, clarifying_questions, analysis_mode='basic'):
+    def _stored_analysis(problem_statement):
+        """
+        The stored analysis of the same statement, marked degraded, for
+        requests that ran out of time. Found through the indexed statement
+        fingerprint rather than by comparing statement text.
+        """
+        prior = (
+            ProblemAnalysis.query
+            .join(StatementFingerprint, StatementFingerprint.problem_id == ProblemAnalysis.problem_id)
+            .filter(StatementFingerprint.statement_hash == statement_hash(problem_statement))
+            .first()
+        )
+        if prior is None:
+            return None
+        logger.warning("Deadline exceeded, returning stored analysis %s", prior.problem_id)
+        return {
+            'problem_id': prior.problem_id,
+            'description': prior.description,
+            'clarifying_questions': prior.clarifying_questions or [],
+            'analysis_mode': prior.analysis_mode,
+            'degraded': True
+        }
+
+    @staticmethod
+    def _stored_recommendation(problem_id):
+        """
+        The latest stored recommendation for a problem, marked degraded,
+        for requests that ran out of time
+        """
+        prior = (
+            TechRecommendation.query.filter_by(problem_id=problem_id)
+            .order_by(TechRecommendation.created_at.desc())
+            .first()
+        )
+        if prior is None:
+            return None
+        logger.warning("Deadline exceeded, returning stored recommendation for %s", problem_id)
+        return {**prior.to_dict(), 'degraded': True}
+
+    @staticmethod
+    def _analysis_result(problem_statement, analysis_mode, deadline=None):
+        """
+        Analysis from a close playbook match (basic mode) or the model, with
+        a weaker playbook match as fallback while the LLM circuit is open
+        """
+        analysis_result = None
+        if analysis_mode.lower() != 'enhanced' and PLAYBOOK_FAST_PATH_THRESHOLD > 0:
+            analysis_result = playbook_engine.analysis(problem_statement, PLAYBOOK_FAST_PATH_THRESHOLD)
+        
+        # Choose analysis method based on mode
+        try:
+            if analysis_result is not None:
+                logger.info("Answering from playbook %s", analysis_result['playbook_id'])
+            elif analysis_mode.lower() == 'enhanced':
+                analysis_result = OpenAIService.analyze_problem_enhanced(problem_statement, deadline=deadline)
+            else:
+                analysis_result = OpenAIService.analyze_problem_basic(problem_statement, deadline=deadline)
+        except CircuitOpenError:
+            analysis_result = playbook_engine.analysis(problem_statement, PLAYBOOK_FALLBACK_THRESHOLD)
+            if analysis_result is None:
+                raise
+            logger.warning("AI circuit open, using playbook %s", analysis_result['playbook_id'])
+            analysis_result['degraded'] = True
+        return analysis_result
+
+    @staticmethod
+    def _analysis_record(problem_id, problem_statement, description, questions, analysis_mode):
+        analysis_record = ProblemAnalysis()
+        analysis_record.problem_id = problem_id
+        analysis_record.problem_statement = problem_statement
+        analysis_record.description = description
+        analysis_record.clarifying_questions = questions
+        analysis_record.analysis_mode = analysis_mode.lower()
+        return analysis_record
+
+    @staticmethod
+    def _index_analysis(problem_id, problem_statement):
+        """
+        Make a committed analysis findable by statement hash and similarity
+        """
+        record_fingerprint(problem_id, problem_statement)
+        similarity_index.add(problem_id, problem_statement)
+
+    @staticmethod
+    def _reuse_analysis(match, analysis_mode):
+        """
+        The stored analysis of a near-duplicate statement, if it is similar
+        enough and was made in the same mode
+        """
+        if match['similarity'] < SIMILARITY_REUSE_THRESHOLD:
+            return None
+        prior = ProblemAnalysis.query.filter_by(problem_id=match['problem_id']).first()
+        if prior is None or prior.analysis_mode != analysis_mode:
+            return None
+        metrics.increment('similarity.reused')
+        logger.info("Reusing analysis %s (similarity %.2f)", prior.problem_id, match['similarity'])
+        return {
+            'problem_id': prior.problem_id,
+            'description': prior.description,
+            'clarifying_questions': prior.clarifying_questions or [],
+            'analysis_mode': prior.analysis_mode,
+            'reused': True
+        }
+
+    @staticmethod
+    def generate_recommendation(problem_id, description, clarifying_questions, analysis_mode='basic', deadline=None):
         """
-        Generate technology recommendations for a given problem
+        Generate technology recommendations for a given problem.
+        If the deadline leaves no room for an LLM call, the latest stored
+        recommendation for the problem is returned instead (marked degraded).
+        Playbooks are used as a fast path and circuit-open fallback, as in
+        analyze_problem.
         """
         try:
             # Verify problem exists in database
@@ -65,42 +209,169 @@ class AnalysisService:
             if not problem_record:
                 raise Exception(f"Problem ID {problem_id} not found")
             
-            # Choose recommendation method based on mode
-            if analysis_mode.lower() == 'enhanced':
-                recommendation_result = OpenAIService.generate_recommendations_enhanced(
-                    problem_id, description, clarifying_questions
-                )
-            else:
-                recommendation_result = OpenAIService.generate_recommendations_basic(
-                    problem_id, description, clarifying_questions
-                )
-            
-            # Clean Unicode characters in recommendation response using centralized utility
-            solution_summary = clean_unicode(recommendation_result.get('solution_summary', ''))
-            tech_stack = clean_unicode_list(recommendation_result.get('recommended_tech_stack', []))
-            initial_steps = clean_unicode_list(recommendation_result.get('initial_steps', []))
+            recommendation_record, result = AnalysisService._recommendation(
+                problem_id, problem_record.problem_statement, description, clarifying_questions,
+                analysis_mode, deadline
+            )
             
             # Store recommendation in database
-            recommendation_record = TechRecommendation()
-            recommendation_record.problem_id = problem_id
-            recommendation_record.solution_summary = solution_summary
-            recommendation_record.recommended_tech_stack = tech_stack
-            recommendation_record.initial_steps = initial_steps
-            recommendation_record.analysis_mode = analysis_mode.lower()
-            
             db.session.add(recommendation_record)
             db.session.commit()
             
-            logger.info(f"Recommendations generated: {problem_id} (mode: {analysis_mode})")
-            
-            return {
-                'solution_summary': solution_summary,
-                'recommended_tech_stack': tech_stack,
-                'initial_steps': initial_steps,
-                'analysis_mode': analysis_mode.lower()
-            }
+            logger.info("Recommendations generated: %s (mode: %s)", problem_id, analysis_mode)
+            return result
             
+        except CircuitOpenError:
+            db.session.rollback()
+            raise
+        except DeadlineExceeded:
+            db.session.rollback()
+            prior = AnalysisService._stored_recommendation(problem_id)
+            if prior is None:
+                raise
+            return prior
         except Exception as e:
-            logger.error(f"Recommendation service error: {e}")
+            logger.error("Recommendation service error: %s", e)
             db.session.rollback()
             raise Exception(f"Recommendation generation failed: {str(e)}")
+
+    @staticmethod
+    def solve(problem_statement, deadline=None, stop_on_questions=True):
+        """
+        Basic analysis and recommendation as one server-side pipeline. The
+        analysis is committed and yielded as ('analysis', result) as soon as
+        it is ready. Unless it asks clarifying questions (and
+        stop_on_questions is set), ('recommendation', result) follows: the
+        recommendation starts straight from the analysis in memory and is
+        committed on its own. If it fails, ('recommendation_error',
+        exception) is yielded instead. Out of time, stored results of the
+        same statement are returned (marked degraded), as analyze_problem
+        and generate_recommendation do.
+        """
+        similar = similarity_index.query(problem_statement)
+        reused = None
+        if similar and SIMILARITY_REUSE_THRESHOLD > 0:
+            reused = AnalysisService._reuse_analysis(similar[0], 'basic')
+        
+        if reused is not None:
+            analysis = reused
+        else:
+            problem_id = new_id("P")
+            try:
+                analysis_result = AnalysisService._analysis_result(problem_statement, 'basic', deadline)
+            except DeadlineExceeded:
+                analysis_result = None
+                analysis = AnalysisService._stored_analysis(problem_statement)
+                if analysis is None:
+                    raise
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                logger.error("Analysis service error: %s", e)
+                raise Exception(f"Problem analysis failed: {str(e)}")
+            if analysis_result is not None:
+                description = clean_unicode(analysis_result.get('description', ''))
+                questions = clean_unicode_list(analysis_result.get('clarifying_questions', []))
+                try:
+                    db.session.add(AnalysisService._analysis_record(
+                        problem_id, problem_statement, description, questions, 'basic'
+                    ))
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+                AnalysisService._index_analysis(problem_id, problem_statement)
+                analysis = {
+                    'problem_id': problem_id,
+                    'description': analysis_result.get('description', ''),
+                    'clarifying_questions': analysis_result.get('clarifying_questions', []),
+                    'analysis_mode': 'basic'
+                }
+                if analysis_result.get('degraded'):
+                    analysis['degraded'] = True
+                if analysis_result.get('playbook_id'):
+                    analysis['playbook_id'] = analysis_result['playbook_id']
+        if similar:
+            analysis['similar_problems'] = similar
+        problem_id = analysis['problem_id']
+        yield 'analysis', analysis
+        
+        questions = analysis['clarifying_questions']
+        if stop_on_questions and questions:
+            metrics.increment('solve.stopped_for_questions')
+            return
+        try:
+            recommendation_record, recommendation = AnalysisService._recommendation(
+                problem_id, problem_statement, analysis['description'], questions, 'basic', deadline
+            )
+            db.session.add(recommendation_record)
+            db.session.commit()
+        except DeadlineExceeded as e:
+            db.session.rollback()
+            recommendation = AnalysisService._stored_recommendation(problem_id)
+            if recommendation is None:
+                metrics.increment('solve.recommendation_failures')
+                yield 'recommendation_error', e
+                return
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Recommendation stage of %s failed: %s", problem_id, e)
+            metrics.increment('solve.recommendation_failures')
+            yield 'recommendation_error', e
+            return
+        logger.info("Problem solved in one pipeline: %s", problem_id)
+        yield 'recommendation', recommendation
+
+    @staticmethod
+    def _recommendation(problem_id, problem_statement, description, clarifying_questions, analysis_mode, deadline=None):
+        """
+        Generate recommendations (playbooks as fast path and circuit-open
+        fallback) and return the unsaved record with the response fields
+        """
+        playbook_text = f"{problem_statement} {' '.join(clarifying_questions)}"
+        recommendation_result = None
+        if analysis_mode.lower() != 'enhanced' and PLAYBOOK_FAST_PATH_THRESHOLD > 0:
+            recommendation_result = playbook_engine.recommendation(playbook_text, PLAYBOOK_FAST_PATH_THRESHOLD)
+        
+        # Choose recommendation method based on mode
+        try:
+            if recommendation_result is not None:
+                logger.info("Answering from playbook %s", recommendation_result['playbook_id'])
+            elif analysis_mode.lower() == 'enhanced':
+                recommendation_result = OpenAIService.generate_recommendations_enhanced(
+                    problem_id, description, clarifying_questions, deadline=deadline
+                )
+            else:
+                recommendation_result = OpenAIService.generate_recommendations_basic(
+                    problem_id, description, clarifying_questions, deadline=deadline
+                )
+        except CircuitOpenError:
+            recommendation_result = playbook_engine.recommendation(playbook_text, PLAYBOOK_FALLBACK_THRESHOLD)
+            if recommendation_result is None:
+                raise
+            logger.warning("AI circuit open, using playbook %s", recommendation_result['playbook_id'])
+            recommendation_result['degraded'] = True
+        
+        # Clean Unicode characters in recommendation response using centralized utility
+        solution_summary = clean_unicode(recommendation_result.get('solution_summary', ''))
+        tech_stack = clean_unicode_list(recommendation_result.get('recommended_tech_stack', []))
+        initial_steps = clean_unicode_list(recommendation_result.get('initial_steps', []))
+        
+        recommendation_record = TechRecommendation()
+        recommendation_record.problem_id = problem_id
+        recommendation_record.solution_summary = solution_summary
+        recommendation_record.recommended_tech_stack = tech_stack
+        recommendation_record.initial_steps = initial_steps
+        recommendation_record.analysis_mode = analysis_mode.lower()
+        
+        result = {
+            'solution_summary': solution_summary,
+            'recommended_tech_stack': tech_stack,
+            'initial_steps': initial_steps,
+            'analysis_mode': analysis_mode.lower()
+        }
+        if recommendation_result.get('degraded'):
+            result['degraded'] = True
+        if recommendation_result.get('playbook_id'):
+            result['playbook_id'] = recommendation_result['playbook_id']
+        return recommendation_record, result
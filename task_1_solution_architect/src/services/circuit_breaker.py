@@ -0,0 +1,101 @@
+import logging
+import os
+import threading
+import time
+
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('LLM_CIRCUIT_FAILURE_THRESHOLD', '5'))
+LLM_CIRCUIT_RESET_S = float(os.environ.get('LLM_CIRCUIT_RESET_S', '30'))
+
+
+class CircuitOpenError(Exception):
+    """
+    The downstream service is failing and calls are being short-circuited
+    """
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are rejected immediately. Once `reset_timeout` seconds have passed a single
+    probe call is let through (half-open); its outcome closes or reopens the
+    circuit.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probe_started_at = None
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half_open'
+            return 'open'
+
+    @property
+    def is_open(self):
+        return self.state == 'open'
+
+    def allow(self):
+        """
+        Whether a call may go ahead now
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: one probe at a time; a probe that never reported back
+            # (e.g. its request was abandoned) is replaced after reset_timeout
+            if self._probe_started_at is not None and now - self._probe_started_at < self.reset_timeout:
+                return False
+            self._probe_started_at = now
+            return True
+
+    def release_probe(self):
+        """
+        Let the next call probe again after a probe ended without an outcome
+        (e.g. it ran out of time before reaching the service)
+        """
+        with self._lock:
+            self._probe_started_at = None
+
+    def record_success(self):
+        with self._lock:
+            was_open = self._opened_at is not None
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started_at = None
+        if was_open:
+            metrics.set_gauge(f'circuit.{self.name}.open', 0)
+            logger.warning("Circuit %s closed", self.name)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            probe_failed = self._probe_started_at is not None
+            opening = self._opened_at is None and self._failures >= self.failure_threshold
+            if opening or probe_failed:
+                self._opened_at = time.monotonic()
+                self._probe_started_at = None
+        if opening:
+            metrics.increment(f'circuit.{self.name}.opened')
+            metrics.set_gauge(f'circuit.{self.name}.open', 1)
+            logger.error("Circuit %s opened after %s consecutive failures", self.name, self.failure_threshold)
+
+
+llm_circuit = CircuitBreaker('llm', LLM_CIRCUIT_FAILURE_THRESHOLD, LLM_CIRCUIT_RESET_S)
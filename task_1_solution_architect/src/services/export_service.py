@@ -0,0 +1,149 @@
+import csv
+import io
+import logging
+import os
+import zlib
+
+from sqlalchemy import select
+
+from src.models import ProblemAnalysis, TechRecommendation, db
+from src.utils import json_backend
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the database cursor per batch; memory use is bounded by one batch
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '500'))
+
+CSV_COLUMNS = [
+    'problem_id', 'analysis_mode', 'analysis_created_at', 'problem_statement', 'description',
+    'clarifying_questions', 'recommendation_mode', 'recommendation_created_at', 'solution_summary',
+    'recommended_tech_stack', 'initial_steps',
+]
+
+
+def _export_query(since=None, until=None, mode=None):
+    """
+    Analyses left-joined with their recommendations, ordered so each
+    analysis' rows are adjacent
+    """
+    query = select(
+        ProblemAnalysis.problem_id,
+        ProblemAnalysis.analysis_mode,
+        ProblemAnalysis.created_at,
+        ProblemAnalysis.problem_statement,
+        ProblemAnalysis.description,
+        ProblemAnalysis.clarifying_questions,
+        TechRecommendation.id,
+        TechRecommendation.analysis_mode,
+        TechRecommendation.created_at,
+        TechRecommendation.solution_summary,
+        TechRecommendation.recommended_tech_stack,
+        TechRecommendation.initial_steps,
+    ).outerjoin(
+        TechRecommendation, TechRecommendation.problem_id == ProblemAnalysis.problem_id
+    ).order_by(ProblemAnalysis.id, TechRecommendation.id)
+    if since is not None:
+        query = query.where(ProblemAnalysis.created_at >= since)
+    if until is not None:
+        query = query.where(ProblemAnalysis.created_at < until)
+    if mode is not None:
+        query = query.where(ProblemAnalysis.analysis_mode == mode)
+    return query
+
+
+def _isoformat(moment):
+    return moment.isoformat() if moment else None
+
+
+def _stream_rows(since, until, mode):
+    """
+    Yield batches of result rows from a server-side cursor on a dedicated connection
+    """
+    with db.engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(
+            _export_query(since, until, mode)
+        )
+        for batch in result.partitions():
+            yield batch
+
+
+def _ndjson_batches(since, until, mode):
+    # One line per analysis with its recommendations nested; only the
+    # analysis being assembled is held across batches
+    current = None
+    for batch in _stream_rows(since, until, mode):
+        lines = []
+        for row in batch:
+            if current is None or current['problem_id'] != row[0]:
+                if current is not None:
+                    lines.append(json_backend.dumps_bytes(current))
+                current = {
+                    'problem_id': row[0],
+                    'analysis_mode': row[1],
+                    'created_at': _isoformat(row[2]),
+                    'problem_statement': row[3],
+                    'description': row[4],
+                    'clarifying_questions': row[5] or [],
+                    'recommendations': [],
+                }
+            if row[6] is not None:
+                current['recommendations'].append({
+                    'analysis_mode': row[7],
+                    'created_at': _isoformat(row[8]),
+                    'solution_summary': row[9],
+                    'recommended_tech_stack': row[10] or [],
+                    'initial_steps': row[11] or [],
+                })
+        if lines:
+            yield b'\n'.join(lines) + b'\n'
+    if current is not None:
+        yield json_backend.dumps_bytes(current) + b'\n'
+
+
+def _csv_batches(since, until, mode):
+    # One row per analysis/recommendation pair; list columns hold JSON arrays
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for batch in _stream_rows(since, until, mode):
+        for row in batch:
+            writer.writerow([
+                row[0], row[1], _isoformat(row[2]), row[3], row[4], json_backend.dumps(row[5] or []),
+                row[7], _isoformat(row[8]), row[9],
+                json_backend.dumps(row[10]) if row[6] is not None else '',
+                json_backend.dumps(row[11]) if row[6] is not None else '',
+            ])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _gzip(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(export_format='ndjson', since=None, until=None, mode=None, compress=False):
+    """
+    Generator of the export body in byte chunks, optionally gzip-compressed
+    """
+    batches = _csv_batches if export_format == 'csv' else _ndjson_batches
+    chunks = batches(since, until, mode)
+    if compress:
+        chunks = _gzip(chunks)
+    sent = 0
+    try:
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        metrics.increment(f'export.requests.{export_format}')
+        metrics.increment('export.bytes', sent)
+        logger.info("Export (%s) streamed %s bytes", export_format, sent)
@@ -0,0 +1,55 @@
+import hashlib
+import logging
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models import StatementFingerprint, db
+from src.utils.helpers import clean_unicode
+from src.utils.validators import RequestValidator
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_statement(text):
+    """
+    Canonical form of a problem statement: typographic characters replaced
+    and whitespace collapsed, as the API does for submitted text
+    """
+    return RequestValidator.sanitize_input(clean_unicode(text or ''))
+
+
+def statement_hash(text):
+    """
+    Content hash identifying a statement regardless of whitespace, typography or case
+    """
+    return hashlib.sha256(normalize_statement(text).casefold().encode('utf-8')).hexdigest()
+
+
+def find_problem_ids(hashes):
+    """
+    Map of statement hash -> problem_id for the hashes already known
+    """
+    if not hashes:
+        return {}
+    rows = db.session.query(StatementFingerprint.statement_hash, StatementFingerprint.problem_id).filter(
+        StatementFingerprint.statement_hash.in_(list(hashes))
+    )
+    return dict(rows)
+
+
+def record_fingerprint(problem_id, problem_statement, source='api'):
+    """
+    Remember which problem a statement was analyzed as. The first analysis
+    of a statement wins; later ones leave the fingerprint unchanged.
+    """
+    try:
+        db.session.add(StatementFingerprint(
+            statement_hash=statement_hash(problem_statement),
+            problem_id=problem_id,
+            source=source,
+        ))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
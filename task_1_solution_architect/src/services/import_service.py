@@ -0,0 +1,185 @@
+import csv
+import logging
+import os
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from src.models import ProblemAnalysis, StatementFingerprint, db
+from src.services.analysis_service import AnalysisService
+from src.services.fingerprints import find_problem_ids, normalize_statement, statement_hash
+from src.services.job_queue import job_queue
+from src.services.llm_limiter import current_tenant
+from src.utils.ids import new_id
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+IMPORT_MAX_ROWS = int(os.environ.get('IMPORT_MAX_ROWS', '5000'))
+# Rows deduplicated and queued per database transaction
+IMPORT_BATCH_SIZE = 200
+# LLM calls of imported statements are accounted to their own tenant
+IMPORT_TENANT = 'import'
+MIN_STATEMENT_LENGTH = 10
+MAX_STATEMENT_LENGTH = 5000
+
+
+class CSVImportError(Exception):
+    """
+    The CSV cannot be imported (e.g. the statement column is missing)
+    """
+
+
+def _statements(lines, column):
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or column not in reader.fieldnames:
+        raise CSVImportError(f"CSV has no '{column}' column")
+    for row in reader:
+        yield reader.line_num, row.get(column)
+
+
+def _invalid(line, text):
+    if len(text) < MIN_STATEMENT_LENGTH:
+        error = f"statement must be at least {MIN_STATEMENT_LENGTH} characters long"
+    elif len(text) > MAX_STATEMENT_LENGTH:
+        error = f"statement must be less than {MAX_STATEMENT_LENGTH} characters"
+    else:
+        return None
+    return {'row': line, 'status': 'invalid', 'error': error}
+
+
+def _import_batch(batch, analysis_mode):
+    """
+    Deduplicate one batch against known fingerprints and queue analyses for
+    the new statements. Fingerprints of queued statements are stored with
+    their reserved problem IDs in the same transaction as the jobs, so a
+    statement is never queued twice.
+    """
+    known = find_problem_ids({digest for _, _, digest in batch})
+    results = []
+    for line, text, digest in batch:
+        problem_id = known.get(digest)
+        if problem_id is not None:
+            results.append({'row': line, 'status': 'duplicate', 'problem_id': problem_id})
+            continue
+        problem_id = known[digest] = new_id('P')
+        db.session.add(StatementFingerprint(statement_hash=digest, problem_id=problem_id, source='import'))
+        job = job_queue.enqueue('bulk_analyze', {
+            'problem_id': problem_id,
+            'problem_statement': text,
+            'analysis_mode': analysis_mode,
+            'statement_hash': digest,
+        }, commit=False)
+        results.append({'row': line, 'status': 'queued', 'problem_id': problem_id, 'job_id': job.job_id})
+    db.session.commit()
+    return results
+
+
+def import_statements(lines, column='problem_statement', analysis_mode='basic'):
+    """
+    Read problem statements from CSV lines and queue analyses for the ones
+    not seen before. Returns a summary with one result per row: 'queued'
+    (with the new problem_id and job_id), 'duplicate' (with the existing
+    problem_id) or 'invalid'.
+    """
+    tenant_token = current_tenant.set(IMPORT_TENANT)
+    results = []
+    truncated = False
+    batch = []
+
+    def flush():
+        try:
+            results.extend(_import_batch(batch, analysis_mode))
+        except IntegrityError:
+            # A concurrent import stored some of the same fingerprints; the
+            # second pass sees them as duplicates
+            db.session.rollback()
+            results.extend(_import_batch(batch, analysis_mode))
+        batch.clear()
+
+    try:
+        for count, (line, raw) in enumerate(_statements(lines, column)):
+            if count >= IMPORT_MAX_ROWS:
+                truncated = True
+                break
+            text = normalize_statement(raw)
+            invalid = _invalid(line, text)
+            if invalid:
+                results.append(invalid)
+                continue
+            batch.append((line, text, statement_hash(text)))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+    finally:
+        current_tenant.reset(tenant_token)
+
+    results.sort(key=lambda result: result['row'])
+    summary = {status: sum(1 for r in results if r['status'] == status) for status in ('queued', 'duplicate', 'invalid')}
+    for status, count in summary.items():
+        metrics.increment(f'imports.{status}', count)
+    logger.info("Imported %s rows: %s queued, %s duplicates, %s invalid",
+                len(results), summary['queued'], summary['duplicate'], summary['invalid'])
+    return {'rows': len(results), **summary, 'truncated': truncated, 'results': results}
+
+
+def _run_bulk_analysis(payload):
+    """
+    Background job: analyze one imported statement under its reserved problem ID
+    """
+    existing = ProblemAnalysis.query.filter_by(problem_id=payload['problem_id']).first()
+    if existing is not None:
+        # Retried after the analysis was stored
+        return {'problem_id': existing.problem_id, 'description': existing.description}
+    result = AnalysisService.analyze_problem(
+        payload['problem_statement'], payload.get('analysis_mode', 'basic'), problem_id=payload['problem_id']
+    )
+    return {'problem_id': result['problem_id'], 'description': result['description']}
+
+
+def _release_fingerprint(job):
+    """
+    A statement whose analysis failed for good can be imported again
+    """
+    payload = job.payload or {}
+    StatementFingerprint.query.filter_by(
+        statement_hash=payload.get('statement_hash'), problem_id=payload.get('problem_id')
+    ).delete(synchronize_session=False)
+
+
+def backfill_fingerprints(batch_size=500):
+    """
+    Record fingerprints for analyses stored before fingerprinting existed;
+    returns the number added
+    """
+    added = 0
+    last_id = 0
+    while True:
+        # Keyset pagination keeps no cursor open while each batch is committed
+        rows = db.session.execute(
+            select(ProblemAnalysis.id, ProblemAnalysis.problem_id, ProblemAnalysis.problem_statement)
+            .where(ProblemAnalysis.id > last_id)
+            .order_by(ProblemAnalysis.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return added
+        pending = {}
+        for _, problem_id, problem_statement in rows:
+            # The earliest analysis of a statement wins
+            pending.setdefault(statement_hash(problem_statement), problem_id)
+        added += _store_missing(pending)
+        last_id = rows[-1][0]
+
+
+def _store_missing(pending):
+    known = find_problem_ids(pending.keys())
+    missing = [StatementFingerprint(statement_hash=digest, problem_id=problem_id, source='backfill')
+               for digest, problem_id in pending.items() if digest not in known]
+    db.session.add_all(missing)
+    db.session.commit()
+    return len(missing)
+
+
+job_queue.register('bulk_analyze', _run_bulk_analysis, on_failure=_release_fingerprint)
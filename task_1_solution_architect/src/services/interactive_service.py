@@ -1,12 +1,21 @@
-import uuid
-import json
 import logging
+import os
 import re
 from functools import lru_cache
+from src.services.circuit_breaker import CircuitOpenError
 from src.services.openai_service import OpenAIService
+from src.services.similarity import similarity_index
+from src.utils.deadlines import DeadlineExceeded
+from src.utils.ids import new_id
+from src.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+MAX_QUESTIONS = 7
+# Questions asked per turn (1-3) unless a session asks otherwise; above 1 each
+# /continue answers a prioritized set of questions at once
+INTERACTIVE_QUESTIONS_PER_TURN = max(1, min(3, int(os.environ.get('INTERACTIVE_QUESTIONS_PER_TURN', '1'))))
+
 class InteractiveQuestioningService:
     # Store questioning sessions in memory (in production, use database)
     questioning_sessions = {}
@@ -36,19 +45,25 @@ class InteractiveQuestioningService:
         return abbreviation.upper()
     
     @classmethod
-    def start_questioning(cls, problem_statement, organization_name=None, geographic_location=None, structured_statement=None):
+    def session_organization(cls, problem_id):
+        """
+        Organization name recorded for a questioning session, if any
+        """
+        return cls.questioning_sessions.get(problem_id, {}).get('organization_name')
+    
+    @classmethod
+    def start_questioning(cls, problem_statement, organization_name=None, geographic_location=None, structured_statement=None, questions_per_turn=None, deadline=None):
         """
-        Start an interactive questioning session for enhanced analysis
+        Start an interactive questioning session for enhanced analysis.
+        With more than one question per turn, the first turn asks a
+        prioritized set of questions instead of a single one.
         """
         try:
             # Generate unique problem ID with organization abbreviation
             org_abbrev = cls.generate_organization_abbreviation(organization_name) if organization_name else ""
-            unique_suffix = str(uuid.uuid4().hex[:6]).upper()
-            
-            if org_abbrev:
-                problem_id = f"I{org_abbrev}{unique_suffix}"
-            else:
-                problem_id = f"I{unique_suffix}"
+            problem_id = new_id("I", org_abbrev)
+            similar = similarity_index.query(problem_statement)
+            per_turn = questions_per_turn or INTERACTIVE_QUESTIONS_PER_TURN
             
             # Initialize questioning session with organization context
             cls.questioning_sessions[problem_id] = {
@@ -56,92 +71,144 @@ class InteractiveQuestioningService:
                 'organization_name': organization_name,
                 'geographic_location': geographic_location,
                 'structured_statement': structured_statement,
+                'questions_per_turn': per_turn,
                 'question_count': 0,
                 'answers': [],
                 'context': problem_statement
             }
             
-            # Generate first strategic question with organization context
-            first_question = OpenAIService.generate_first_strategic_question(
-                problem_statement, organization_name, geographic_location, structured_statement
-            )
-            
-            # Store first question
-            cls.questioning_sessions[problem_id]['question_count'] = 1
-            cls.questioning_sessions[problem_id]['current_question'] = first_question['question']
-            
-            return {
-                'problem_id': problem_id,
-                'question': first_question['question'],
-                'reasoning': first_question.get('reasoning', ''),
-                'question_number': 1,
-                'total_questions': 7,
-                'confidence_level': first_question.get('confidence_level', 'low')
-            }
-            
+            # Generate first strategic question(s) with organization context
+            if per_turn == 1:
+                first_question = OpenAIService.generate_first_strategic_question(
+                    problem_statement, organization_name, geographic_location, structured_statement,
+                    deadline=deadline
+                )
+                questions = [first_question['question']]
+            else:
+                first_question = OpenAIService.generate_first_strategic_questions(
+                    problem_statement, per_turn, organization_name, geographic_location, structured_statement,
+                    deadline=deadline
+                )
+                questions = first_question['questions']
+            
+            result = {'problem_id': problem_id}
+            result.update(cls._ask(cls.questioning_sessions[problem_id], questions, first_question, 'low'))
+            if similar:
+                result['similar_problems'] = similar
+            return result
+            
+        except (DeadlineExceeded, CircuitOpenError):
+            cls.questioning_sessions.pop(problem_id, None)
+            raise
         except Exception as e:
-            logger.error(f"Error starting interactive questioning: {str(e)}")
+            logger.error("Error starting interactive questioning: %s", e)
             raise Exception(f"Failed to start interactive questioning: {str(e)}")
     
+    @staticmethod
+    def _ask(session, questions, result, default_confidence):
+        """
+        Record the questions of a new turn on the session and describe the turn.
+        Sessions with one question per turn keep the single `question` format.
+        """
+        first_number = session['question_count'] + 1
+        session['question_count'] += len(questions)
+        session['current_question'] = questions[0]
+        session['current_questions'] = questions
+        metrics.observe('interactive.questions_per_turn', len(questions))
+        
+        turn = {
+            'reasoning': result.get('reasoning', ''),
+            'question_number': first_number,
+            'total_questions': MAX_QUESTIONS,
+            'confidence_level': result.get('confidence_level', default_confidence)
+        }
+        if session.get('questions_per_turn', 1) == 1:
+            turn['question'] = questions[0]
+        else:
+            turn['questions'] = questions
+        return turn
+    
     @classmethod
-    def continue_questioning(cls, problem_id, answer):
+    def continue_questioning(cls, problem_id, answers, deadline=None):
         """
-        Continue the questioning session with user's answer
+        Continue the questioning session with the user's answers to every
+        question of the current turn, given in order (a single answer may be
+        passed as a string)
         """
         try:
             if problem_id not in cls.questioning_sessions:
                 raise ValueError("No questioning session found for this problem ID")
             
             session = cls.questioning_sessions[problem_id]
-            
-            # Store the answer
-            session['answers'].append({
-                'question': session.get('current_question', ''),
-                'answer': answer
-            })
+            if isinstance(answers, str):
+                answers = [answers]
+            pending = session.get('current_questions') or [session.get('current_question', '')]
+            if len(answers) != len(pending):
+                raise ValueError(
+                    f"Expected {len(pending)} answer{'s' if len(pending) != 1 else ''} "
+                    f"(one per question, in order), got {len(answers)}"
+                )
+            
+            # Store the answers
+            session['answers'].extend(
+                {'question': question, 'answer': answer} for question, answer in zip(pending, answers)
+            )
             
             # Check if we should continue or stop
-            if session['question_count'] >= 7:
+            if session['question_count'] >= MAX_QUESTIONS:
                 return {
                     'completed': True, 
                     'reason': 'Maximum questions reached',
                     'total_answers': len(session['answers'])
                 }
             
-            # Generate next question based on context
-            next_question_result = OpenAIService.generate_next_strategic_question(
-                session['problem_statement'],
-                session['answers']
-            )
-            
-            if next_question_result.get('completed', False):
+            # Generate the next question(s) from the combined answers
+            count = min(session.get('questions_per_turn', 1), MAX_QUESTIONS - session['question_count'])
+            try:
+                if count == 1:
+                    next_question_result = OpenAIService.generate_next_strategic_question(
+                        session['problem_statement'],
+                        session['answers'],
+                        deadline=deadline
+                    )
+                    questions = [next_question_result['question']] if next_question_result.get('question') else []
+                else:
+                    next_question_result = OpenAIService.generate_next_strategic_questions(
+                        session['problem_statement'],
+                        session['answers'],
+                        count,
+                        deadline=deadline
+                    )
+                    questions = next_question_result['questions']
+            except DeadlineExceeded:
+                # Let the client retry the same answers
+                del session['answers'][-len(answers):]
+                raise
+            
+            if next_question_result.get('completed', False) or not questions:
                 return {
                     'completed': True,
                     'reason': next_question_result.get('reasoning', 'AI determined sufficient information gathered'),
                     'total_answers': len(session['answers'])
                 }
             
-            # Continue with next question
-            session['question_count'] += 1
-            session['current_question'] = next_question_result['question']
-            
-            return {
-                'question': next_question_result['question'],
-                'reasoning': next_question_result.get('reasoning', ''),
-                'question_number': session['question_count'],
-                'total_questions': 7,
-                'confidence_level': next_question_result.get('confidence_level', 'medium'),
-                'completed': False
-            }
+            # Continue with the next turn
+            result = cls._ask(session, questions, next_question_result, 'medium')
+            result['completed'] = False
+            return result
             
+        except (DeadlineExceeded, CircuitOpenError, ValueError):
+            raise
         except Exception as e:
-            logger.error(f"Error continuing questioning: {str(e)}")
+            logger.error("Error continuing questioning: %s", e)
             raise Exception(f"Failed to continue questioning: {str(e)}")
     
     @classmethod
-    def generate_comprehensive_solution(cls, problem_id):
+    def generate_comprehensive_solution(cls, problem_id, deadline=None):
         """
-        Generate comprehensive analysis and recommendations based on all answers
+        Generate comprehensive analysis and recommendations based on all answers.
+        If the deadline runs out, a solution generated earlier for this session
+        is returned instead (marked degraded).
         """
         try:
             if problem_id not in cls.questioning_sessions:
@@ -150,17 +217,28 @@ class InteractiveQuestioningService:
             session = cls.questioning_sessions[problem_id]
             
             # Generate comprehensive solution based on all answers
-            solution = OpenAIService.generate_comprehensive_solution(
-                session['problem_statement'],
-                session['answers']
-            )
+            try:
+                solution = OpenAIService.generate_comprehensive_solution(
+                    session['problem_statement'],
+                    session['answers'],
+                    deadline=deadline
+                )
+            except DeadlineExceeded:
+                if 'solution' not in session:
+                    raise
+                logger.warning("Deadline exceeded, returning earlier solution for %s", problem_id)
+                return {**session['solution'], 'degraded': True}
+            
+            session['solution'] = solution
             
             # Clean up session (optional - keep for audit trail)
             # del cls.questioning_sessions[problem_id]
             
-            logger.info(f"Comprehensive solution generated for {problem_id}")
+            logger.info("Comprehensive solution generated for %s", problem_id)
             return solution
             
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
         except Exception as e:
-            logger.error(f"Error generating comprehensive solution: {str(e)}")
+            logger.error("Error generating comprehensive solution: %s", e)
             raise Exception(f"Failed to generate comprehensive solution: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,306 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm.attributes import set_committed_value
+
+from src.models import BackgroundJob, db
+from src.services.llm_limiter import ANONYMOUS_TENANT, current_priority, current_tenant
+from src.utils.ids import new_id
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+# Base delay before a failed job is retried; doubles with each attempt
+JOB_RETRY_BACKOFF_S = float(os.environ.get('JOB_RETRY_BACKOFF_S', '5'))
+# A running job whose worker has not renewed its lease within this many
+# seconds is assumed lost (process crash or restart) and is picked up again;
+# workers renew the lease every third of it while the handler runs
+JOB_LEASE_S = float(os.environ.get('JOB_LEASE_S', '180'))
+JOB_POLL_INTERVAL_S = float(os.environ.get('JOB_POLL_INTERVAL_S', '1.0'))
+
+
+class PermanentJobError(Exception):
+    """
+    Raised by a job handler when retrying cannot help
+    """
+
+
+class JobQueue:
+    """
+    Durable background job queue stored in the application database (SQLite
+    by default), run by a bounded pool of worker threads.
+
+    Workers claim a job with a conditional UPDATE so several processes can
+    share one queue. Claims are leases, renewed while the handler runs: a
+    job left 'running' past its lease by a crashed worker becomes claimable
+    again, and a worker that lost its lease cannot overwrite the outcome of
+    the attempt that took over.
+    """
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self.handlers = {}
+        self.completion_listeners = []
+        self._app = None
+        self._threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def register(self, job_type, handler, max_attempts=JOB_MAX_ATTEMPTS, retry_backoff=JOB_RETRY_BACKOFF_S,
+                 on_failure=None):
+        """
+        Register the function that runs jobs of this type; it receives the
+        job payload and returns a JSON-serializable result. `on_failure` is
+        called with the job once it has failed for good.
+        """
+        self.handlers[job_type] = (handler, max_attempts, retry_backoff, on_failure)
+
+    def add_completion_listener(self, listener):
+        """
+        Call `listener(job)` whenever a job succeeds or fails for good
+        """
+        self.completion_listeners.append(listener)
+
+    def enqueue(self, job_type, payload, callback_url=None, commit=True):
+        """
+        Store a new job and wake a worker; returns the job
+        """
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        max_attempts = self.handlers[job_type][1]
+        tenant = current_tenant.get()
+        if tenant != ANONYMOUS_TENANT:
+            # LLM calls made by the job are accounted to the tenant that queued it
+            payload = {**payload, '_tenant': tenant}
+        job = BackgroundJob(
+            job_id=new_id("J"),
+            job_type=job_type,
+            payload=payload,
+            callback_url=callback_url,
+            max_attempts=max_attempts,
+            run_after=datetime.utcnow()
+        )
+        db.session.add(job)
+        if commit:
+            db.session.commit()
+        metrics.increment(f'jobs.enqueued.{job_type}')
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id):
+        return BackgroundJob.query.filter_by(job_id=job_id).first()
+
+    def init_app(self, app):
+        """
+        Start the worker pool, and restart it in forked worker processes
+        (threads do not survive fork)
+        """
+        self._app = app
+        if self.workers <= 0:
+            return
+        self.start()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    def start(self):
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._worker_loop, name=f'job-worker-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _restart_after_fork(self):
+        # Pooled connections inherited from the parent must not be shared;
+        # close=False leaves them open for the parent
+        with self._app.app_context():
+            db.engine.dispose(close=False)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self.start()
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                with self._app.app_context():
+                    ran = self._run_next()
+            except Exception as e:
+                logger.error("Job worker error: %s", e)
+                ran = False
+            if not ran:
+                self._wakeup.wait(JOB_POLL_INTERVAL_S)
+                self._wakeup.clear()
+
+    def _claim(self):
+        now = datetime.utcnow()
+        claimable = or_(
+            and_(BackgroundJob.status == 'queued', BackgroundJob.run_after <= now),
+            and_(BackgroundJob.status == 'running', BackgroundJob.locked_until < now),
+        )
+        for job in BackgroundJob.query.filter(claimable).order_by(BackgroundJob.run_after).limit(5):
+            recovered = job.status == 'running'
+            # attempts acts as a version number, so only one worker wins the claim
+            claimed = BackgroundJob.query.filter(
+                BackgroundJob.id == job.id,
+                BackgroundJob.status == job.status,
+                BackgroundJob.attempts == job.attempts,
+            ).update({
+                'status': 'running',
+                'attempts': job.attempts + 1,
+                'locked_until': now + timedelta(seconds=JOB_LEASE_S),
+                'started_at': now,
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                db.session.refresh(job)
+                if recovered:
+                    metrics.increment('jobs.recovered')
+                    logger.warning("Recovered job %s after its lease expired", job.job_id)
+                return job
+        return None
+
+    def _run_next(self):
+        job = self._claim()
+        if job is None:
+            return False
+        # The attempt this worker claimed; job rows may be reloaded after a
+        # rollback and show a later attempt if the lease was lost
+        attempt = job.attempts
+
+        if job.attempts > job.max_attempts:
+            self._finish(job, attempt, 'failed', error="Job exceeded its retry limit after a worker was lost")
+            return True
+
+        entry = self.handlers.get(job.job_type)
+        if entry is None:
+            self._finish(job, attempt, 'failed', error=f"No handler registered for job type {job.job_type}")
+            return True
+
+        handler = entry[0]
+        metrics.observe(f'jobs.wait_ms.{job.job_type}',
+                        (job.started_at - job.created_at).total_seconds() * 1000)
+        payload = dict(job.payload or {})
+        tenant_token = current_tenant.set(payload.pop('_tenant', ANONYMOUS_TENANT))
+        # Nobody is waiting on a background job's response
+        priority_token = current_priority.set('bulk')
+        start = time.perf_counter()
+        heartbeat = threading.Event()
+        threading.Thread(
+            target=self._renew_lease, args=(job.id, attempt, heartbeat),
+            name=f'job-lease-{job.job_id}', daemon=True
+        ).start()
+        try:
+            result = handler(payload)
+        except PermanentJobError as e:
+            db.session.rollback()
+            logger.error("Job %s failed permanently: %s", job.job_id, e)
+            self._finish(job, attempt, 'failed', error=str(e))
+            return True
+        except Exception as e:
+            db.session.rollback()
+            self._fail_attempt(job, attempt, e)
+            return True
+        finally:
+            heartbeat.set()
+            current_priority.reset(priority_token)
+            current_tenant.reset(tenant_token)
+        metrics.observe(f'jobs.run_ms.{job.job_type}', (time.perf_counter() - start) * 1000)
+        self._finish(job, attempt, 'succeeded', result=result)
+        return True
+
+    def _renew_lease(self, row_id, attempts, stopped):
+        """
+        Extend the lease of a claimed job until `stopped` is set or the claim is lost
+        """
+        while not stopped.wait(JOB_LEASE_S / 3):
+            try:
+                with self._app.app_context():
+                    renewed = BackgroundJob.query.filter(
+                        BackgroundJob.id == row_id,
+                        BackgroundJob.status == 'running',
+                        BackgroundJob.attempts == attempts,
+                    ).update({
+                        'locked_until': datetime.utcnow() + timedelta(seconds=JOB_LEASE_S),
+                    }, synchronize_session=False)
+                    db.session.commit()
+            except Exception as e:
+                logger.warning("Renewing the lease of job row %s failed: %s", row_id, e)
+                continue
+            if not renewed:
+                return
+
+    def _update_claimed(self, job, attempt, **values):
+        """
+        Apply values to a running job only if this worker's claim (attempt)
+        still holds; returns whether it did
+        """
+        updated = BackgroundJob.query.filter(
+            BackgroundJob.id == job.id,
+            BackgroundJob.status == 'running',
+            BackgroundJob.attempts == attempt,
+        ).update(values, synchronize_session=False)
+        if not updated:
+            db.session.rollback()
+            metrics.increment(f'jobs.lease_lost.{job.job_type}')
+            logger.warning("Job %s attempt %s lost its lease, discarding its outcome", job.job_id, attempt)
+            return False
+        for name, value in values.items():
+            set_committed_value(job, name, value)
+        return True
+
+    def _fail_attempt(self, job, attempt, error):
+        if attempt < job.max_attempts:
+            retry_backoff = self.handlers[job.job_type][2]
+            delay = retry_backoff * (2 ** (attempt - 1))
+            if not self._update_claimed(
+                job, attempt, status='queued', error=str(error),
+                run_after=datetime.utcnow() + timedelta(seconds=delay), locked_until=None,
+            ):
+                return
+            db.session.commit()
+            metrics.increment(f'jobs.retried.{job.job_type}')
+            logger.warning("Job %s failed (attempt %s of %s), retrying in %.0fs: %s",
+                           job.job_id, attempt, job.max_attempts, delay, error)
+        else:
+            logger.error("Job %s failed permanently: %s", job.job_id, error)
+            self._finish(job, attempt, 'failed', error=str(error))
+
+    def _finish(self, job, attempt, status, result=None, error=None):
+        if not self._update_claimed(
+            job, attempt, status=status, result=result, error=error, locked_until=None, finished_at=datetime.utcnow(),
+        ):
+            return
+        entry = self.handlers.get(job.job_type)
+        if status == 'failed' and entry and entry[3]:
+            self._call_safely(entry[3], job)
+        for listener in self.completion_listeners:
+            self._call_safely(listener, job)
+        db.session.commit()
+        metrics.increment(f'jobs.{status}.{job.job_type}')
+        if self.completion_listeners:
+            # Listeners may have queued follow-up jobs
+            self._wakeup.set()
+
+    @staticmethod
+    def _call_safely(callback, job):
+        try:
+            callback(job)
+        except Exception as e:
+            logger.error("Job %s completion callback failed: %s", job.job_id, e)
+
+
+job_queue = JobQueue()
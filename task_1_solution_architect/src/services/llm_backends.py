@@ -0,0 +1,448 @@
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from openai import OpenAI
+
+from src.services.llm_parsing import NESTED_SCHEMAS, REQUIRED, RESPONSE_SCHEMAS
+from src.services.llm_transport import LLM_HTTP_WARM_CONNECTIONS, PooledTransport
+from src.utils import json_backend
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# After the primary backend's p95 latency for the call type, send a backup
+# request to the next backend and use whichever answers first
+LLM_HEDGING = os.environ.get('LLM_HEDGING', '').lower() in ('1', 'true', 'yes')
+# Threads running hedged requests in each process
+LLM_HEDGE_MAX_WORKERS = int(os.environ.get('LLM_HEDGE_MAX_WORKERS', '16'))
+# OpenAI-compatible endpoint of the local model server (Ollama, vLLM, llama.cpp)
+LLM_LOCAL_BASE_URL = os.environ.get('LLM_LOCAL_BASE_URL', 'http://localhost:11434/v1')
+# Weight of the latest outcome in a backend's health score
+HEALTH_DECAY = 0.2
+# Unhealthy backends keep a little traffic so that they can recover
+MIN_HEALTH = 0.05
+
+
+class HedgeCancelled(Exception):
+    """
+    The request lost a hedge race and was abandoned
+    """
+
+
+def _usage(usage):
+    return getattr(usage, 'prompt_tokens', None), getattr(usage, 'completion_tokens', None)
+
+
+def _remaining(params, started):
+    """
+    Request parameters for a later attempt, with the timeout reduced by the time already spent
+    """
+    if params.get('timeout') is None:
+        return params
+    return {**params, 'timeout': max(0.1, params['timeout'] - (time.monotonic() - started))}
+
+
+class BackendHealth:
+    """
+    Exponentially weighted success rate and recent latencies of one backend
+    """
+
+    def __init__(self, window=50, min_samples=5):
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self.score = 1.0
+        self._latencies = {}
+
+    def record_success(self, call_type, latency_ms):
+        with self._lock:
+            self.score += HEALTH_DECAY * (1.0 - self.score)
+            samples = self._latencies.get(call_type)
+            if samples is None:
+                samples = self._latencies[call_type] = deque(maxlen=self.window)
+            samples.append(latency_ms)
+
+    def record_failure(self):
+        with self._lock:
+            self.score -= HEALTH_DECAY * self.score
+
+    def p95_ms(self, call_type):
+        with self._lock:
+            samples = self._latencies.get(call_type)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class LLMBackend:
+    """
+    A chat completion endpoint. `complete` runs one JSON-mode completion and
+    returns (content, prompt_tokens, completion_tokens), with content None if
+    the model returned no choices. Given a `cancel` event it must give up
+    with HedgeCancelled soon after the event is set.
+    """
+
+    kind = None
+    # Environment variable that must hold an API key for this backend, if any
+    api_key_env = None
+
+    def __init__(self, name, weight=1.0, model=None, models=None):
+        self.name = name
+        self.weight = float(weight)
+        # Model used for every call, or a map from the routed model names to this backend's
+        self.model = model
+        self.models = models or {}
+        self.health = BackendHealth()
+
+    def model_for(self, model):
+        return self.model or self.models.get(model, model)
+
+    def complete(self, call_type, model, messages, max_tokens, cancel=None, **params):
+        raise NotImplementedError
+
+    def warm(self, connections=LLM_HTTP_WARM_CONNECTIONS):
+        """
+        Open connections to the backend ahead of the first call; returns how
+        many were opened, or None for backends without a connection pool
+        """
+        return None
+
+    def transport_stats(self):
+        return None
+
+    def reset_after_fork(self):
+        pass
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    The OpenAI API or any endpoint implementing its chat completions API
+    """
+
+    kind = 'openai'
+    # Whether the server reports token usage at the end of a stream
+    stream_usage = True
+
+    def __init__(self, name, base_url=None, api_key=None, api_key_env='OPENAI_API_KEY', **options):
+        super().__init__(name, **options)
+        if api_key is None:
+            self.api_key_env = api_key_env
+            api_key = os.environ.get(api_key_env)
+        self.api_key = api_key
+        self.base_url = base_url
+        self.transport = PooledTransport(name)
+        self._client = None
+        self._client_pid = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """
+        API client on this process's tuned connection pool (see llm_transport)
+        """
+        with self._client_lock:
+            if self._client is None or self._client_pid != os.getpid():
+                http_client = self.transport.client()
+                self._client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                      http_client=http_client, timeout=http_client.timeout)
+                self._client_pid = os.getpid()
+            return self._client
+
+    def warm(self, connections=LLM_HTTP_WARM_CONNECTIONS):
+        return self.transport.warm(str(self.client.base_url), connections)
+
+    def transport_stats(self):
+        return self.transport.stats()
+
+    def reset_after_fork(self):
+        # A lock held by another thread at fork time would stay locked in the child
+        self._client_lock = threading.Lock()
+        self.transport.reset_after_fork()
+
+    def complete(self, call_type, model, messages, max_tokens, cancel=None, **params):
+        request = dict(
+            model=self.model_for(model),
+            messages=messages,
+            response_format={"type": "json_object"},
+            max_tokens=max_tokens,
+            **params
+        )
+        if cancel is None:
+            response = self.client.chat.completions.create(**request)
+            content = response.choices[0].message.content if response.choices else None
+            return (content, *_usage(getattr(response, 'usage', None)))
+
+        # Streamed, so that a request losing a hedge race stops generating
+        # as soon as the stream is closed
+        if self.stream_usage:
+            request['stream_options'] = {'include_usage': True}
+        parts, usage, choices = [], None, False
+        with self.client.chat.completions.create(stream=True, **request) as stream:
+            for chunk in stream:
+                if cancel.is_set():
+                    raise HedgeCancelled(f"{self.name} request cancelled")
+                if chunk.choices:
+                    choices = True
+                    parts.append(chunk.choices[0].delta.content or '')
+                if getattr(chunk, 'usage', None):
+                    usage = chunk.usage
+        return (''.join(parts) if choices else None, *_usage(usage))
+
+
+class LocalBackend(OpenAICompatibleBackend):
+    """
+    A local model server with an OpenAI-compatible API
+    """
+
+    kind = 'local'
+    stream_usage = False
+
+    def __init__(self, name, base_url=LLM_LOCAL_BASE_URL, api_key='local', **options):
+        super().__init__(name, base_url=base_url, api_key=api_key, **options)
+
+
+class MockBackend(LLMBackend):
+    """
+    Deterministic offline backend for development and load tests: answers
+    each call type with a schema-valid document derived from a hash of the
+    prompt, after a fixed delay
+    """
+
+    kind = 'mock'
+
+    def __init__(self, name, latency_ms=0, **options):
+        super().__init__(name, **options)
+        self.latency_ms = float(latency_ms)
+
+    def complete(self, call_type, model, messages, max_tokens, cancel=None, **params):
+        if self.latency_ms:
+            if cancel is not None and cancel.wait(self.latency_ms / 1000):
+                raise HedgeCancelled(f"{self.name} request cancelled")
+            elif cancel is None:
+                time.sleep(self.latency_ms / 1000)
+        prompt = ''.join(message['content'] for message in messages)
+        tag = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        content = json_backend.dumps(self._document(call_type, tag))
+        return content, len(prompt) // 4, len(content) // 4
+
+    @classmethod
+    def _document(cls, call_type, tag):
+        document = {}
+        for field, (kind, default) in RESPONSE_SCHEMAS.get(call_type, {}).items():
+            label = field.replace('_', ' ')
+            if kind is str:
+                document[field] = f"Mock {label} {tag}"
+            elif kind is list:
+                document[field] = [f"Mock {label} {tag} #{i}" for i in range(1, 4)]
+            elif kind is dict and call_type in NESTED_SCHEMAS:
+                document[field] = cls._document(NESTED_SCHEMAS[call_type], tag)
+            else:
+                document[field] = kind() if default is REQUIRED else default
+        return document
+
+
+BACKEND_TYPES = {backend.kind: backend for backend in (OpenAICompatibleBackend, LocalBackend, MockBackend)}
+
+
+def _load_backends():
+    """
+    Backends from LLM_BACKENDS, a JSON list such as
+    [{"name": "openai", "type": "openai", "weight": 3},
+     {"name": "local", "type": "local", "model": "llama3.1:8b", "weight": 1}];
+    the OpenAI API alone by default
+    """
+    # the newest OpenAI model is "gpt-5" which was released August 7, 2025.
+    # do not change this unless explicitly requested by the user
+    specs = [{'name': 'openai', 'type': 'openai'}]
+    raw = os.environ.get('LLM_BACKENDS')
+    if raw:
+        try:
+            specs = json.loads(raw)
+        except ValueError:
+            logger.error("Ignoring invalid JSON in LLM_BACKENDS")
+    backends = []
+    for spec in specs:
+        options = dict(spec)
+        kind = options.pop('type', 'openai')
+        try:
+            backends.append(BACKEND_TYPES[kind](options.pop('name', kind), **options))
+        except (KeyError, TypeError) as e:
+            logger.error("Ignoring LLM backend %s: %s", spec, e)
+    return backends
+
+
+class BackendPool:
+    """
+    Routes each LLM call to one of several backends.
+
+    The primary backend is drawn at random in proportion to weight times
+    health score; the others follow by the same product. With hedging on,
+    a call still unanswered after the primary's p95 latency for its call
+    type gets a backup request on the next backend, and the slower of the
+    two is cancelled.
+    """
+
+    def __init__(self, backends, hedging=LLM_HEDGING, max_workers=LLM_HEDGE_MAX_WORKERS):
+        self.backends = backends
+        self.hedging = hedging
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # Executor threads do not survive fork; backend clients rebuild their
+        # connection pools on first use in the child
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        for backend in self.backends:
+            backend.reset_after_fork()
+
+    def _pool(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='llm-hedge')
+            return self._executor
+
+    def missing_api_keys(self):
+        return sorted({backend.api_key_env for backend in self.backends
+                       if backend.api_key_env and not os.environ.get(backend.api_key_env)})
+
+    def order(self):
+        """
+        Backends to use for a call: a weighted random primary, then the rest
+        """
+        rated = [(backend, backend.weight * max(MIN_HEALTH, backend.health.score)) for backend in self.backends]
+        rated = [item for item in rated if item[1] > 0]
+        if len(rated) <= 1:
+            return [backend for backend, _ in rated]
+        primary = random.choices([backend for backend, _ in rated], weights=[rate for _, rate in rated])[0]
+        rest = sorted((item for item in rated if item[0] is not primary), key=lambda item: item[1], reverse=True)
+        return [primary] + [backend for backend, _ in rest]
+
+    def complete(self, call_type, model, messages, max_tokens, **params):
+        """
+        Run a completion on the routed backends; returns a dict with the
+        content, token usage, and the backend that answered
+        """
+        order = self.order()
+        if not order:
+            raise Exception("No LLM backend is configured")
+        primary = order[0]
+        delay_ms = primary.health.p95_ms(call_type) if self.hedging else None
+        if delay_ms is not None:
+            backup = order[1] if len(order) > 1 else primary
+            return self._hedged(primary, backup, delay_ms, call_type, model, messages, max_tokens, params)
+        started = time.monotonic()
+        try:
+            return self._attempt(primary, call_type, model, messages, max_tokens, None, params)
+        except Exception:
+            if len(order) == 1:
+                raise
+        # One failover to the next backend before the caller falls back to another model
+        metrics.increment(f'llm.backend_failovers.{call_type}')
+        return self._attempt(order[1], call_type, model, messages, max_tokens, None, _remaining(params, started))
+
+    def _hedged(self, primary, backup, delay_ms, call_type, model, messages, max_tokens, params):
+        started = time.monotonic()
+        pending = {}
+
+        def submit(backend, leg_params):
+            cancel = threading.Event()
+            future = self._pool().submit(
+                contextvars.copy_context().run, self._attempt,
+                backend, call_type, model, messages, max_tokens, cancel, leg_params
+            )
+            pending[future] = cancel
+            return future
+
+        first = submit(primary, params)
+        done, _ = wait([first], timeout=delay_ms / 1000)
+        if done:
+            del pending[first]
+            try:
+                return first.result()
+            except Exception:
+                if backup is primary:
+                    raise
+            # Failed before the hedge delay: fail over as an unhedged call would
+            metrics.increment(f'llm.backend_failovers.{call_type}')
+            return self._attempt(backup, call_type, model, messages, max_tokens, None, _remaining(params, started))
+
+        metrics.increment(f'llm.hedges.{call_type}')
+        second = submit(backup, _remaining(params, started))
+        last_error = None
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                for cancel in pending.values():
+                    cancel.set()
+                if future is second:
+                    metrics.increment(f'llm.hedge_wins.{call_type}')
+                result['hedged'] = True
+                return result
+        raise last_error
+
+    @staticmethod
+    def _attempt(backend, call_type, model, messages, max_tokens, cancel, params):
+        started = time.perf_counter()
+        try:
+            content, prompt_tokens, completion_tokens = backend.complete(
+                call_type, model, messages, max_tokens, cancel=cancel, **params
+            )
+        except HedgeCancelled:
+            metrics.increment(f'llm.hedge_cancellations.{backend.name}')
+            raise
+        except Exception as e:
+            backend.health.record_failure()
+            metrics.increment(f'llm.backend_failures.{backend.name}')
+            metrics.set_gauge(f'llm.backend_health.{backend.name}', round(backend.health.score, 3))
+            logger.warning("Backend %s failed for %s: %s", backend.name, call_type, e)
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        backend.health.record_success(call_type, latency_ms)
+        metrics.increment(f'llm.backend_calls.{backend.name}')
+        metrics.set_gauge(f'llm.backend_health.{backend.name}', round(backend.health.score, 3))
+        return {
+            'content': content,
+            'backend': backend.name,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+        }
+
+    def warm(self):
+        """
+        Pre-open connections to every backend; returns connections opened per backend
+        """
+        return {backend.name: backend.warm() for backend in self.backends}
+
+    def status(self):
+        return [
+            {
+                'name': backend.name,
+                'type': backend.kind,
+                'weight': backend.weight,
+                'health': round(backend.health.score, 3),
+                'transport': backend.transport_stats(),
+            }
+            for backend in self.backends
+        ]
+
+
+llm_backends = BackendPool(_load_backends())
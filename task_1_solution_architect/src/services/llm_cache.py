@@ -0,0 +1,83 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.utils import json_backend
+from src.utils.metrics import metrics
+
+# Validated LLM results kept per process; 0 disables the cache
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', '2000'))
+# Seconds a cached result is served before the model is asked again
+LLM_CACHE_TTL_S = float(os.environ.get('LLM_CACHE_TTL_S', '86400'))
+
+
+class LLMResponseCache:
+    """
+    In-process LRU cache of validated LLM results, keyed by call type, prompt
+    and generation parameters. Results are stored serialized, so callers are
+    free to modify what they get back.
+    """
+
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL_S):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(call_type, messages, max_tokens, params):
+        payload = json_backend.dumps_bytes([call_type, messages, max_tokens, sorted(params.items())])
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key):
+        """
+        The cached result for a key, or None
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._entries.move_to_end(key)
+        metrics.increment('llm.cache.hits' if entry else 'llm.cache.misses')
+        return json_backend.loads(entry[1]) if entry else None
+
+    def put(self, key, result):
+        if not self.enabled:
+            return
+        body = json_backend.dumps_bytes(result)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 3) if lookups else None,
+            }
+
+
+llm_cache = LLMResponseCache()
@@ -0,0 +1,346 @@
+import contextvars
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import request
+
+from src.utils.deadlines import DeadlineExceeded
+from src.utils.helpers import create_error_response
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+API_KEY_HEADER = 'X-API-Key'
+# Sustained LLM calls per minute and burst size allowed for each tenant
+LLM_TENANT_RATE_PER_MIN = float(os.environ.get('LLM_TENANT_RATE_PER_MIN', '30'))
+LLM_TENANT_BURST = float(os.environ.get('LLM_TENANT_BURST', '20'))
+# LLM calls in flight per process; further calls wait in the fair queue
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '8'))
+# LLM calls per process that bulk (background) work may hold at once; defaults to half of the slots
+LLM_BULK_MAX_CONCURRENCY = int(os.environ.get('LLM_BULK_MAX_CONCURRENCY', '0'))
+# A queued call moves up one priority class for every this many seconds it waits
+LLM_PRIORITY_AGING_S = float(os.environ.get('LLM_PRIORITY_AGING_S', '10'))
+# Idle tenants are forgotten once more than this many are tracked
+LLM_MAX_TRACKED_TENANTS = 10000
+# Tenants reported under their own name in /metrics, besides weighted ones;
+# later tenants share 'other' and client addresses share 'ip'
+LLM_METRIC_TENANTS = int(os.environ.get('LLM_METRIC_TENANTS', '50'))
+
+ANONYMOUS_TENANT = 'anonymous'
+
+current_tenant = contextvars.ContextVar('llm_tenant', default=ANONYMOUS_TENANT)
+
+# Scheduling classes, most urgent first: a person waiting on the response,
+# ordinary API requests, and background jobs
+PRIORITY_CLASSES = ('interactive', 'standard', 'bulk')
+current_priority = contextvars.ContextVar('llm_priority', default='standard')
+
+_METRIC_UNSAFE = re.compile(r'[^a-z0-9_:-]+')
+
+
+def _load_weights():
+    raw = os.environ.get('LLM_TENANT_WEIGHTS')
+    if not raw:
+        return {}
+    try:
+        return {name if ':' in name else tenant_key(name): float(weight)
+                for name, weight in json.loads(raw).items()}
+    except (ValueError, AttributeError):
+        logger.error("Ignoring invalid JSON in LLM_TENANT_WEIGHTS")
+        return {}
+
+
+def tenant_key(organization_name=None, api_key=None):
+    """
+    Tenant an LLM call is accounted to: the API key (hashed, so it never
+    appears in metrics or logs), else the organization name
+    """
+    if api_key:
+        return 'key:' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+    if organization_name:
+        return 'org:' + _METRIC_UNSAFE.sub('_', organization_name.lower()).strip('_')[:48]
+    return None
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` calls per second with bursts of `burst`.
+
+    Admission only requires a token to be available; each call then charges
+    one, so a request that makes several calls can leave the bucket in debt,
+    which delays that tenant's next request instead of failing this one.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def retry_after(self):
+        """
+        Seconds until a call can be admitted (0 if one can be now)
+        """
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def charge(self, cost=1):
+        self._refill(time.monotonic())
+        self.tokens -= cost
+
+    @property
+    def full(self):
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst
+
+
+class _Waiter:
+    __slots__ = ('tenant', 'priority', 'queued_at', 'event', 'granted')
+
+    def __init__(self, tenant, priority):
+        self.tenant = tenant
+        self.priority = priority
+        self.queued_at = time.monotonic()
+        self.event = threading.Event()
+        self.granted = False
+
+
+class LLMLimiter:
+    """
+    Per-tenant rate limits and priority-aware weighted fair queueing for LLM calls.
+
+    Up to `max_concurrency` calls run at once, of which at most
+    `bulk_max_concurrency` may be bulk calls, so interactive turns find a free
+    slot even while background work saturates the limiter. Waiting calls are
+    dispatched by priority class (interactive, then standard, then bulk), so
+    queued bulk work is overtaken by anything more urgent; a call that has
+    waited `aging_s` seconds moves up one class, so bulk work is never starved.
+    Within a class, calls go in start-time fair queueing order: each call is
+    tagged with its tenant's virtual finish time (advancing by 1/weight per
+    call), so a tenant with a deep backlog cannot starve others.
+    """
+
+    def __init__(self, rate_per_min=LLM_TENANT_RATE_PER_MIN, burst=LLM_TENANT_BURST,
+                 max_concurrency=LLM_MAX_CONCURRENCY, weights=None,
+                 bulk_max_concurrency=None, aging_s=LLM_PRIORITY_AGING_S):
+        self.rate = rate_per_min / 60.0
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        if bulk_max_concurrency is None:
+            bulk_max_concurrency = LLM_BULK_MAX_CONCURRENCY or max(1, max_concurrency // 2)
+        self.bulk_max_concurrency = min(bulk_max_concurrency, max_concurrency)
+        self.aging_s = aging_s
+        self.weights = _load_weights() if weights is None else weights
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._active = 0
+        self._active_bulk = 0
+        self._queues = {priority: [] for priority in PRIORITY_CLASSES}
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish = {}
+        self._depth = defaultdict(int)
+        self._labels = set()
+        self._label_lock = threading.Lock()
+
+    def _bucket(self, tenant):
+        bucket = self._buckets.get(tenant)
+        if bucket is None:
+            if len(self._buckets) >= LLM_MAX_TRACKED_TENANTS:
+                self._buckets = {name: b for name, b in self._buckets.items() if not b.full}
+            bucket = self._buckets[tenant] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def retry_after(self, tenant):
+        """
+        Seconds the tenant must wait before its next request is admitted (0 if it may go ahead)
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            return self._bucket(tenant).retry_after()
+
+    def metric_label(self, tenant):
+        """
+        Tenant name used in metric names, from a bounded set so arbitrary
+        organization names and client addresses cannot grow the registry
+        """
+        if tenant.startswith('ip:'):
+            return 'ip'
+        if tenant in self.weights or tenant in self._labels:
+            return tenant
+        with self._label_lock:
+            if len(self._labels) < LLM_METRIC_TENANTS:
+                self._labels.add(tenant)
+                return tenant
+        return 'other'
+
+    def _tag(self, tenant):
+        start = max(self._virtual_time, self._last_finish.get(tenant, 0.0))
+        self._last_finish[tenant] = start + 1.0 / self.weights.get(tenant, 1.0)
+        return start
+
+    def acquire(self, tenant, priority='standard', timeout=None):
+        """
+        Wait for a call slot in priority and fair order; raises DeadlineExceeded
+        if none frees up within `timeout` seconds
+        """
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority}")
+        started = time.perf_counter()
+        with self._lock:
+            if self.rate > 0:
+                self._bucket(tenant).charge()
+            start_tag = self._tag(tenant)
+            # Calls only stay queued while every slot is busy, or, for bulk
+            # calls, while bulk work is at its limit
+            if priority == 'bulk':
+                free = self._active_bulk < self.bulk_max_concurrency and not self._queues['bulk']
+            else:
+                free = not any(self._queues[p] for p in PRIORITY_CLASSES if p != 'bulk')
+            if free and self._active < self.max_concurrency:
+                self._active += 1
+                if priority == 'bulk':
+                    self._active_bulk += 1
+                self._virtual_time = start_tag
+                waiter = None
+            else:
+                waiter = _Waiter(tenant, priority)
+                heapq.heappush(self._queues[priority], (start_tag, next(self._sequence), waiter))
+                label = self.metric_label(tenant)
+                self._depth[label] += 1
+                metrics.set_gauge(f'llm.queue_depth.{label}', self._depth[label])
+
+        if waiter is not None and not waiter.event.wait(timeout):
+            with self._lock:
+                if not waiter.granted:
+                    queue = self._queues[priority]
+                    queue[:] = [entry for entry in queue if entry[2] is not waiter]
+                    heapq.heapify(queue)
+                    self._leave_queue(tenant)
+                    metrics.increment(f'llm.queue_timeouts.{self.metric_label(tenant)}')
+                    raise DeadlineExceeded("Request deadline exceeded while waiting for AI capacity")
+        waited_ms = (time.perf_counter() - started) * 1000
+        metrics.observe(f'llm.queue_wait_ms.{self.metric_label(tenant)}', waited_ms)
+        metrics.observe(f'llm.queue_wait_ms.priority.{priority}', waited_ms)
+
+    def _next_waiter(self, now):
+        """
+        Pop the waiter to run next: the queue heads are compared by priority
+        class after aging, then by fair-queueing tag
+        """
+        best = None
+        for rank, priority in enumerate(PRIORITY_CLASSES):
+            queue = self._queues[priority]
+            if not queue:
+                continue
+            if priority == 'bulk' and self._active_bulk >= self.bulk_max_concurrency:
+                continue
+            start_tag, _, waiter = queue[0]
+            if self.aging_s > 0:
+                rank = max(0, rank - int((now - waiter.queued_at) / self.aging_s))
+            if best is None or (rank, start_tag) < best[:2]:
+                best = (rank, start_tag, priority)
+        if best is None:
+            return None, None
+        rank, start_tag, priority = best
+        waiter = heapq.heappop(self._queues[priority])[2]
+        if rank < PRIORITY_CLASSES.index(priority):
+            metrics.increment(f'llm.priority_aged.{priority}')
+        return waiter, start_tag
+
+    def release(self, priority='standard'):
+        with self._lock:
+            if priority == 'bulk':
+                self._active_bulk -= 1
+            waiter, start_tag = self._next_waiter(time.monotonic())
+            if waiter is not None:
+                waiter.granted = True
+                if waiter.priority == 'bulk':
+                    self._active_bulk += 1
+                self._virtual_time = start_tag
+                self._leave_queue(waiter.tenant)
+                waiter.event.set()
+                return
+            self._active -= 1
+            if len(self._last_finish) > LLM_MAX_TRACKED_TENANTS:
+                # Tenants whose tags are behind virtual time would restart from it anyway
+                self._last_finish = {t: f for t, f in self._last_finish.items() if f > self._virtual_time}
+
+    def _leave_queue(self, tenant):
+        label = self.metric_label(tenant)
+        self._depth[label] -= 1
+        depth = self._depth[label]
+        if not depth:
+            del self._depth[label]
+        metrics.set_gauge(f'llm.queue_depth.{label}', depth)
+
+    @contextmanager
+    def slot(self, deadline=None):
+        """
+        Hold a call slot for the current tenant and priority class for the duration of the block
+        """
+        priority = current_priority.get()
+        self.acquire(current_tenant.get(), priority,
+                     timeout=deadline.remaining() if deadline is not None else None)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+
+llm_limiter = LLMLimiter()
+
+
+def tenant_limited(organization=None, priority='standard'):
+    """
+    Route decorator (placed below validated_json): account the request to
+    its tenant and answer 429 with Retry-After while the tenant is over its
+    LLM quota. `organization(payload)` can supply the organization name for
+    endpoints whose body does not carry one; `priority` is the scheduling
+    class of the request's LLM calls.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(data, *args, **kwargs):
+            organization_name = data.get('organization_name')
+            if not organization_name and organization is not None:
+                organization_name = organization(data)
+            tenant = (tenant_key(organization_name, request.headers.get(API_KEY_HEADER))
+                      or f'ip:{request.remote_addr or ANONYMOUS_TENANT}')
+            retry_after = llm_limiter.retry_after(tenant)
+            if retry_after > 0:
+                metrics.increment(f'llm.rate_limited.{llm_limiter.metric_label(tenant)}')
+                response, status_code = create_error_response(
+                    "Too many AI requests for this organization, please retry later",
+                    status_code=429,
+                    error_type="rate_limited"
+                )
+                response.headers['Retry-After'] = str(math.ceil(retry_after))
+                return response, status_code
+            token = current_tenant.set(tenant)
+            priority_token = current_priority.set(priority)
+            try:
+                return view(data, *args, **kwargs)
+            finally:
+                current_priority.reset(priority_token)
+                current_tenant.reset(token)
+        return wrapper
+    return decorator
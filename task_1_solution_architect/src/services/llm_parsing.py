@@ -0,0 +1,271 @@
+import copy
+import logging
+import re
+
+from src.utils import json_backend
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+REQUIRED = object()
+
+
+class LLMResponseParseError(ValueError):
+    """
+    Model output could not be repaired into a document matching its schema
+    """
+
+
+# Expected top-level fields per call type: field -> (type, default or REQUIRED)
+RESPONSE_SCHEMAS = {
+    'analyze_basic': {
+        'description': (str, REQUIRED),
+        'clarifying_questions': (list, []),
+    },
+    'analyze_enhanced': {
+        'description': (str, REQUIRED),
+        'clarifying_questions': (list, []),
+    },
+    'recommend_basic': {
+        'solution_summary': (str, REQUIRED),
+        'recommended_tech_stack': (list, []),
+        'initial_steps': (list, []),
+    },
+    'recommend_enhanced': {
+        'solution_summary': (str, REQUIRED),
+        'recommended_tech_stack': (list, []),
+        'initial_steps': (list, []),
+    },
+    'first_question': {
+        'question': (str, REQUIRED),
+        'reasoning': (str, ''),
+        'confidence_level': (str, 'low'),
+    },
+    'next_question': {
+        'question': (str, None),
+        'reasoning': (str, ''),
+        'confidence_level': (str, 'medium'),
+        'completed': (bool, False),
+    },
+    # Multi-question turns (INTERACTIVE_QUESTIONS_PER_TURN > 1)
+    'first_questions': {
+        'questions': (list, REQUIRED),
+        'reasoning': (str, ''),
+        'confidence_level': (str, 'low'),
+    },
+    'next_questions': {
+        'questions': (list, []),
+        'reasoning': (str, ''),
+        'confidence_level': (str, 'medium'),
+        'completed': (bool, False),
+    },
+    'comprehensive_solution': {
+        'analysis_summary': (str, ''),
+        'solution_summary': (str, REQUIRED),
+        'recommended_tech_stack': (list, []),
+        'initial_steps': (list, []),
+        'success_metrics': (list, []),
+        'risk_mitigation': (list, []),
+        'ethical_considerations': (list, []),
+    },
+    # Sections of comprehensive_solution generated concurrently in parallel mode
+    'solution_section_summary': {
+        'analysis_summary': (str, ''),
+        'solution_summary': (str, REQUIRED),
+    },
+    'solution_section_tech_stack': {
+        'recommended_tech_stack': (list, []),
+    },
+    'solution_section_initial_steps': {
+        'initial_steps': (list, []),
+    },
+    'solution_section_success_metrics': {
+        'success_metrics': (list, []),
+    },
+    'solution_section_risk_mitigation': {
+        'risk_mitigation': (list, []),
+    },
+    'solution_section_ethical_considerations': {
+        'ethical_considerations': (list, []),
+    },
+    'structuring_prompt': {
+        'prompt': (str, REQUIRED),
+        'guidance': (str, ''),
+        'examples': (list, []),
+    },
+    # All five structuring prompts in one call (STRUCTURING_MODE=oneshot), keyed by step category
+    'structuring_prompts': {
+        'organization_context': (dict, REQUIRED),
+        'trying_to_achieve': (dict, REQUIRED),
+        'obstacles_barriers': (dict, REQUIRED),
+        'root_causes': (dict, REQUIRED),
+        'impact_on_mission': (dict, REQUIRED),
+    },
+    'structured_statement': {
+        'structured_problem_statement': (str, REQUIRED),
+        'key_components': (dict, {}),
+        'problem_clarity_score': (str, 'medium'),
+        'readiness_for_analysis': (bool, True),
+    },
+}
+
+# Call types whose object fields are each a document of another call type's schema
+NESTED_SCHEMAS = {
+    'structuring_prompts': 'structuring_prompt',
+}
+
+_CODE_FENCE = re.compile(r'^```[a-zA-Z]*\s*|\s*```$')
+
+
+def _scan(text):
+    """
+    Walk the text outside string literals, stopping after the top-level value
+    closes. Returns the text without trailing commas, the closers needed to
+    balance it, and offsets of commas that separate members (used to drop a
+    truncated last member).
+    """
+    output = []
+    stack = []
+    member_commas = []
+    in_string = False
+    escaped = False
+    for ch in text:
+        if in_string:
+            output.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]':
+            # Drop a trailing comma before the closer
+            while output and output[-1].isspace():
+                output.pop()
+            if output and output[-1] == ',':
+                output.pop()
+                if member_commas and member_commas[-1] == len(output):
+                    member_commas.pop()
+            if stack:
+                stack.pop()
+            if not stack:
+                output.append(ch)
+                break
+        elif ch == ',':
+            member_commas.append(len(output))
+        output.append(ch)
+    closers = ('"' if in_string else '') + ''.join(reversed(stack))
+    return ''.join(output), closers, member_commas
+
+
+def repair_json(text):
+    """
+    Best-effort local repair of common model output defects: code fences or
+    prose around the JSON object, trailing commas, and truncation (unclosed
+    strings, brackets or a dangling final member).
+    """
+    text = _CODE_FENCE.sub('', text.strip())
+    start = text.find('{')
+    if start == -1:
+        raise LLMResponseParseError("No JSON object found in AI response")
+    cleaned, closers, member_commas = _scan(text[start:])
+    attempts = [cleaned + closers]
+    # Truncated output: drop partial trailing members one at a time
+    for offset in reversed(member_commas[-5:]):
+        prefix, prefix_closers, _ = _scan(cleaned[:offset])
+        attempts.append(prefix + prefix_closers)
+
+    for attempt in attempts:
+        try:
+            return json_backend.loads(attempt)
+        except json_backend.JSONDecodeError:
+            continue
+    raise LLMResponseParseError("AI response is not valid JSON and could not be repaired")
+
+
+def _coerce(value, expected):
+    if isinstance(value, expected):
+        if expected is list:
+            return [item if isinstance(item, str) else _stringify(item) for item in value]
+        return value
+    if expected is list:
+        if isinstance(value, str):
+            return [value] if value.strip() else []
+        if isinstance(value, dict):
+            return [_stringify(item) for item in value.values()]
+    if expected is str and isinstance(value, (list, dict)):
+        return _stringify(value)
+    if expected is str and isinstance(value, (int, float)):
+        return str(value)
+    if expected is bool and isinstance(value, str):
+        return value.strip().lower() in ('true', 'yes', '1')
+    raise TypeError(f"expected {expected.__name__}, got {type(value).__name__}")
+
+
+def _stringify(value):
+    if isinstance(value, dict):
+        return ' - '.join(str(v) for v in value.values())
+    if isinstance(value, list):
+        return '; '.join(_stringify(v) for v in value)
+    return str(value)
+
+
+def validate(call_type, data):
+    """
+    Check a parsed document against the call type's schema, coercing
+    near-miss types and filling defaults for missing optional fields
+    """
+    if not isinstance(data, dict):
+        raise LLMResponseParseError("AI response is not a JSON object")
+    schema = RESPONSE_SCHEMAS.get(call_type)
+    if schema is None:
+        return data
+
+    result = dict(data)
+    for field, (expected, default) in schema.items():
+        value = result.get(field)
+        if value is None:
+            if default is REQUIRED:
+                raise LLMResponseParseError(f"AI response is missing required field: {field}")
+            if field not in result:
+                metrics.increment(f'llm.parse_defaults.{call_type}')
+            result[field] = copy.copy(default)
+            continue
+        try:
+            result[field] = _coerce(value, expected)
+        except TypeError as e:
+            if default is REQUIRED:
+                raise LLMResponseParseError(f"AI response field {field} is invalid: {e}")
+            result[field] = copy.copy(default)
+
+    nested = NESTED_SCHEMAS.get(call_type)
+    if nested:
+        for field, (expected, _) in schema.items():
+            if expected is dict:
+                result[field] = validate(nested, result[field])
+
+    if call_type == 'next_question' and not result['completed'] and not result['question']:
+        raise LLMResponseParseError("AI response has neither a question nor a completion signal")
+    if call_type in ('first_questions', 'next_questions'):
+        result['questions'] = [question for question in result['questions'] if question.strip()]
+        if not result['questions'] and not result.get('completed'):
+            raise LLMResponseParseError("AI response has neither questions nor a completion signal")
+    return result
+
+
+def parse_llm_json(call_type, content):
+    """
+    Parse model output for a call type, repairing it locally if needed
+    """
+    try:
+        data = json_backend.loads(content)
+    except json_backend.JSONDecodeError:
+        data = repair_json(content)
+        metrics.increment(f'llm.parse_repairs.{call_type}')
+        logger.info("Repaired malformed JSON response for %s", call_type)
+    return validate(call_type, data)
@@ -0,0 +1,155 @@
+import importlib.util
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import httpx
+from openai import DefaultHttpxClient
+
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Connections each OpenAI-compatible backend may open per worker process
+LLM_HTTP_MAX_CONNECTIONS = int(os.environ.get('LLM_HTTP_MAX_CONNECTIONS', '32'))
+# Idle connections kept open for reuse per backend and worker
+LLM_HTTP_MAX_KEEPALIVE = int(os.environ.get('LLM_HTTP_MAX_KEEPALIVE', '16'))
+# Seconds an idle connection stays open
+LLM_HTTP_KEEPALIVE_EXPIRY_S = float(os.environ.get('LLM_HTTP_KEEPALIVE_EXPIRY_S', '90'))
+# Multiplex requests over HTTP/2 connections; needs the h2 package
+LLM_HTTP2 = os.environ.get('LLM_HTTP2', 'false').lower() in ('1', 'true', 'yes')
+LLM_HTTP_CONNECT_TIMEOUT_S = float(os.environ.get('LLM_HTTP_CONNECT_TIMEOUT_S', '5'))
+# Longest wait for response data when a call has no deadline of its own
+LLM_HTTP_READ_TIMEOUT_S = float(os.environ.get('LLM_HTTP_READ_TIMEOUT_S', '120'))
+# Connections opened with a cheap request when a worker warms up; 0 disables transport warm-up
+LLM_HTTP_WARM_CONNECTIONS = int(os.environ.get('LLM_HTTP_WARM_CONNECTIONS', '1'))
+
+
+def _http2_available():
+    if not LLM_HTTP2:
+        return False
+    if importlib.util.find_spec('h2') is None:
+        logger.warning("LLM_HTTP2 is set but the h2 package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+class PooledTransport:
+    """
+    Tuned httpx connection pool of one backend in one worker process.
+
+    The pool is created lazily in the process that uses it, so a worker
+    forked from a preloaded master never shares sockets with its parent.
+    Every request is traced to count the connections it had to open, which
+    gives the pool's connection reuse ratio.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.http2 = _http2_available()
+        self._lock = threading.Lock()
+        self._client = None
+        self._pid = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.warmed_at = None
+
+    def client(self):
+        """
+        This process's HTTP client, created on first use after start or fork
+        """
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                # A client inherited through fork is dropped without closing
+                # it, since its sockets still belong to the parent
+                self._client = DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+                        keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY_S,
+                    ),
+                    timeout=httpx.Timeout(LLM_HTTP_READ_TIMEOUT_S, connect=LLM_HTTP_CONNECT_TIMEOUT_S),
+                    http2=self.http2,
+                    event_hooks={'request': [self._trace_request]},
+                )
+                self._pid = os.getpid()
+                self._reset_stats()
+            return self._client
+
+    def reset_after_fork(self):
+        # The inherited client is replaced on first use (see client())
+        self._lock = threading.Lock()
+
+    def _trace_request(self, request):
+        with self._lock:
+            self.requests += 1
+        metrics.increment(f'llm.http.requests.{self.name}')
+        request.extensions['trace'] = self._trace
+
+    def _trace(self, event, info):
+        if event == 'connection.connect_tcp.complete':
+            with self._lock:
+                self.new_connections += 1
+            metrics.increment(f'llm.http.new_connections.{self.name}')
+        elif event == 'connection.start_tls.complete':
+            with self._lock:
+                self.tls_handshakes += 1
+        elif event.endswith('.send_request_headers.started'):
+            # The request has its connection now, new or reused
+            with self._lock:
+                reuse_ratio = (self.requests - self.new_connections) / self.requests
+            metrics.set_gauge(f'llm.http.reuse_ratio.{self.name}', round(max(0.0, reuse_ratio), 3))
+
+    def warm(self, url, connections=LLM_HTTP_WARM_CONNECTIONS):
+        """
+        Open connections (TCP, TLS and, with HTTP/2, the session) with
+        concurrent HEAD requests to the API base URL, which need no API key
+        and cost no tokens. Any response, even an error status, leaves the
+        connection pooled for the first real call.
+        """
+        if connections <= 0:
+            return 0
+        client = self.client()
+
+        def head(_):
+            try:
+                client.head(url)
+                return True
+            except httpx.HTTPError as e:
+                logger.warning("Warming connection to %s failed: %s", self.name, e)
+                return False
+
+        with ThreadPoolExecutor(max_workers=connections, thread_name_prefix='llm-http-warmup') as executor:
+            warmed = sum(executor.map(head, range(connections)))
+        with self._lock:
+            self.warmed_at = datetime.now(timezone.utc).isoformat()
+        return warmed
+
+    def open_connections(self):
+        client = self._client
+        if client is None or self._pid != os.getpid():
+            return 0
+        pool = getattr(client._transport, '_pool', None)
+        return len(pool.connections) if pool is not None else None
+
+    def stats(self):
+        with self._lock:
+            requests, new_connections, tls_handshakes = self.requests, self.new_connections, self.tls_handshakes
+            warmed_at = self.warmed_at
+        reused = max(0, requests - new_connections)
+        return {
+            'http2': self.http2,
+            'requests': requests,
+            'new_connections': new_connections,
+            'tls_handshakes': tls_handshakes,
+            'reused_connections': reused,
+            'reuse_ratio': round(reused / requests, 3) if requests else None,
+            'open_connections': self.open_connections(),
+            'warmed_at': warmed_at,
+        }
@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STRONG_MODEL = os.environ.get('LLM_STRONG_MODEL', 'gpt-4o')
+FAST_MODEL = os.environ.get('LLM_FAST_MODEL', 'gpt-4o-mini')
+
+# Candidate models per call type, in order of preference
+DEFAULT_ROUTES = {
+    'analyze_basic': [STRONG_MODEL, FAST_MODEL],
+    'analyze_enhanced': [STRONG_MODEL, FAST_MODEL],
+    'recommend_basic': [STRONG_MODEL, FAST_MODEL],
+    'recommend_enhanced': [STRONG_MODEL, FAST_MODEL],
+    'first_question': [FAST_MODEL, STRONG_MODEL],
+    'next_question': [FAST_MODEL, STRONG_MODEL],
+    'first_questions': [FAST_MODEL, STRONG_MODEL],
+    'next_questions': [FAST_MODEL, STRONG_MODEL],
+    'structuring_prompt': [FAST_MODEL, STRONG_MODEL],
+    'structuring_prompts': [FAST_MODEL, STRONG_MODEL],
+    'structured_statement': [STRONG_MODEL, FAST_MODEL],
+    # Final output quality matters most here, so never downgrade
+    'comprehensive_solution': [STRONG_MODEL],
+    'solution_section_summary': [STRONG_MODEL],
+    'solution_section_tech_stack': [STRONG_MODEL],
+    'solution_section_initial_steps': [STRONG_MODEL],
+    'solution_section_success_metrics': [STRONG_MODEL],
+    'solution_section_risk_mitigation': [STRONG_MODEL],
+    'solution_section_ethical_considerations': [STRONG_MODEL],
+}
+
+# p95 latency objective per call type in milliseconds
+DEFAULT_SLOS_MS = {
+    'analyze_basic': 8000,
+    'analyze_enhanced': 12000,
+    'recommend_basic': 12000,
+    'recommend_enhanced': 20000,
+    'first_question': 4000,
+    'next_question': 4000,
+    'first_questions': 6000,
+    'next_questions': 6000,
+    'structuring_prompt': 4000,
+    'structuring_prompts': 10000,
+    'structured_statement': 10000,
+    'comprehensive_solution': 45000,
+    'solution_section_summary': 15000,
+    'solution_section_tech_stack': 15000,
+    'solution_section_initial_steps': 15000,
+    'solution_section_success_metrics': 15000,
+    'solution_section_risk_mitigation': 15000,
+    'solution_section_ethical_considerations': 15000,
+}
+
+
+def _load_overrides(env_name):
+    raw = os.environ.get(env_name)
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw)
+    except ValueError:
+        logger.error("Ignoring invalid JSON in %s", env_name)
+        return {}
+
+
+class ModelRouter:
+    """
+    Route each call type to a model, skipping models whose observed p95
+    latency for that call type exceeds the SLO.
+
+    A model that is over its SLO is probed again once every `probe_interval`
+    seconds, and samples older than `max_sample_age` seconds are discarded, so
+    a model recovers when the provider speeds up.
+    """
+
+    def __init__(self, routes=None, slos_ms=None, window=50, probe_interval=30.0, min_samples=5,
+                 max_sample_age=300.0):
+        self.routes = {**DEFAULT_ROUTES, **(routes or {})}
+        self.slos_ms = {**DEFAULT_SLOS_MS, **(slos_ms or {})}
+        self.window = window
+        self.probe_interval = probe_interval
+        self.min_samples = min_samples
+        self.max_sample_age = max_sample_age
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._last_attempt = {}
+
+    def p95_ms(self, call_type, model):
+        with self._lock:
+            samples = self._samples.get((call_type, model))
+            if not samples:
+                return None
+            cutoff = time.monotonic() - self.max_sample_age
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+            if len(samples) < self.min_samples:
+                return None
+            ordered = sorted(latency for _, latency in samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def _within_slo(self, call_type, model, now):
+        p95 = self.p95_ms(call_type, model)
+        if p95 is None or p95 <= self.slos_ms.get(call_type, float('inf')):
+            return True
+        with self._lock:
+            key = (call_type, model)
+            if now - self._last_attempt.get(key, 0) < self.probe_interval:
+                return False
+            # Admit a single probe request; concurrent callers keep using the fallback
+            self._last_attempt[key] = now
+            return True
+
+    def candidates(self, call_type):
+        """
+        Models to try for this call type, best first
+        """
+        models = self.routes.get(call_type) or [STRONG_MODEL]
+        now = time.monotonic()
+        healthy = [m for m in models if self._within_slo(call_type, m, now)]
+        slow = sorted((m for m in models if m not in healthy),
+                      key=lambda m: self.p95_ms(call_type, m) or 0)
+        if healthy and healthy[0] != models[0]:
+            metrics.increment(f'llm.route_fallbacks.{call_type}')
+        return healthy + slow
+
+    def record_latency(self, call_type, model, elapsed_ms):
+        key = (call_type, model)
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            now = time.monotonic()
+            samples.append((now, elapsed_ms))
+            self._last_attempt[key] = now
+        metrics.observe(f'llm.latency_ms.{call_type}.{model}', elapsed_ms)
+
+    def record_failure(self, call_type, model):
+        with self._lock:
+            self._last_attempt[(call_type, model)] = time.monotonic()
+        metrics.increment(f'llm.failures.{call_type}.{model}')
+
+
+model_router = ModelRouter(
+    routes=_load_overrides('LLM_MODEL_ROUTES'),
+    slos_ms=_load_overrides('LLM_LATENCY_SLO_MS'),
+)
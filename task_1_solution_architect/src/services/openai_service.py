@@ -1,23 +1,314 @@
-import json
+import contextvars
 import os
 import logging
-from openai import OpenAI
-
-# the newest OpenAI model is "gpt-5" which was released August 7, 2025.
-# do not change this unless explicitly requested by the user
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.services.circuit_breaker import CircuitOpenError, llm_circuit
+from src.services.llm_backends import llm_backends
+from src.services.llm_cache import llm_cache
+from src.services.llm_limiter import llm_limiter
+from src.services.llm_parsing import LLMResponseParseError, parse_llm_json, validate
+from src.services.model_router import model_router
+from src.services.prompt_experiments import prompt_experiments
+from src.utils.deadlines import DeadlineExceeded
+from src.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Full regenerations allowed when a response cannot be repaired locally
+MAX_PARSE_REGENERATIONS = int(os.environ.get("LLM_MAX_PARSE_REGENERATIONS", "1"))
+# Floor for max_tokens when a generation is shortened to fit the remaining deadline
+MIN_DEGRADED_TOKENS = 200
+BRIEF_INSTRUCTION = "Time is limited: keep every field brief and complete the JSON object."
+
+# 'parallel' generates the comprehensive solution as concurrent per-section calls
+COMPREHENSIVE_SOLUTION_MODE = os.environ.get("COMPREHENSIVE_SOLUTION_MODE", "single")
+
+COMPREHENSIVE_GUIDELINES = """You are a senior nonprofit AI strategist. 
+Your task is to design a comprehensive, multi-layered AI-driven solution for nonprofits 
+based on detailed interactive questioning.
+
+Focus ONLY on AI-based technologies and methods, including:
+- Generative AI (LLMs, chatbots, content creation, multilingual translation)
+- Reasoning AI (decision support, automated planning, recommendation systems)
+- AI-powered automation (workflow automation, speech-to-text, OCR, predictive analytics)
+- Responsible AI governance (bias, transparency, compliance, digital equity)
+- Sustainable adoption (low-cost SaaS with NGO discounts, open-source AI frameworks, hybrid models)
+
+Guidelines:
+- Frame ALL recommendations as AI-first solutions (not generic IT).
+- Show how AI specifically addresses the nonprofit’s challenges and constraints.
+- Emphasize low-cost, ethical, and scalable AI options suitable for nonprofits.
+- Always include success metrics that show clear nonprofit impact (time saved, beneficiaries reached, cost reduced).
+- Address ethical considerations explicitly: data privacy, fairness, accessibility, digital inclusion, and cultural sensitivity."""
+
+# (call type, max_tokens, instructions) for each section in parallel mode
+SOLUTION_SECTIONS = [
+    ('solution_section_summary', 700, """Write only the strategic summaries. Respond with JSON in this format:
+{
+    "analysis_summary": "Deep analysis of root causes and strategic context (3-4 sentences)",
+    "solution_summary": "Comprehensive strategic overview of the AI driven solution with implementation phases (3-4 sentences)"
+}"""),
+    ('solution_section_tech_stack', 600, """List only the recommended AI tools and platforms. Respond with JSON in this format:
+{"recommended_tech_stack": ["Tool 1 - Strategic rationale", "Tool 2 - Integration approach", ...]}"""),
+    ('solution_section_initial_steps', 600, """List only the phased implementation steps. Respond with JSON in this format:
+{"initial_steps": ["Phase 1 action with timeline", "Phase 2 action with dependencies", ...]}"""),
+    ('solution_section_success_metrics', 500, """List only the success metrics showing nonprofit impact. Respond with JSON in this format:
+{"success_metrics": ["Metric 1 - measurement approach", "Metric 2 - timeline", ...]}"""),
+    ('solution_section_risk_mitigation', 500, """List only the key risks and how to mitigate them. Respond with JSON in this format:
+{"risk_mitigation": ["Risk 1 - mitigation strategy", "Risk 2 - contingency plan", ...]}"""),
+    ('solution_section_ethical_considerations', 600, """List only the ethical considerations. Cover data privacy and confidentiality (donor, client, volunteer information), digital accessibility, vendor social responsibility, transparency in technology decisions, equitable access, responsible use of AI and automation, environmental impact, and cultural sensitivity. Respond with JSON in this format:
+{"ethical_considerations": ["Data privacy and donor confidentiality measures", "Accessibility and digital equity concerns", ...]}"""),
+]
+
+# Prompt variants of the enhanced recommendation call, as (system prompt, user
+# prompt template); see PROMPT_EXPERIMENTS
+RECOMMEND_ENHANCED_PROMPTS = {
+    'control': ("""You are a senior nonprofit technology strategist with expertise in designing comprehensive, sustainable technology solutions. You excel at creating multi-phased implementation strategies that balance organizational readiness with transformational impact.
+
+Your task is to design a complete technology strategy that addresses both immediate needs and long-term organizational transformation. Consider the unique constraints and opportunities within nonprofit environments.
+
+Key principles for your recommendations:
+1. Phased implementation approach (quick wins + strategic transformation)
+2. Integration with existing organizational systems and workflows
+3. Sustainability planning (maintenance, scaling, funding)
+4. Change management and adoption strategy
+5. Measurement framework and success metrics
+6. Risk mitigation and contingency planning
+7. Stakeholder alignment and governance
+
+Technology architecture considerations:
+- Data flow optimization and integration complexity
+- Security, compliance, and privacy requirements
+- Scalability and performance requirements
+- Vendor ecosystem and long-term partnerships
+- Technical debt management and modernization path
+- Disaster recovery and business continuity
+
+Respond with JSON in exactly this format:
+{
+    "solution_summary": "Comprehensive strategic overview including implementation phases, key benefits, and transformation approach (3-4 sentences)",
+    "recommended_tech_stack": ["Tool 1 - Strategic rationale and role in solution", "Tool 2 - Integration approach and benefits", ...],
+    "initial_steps": ["Phase 1 action with timeline and stakeholder requirements", "Phase 2 action with dependencies and success criteria", ...]
+}
+
+Ensure recommendations are:
+- Practical and achievable given nonprofit constraints
+- Strategic in approach with clear ROI and impact metrics  
+- Sustainable with realistic resource requirements
+- Scalable to grow with organizational needs""", """Design a comprehensive technology strategy for this nonprofit challenge:
+
+Problem ID: {problem_id}
+Core Challenge: {description}
+Strategic Context: {clarifying_questions}
+
+Create a sophisticated, multi-layered technology solution that addresses immediate operational needs while building toward long-term organizational transformation. Consider stakeholder complexity, resource constraints, change management requirements, and sustainability factors unique to nonprofit environments."""),
+    'concise': ("""You are a senior nonprofit technology strategist. Design a phased technology strategy: quick wins first, then long-term transformation. It must fit nonprofit budgets and capacity, integrate with existing systems, and cover sustainability, change management, security and compliance, and success metrics.
+
+Respond with JSON in exactly this format:
+{
+    "solution_summary": "Strategic overview with implementation phases and key benefits (3-4 sentences)",
+    "recommended_tech_stack": ["Tool - rationale and role in the solution", ...],
+    "initial_steps": ["Phase action with timeline and success criteria", ...]
+}""", """Design a technology strategy for this nonprofit challenge:
+
+Problem ID: {problem_id}
+Core Challenge: {description}
+Strategic Context: {clarifying_questions}"""),
+}
+
+# Prompt variants of the single-call comprehensive solution, as (system prompt,
+# user prompt template); see PROMPT_EXPERIMENTS
+COMPREHENSIVE_SOLUTION_PROMPTS = {
+    'control': (COMPREHENSIVE_GUIDELINES + """
+
+Respond with JSON in this format:
+{
+    "analysis_summary": "Deep analysis of root causes and strategic context (3-4 sentences)",
+    "solution_summary": "Comprehensive strategic overview of the AI driven solution with implementation phases (3-4 sentences)",
+    "recommended_tech_stack": ["Tool 1 - Strategic rationale", "Tool 2 - Integration approach", ...],
+    "initial_steps": ["Phase 1 action with timeline", "Phase 2 action with dependencies", ...],
+    "success_metrics": ["Metric 1 - measurement approach", "Metric 2 - timeline", ...],
+    "risk_mitigation": ["Risk 1 - mitigation strategy", "Risk 2 - contingency plan", ...],
+    "ethical_considerations": ["Data privacy and donor confidentiality measures", "Accessibility and digital equity concerns", "Vendor ethics and social responsibility", "Transparency and accountability in technology choices", ...]
+}
+
+Ensure recommendations are practical, strategic, sustainable, scalable, and ethically responsible. Address key nonprofit ethical concerns including data privacy, accessibility, funding transparency, and equitable access to services.""", """Design a comprehensive technology strategy based on this detailed context:
+
+Original Problem: {problem_statement}
+
+Detailed Context from Interactive Questioning:
+{qa_context}
+
+Create a sophisticated, AI driven solution addressing immediate needs and long-term transformation. Consider all constraints and opportunities revealed through questioning.
+
+Pay special attention to ethical considerations relevant to nonprofit operations:
+- Data privacy and confidentiality (donor, client, volunteer information)
+- Digital accessibility for diverse populations
+- Vendor selection based on social responsibility
+- Transparency in technology decision-making
+- Equitable access to digital services
+- Responsible use of AI and automation
+- Environmental impact of technology choices
+- Cultural sensitivity and community representation"""),
+    'concise': ("""You are a senior nonprofit AI strategist. Design an AI-first solution using generative AI, decision support, automation and responsible AI governance. It must fit nonprofit budgets, prefer low-cost or open-source options, and show measurable impact.
+
+Respond with JSON in this format:
+{
+    "analysis_summary": "Root causes and strategic context (3-4 sentences)",
+    "solution_summary": "AI driven solution with implementation phases (3-4 sentences)",
+    "recommended_tech_stack": ["Tool - rationale", ...],
+    "initial_steps": ["Phase action with timeline", ...],
+    "success_metrics": ["Metric - measurement approach", ...],
+    "risk_mitigation": ["Risk - mitigation", ...],
+    "ethical_considerations": ["Consideration and measure", ...]
+}""", """Original Problem: {problem_statement}
+
+Detailed Context from Interactive Questioning:
+{qa_context}
+
+Cover data privacy, accessibility, vendor responsibility, transparency, equitable access, responsible AI use, environmental impact and cultural sensitivity in ethical_considerations."""),
+}
+
+# Categories of the five problem structuring steps, in order
+STRUCTURING_CATEGORIES = ('organization_context', 'trying_to_achieve', 'obstacles_barriers', 'root_causes', 'impact_on_mission')
+
+# (call type, max_tokens, generation parameters) of the analysis calls, by analysis mode
+ANALYSIS_CALLS = {
+    'basic': ('analyze_basic', 1000, {'temperature': 0.3}),
+    'enhanced': ('analyze_enhanced', 2000, {'temperature': 0.3}),
+}
+# Call types answered from the response cache: the analyses the warm-up seeds.
+# Conversational calls (interactive, structuring) always reach the model.
+CACHED_CALL_TYPES = frozenset(call_type for call_type, _, _ in ANALYSIS_CALLS.values())
+
 class OpenAIService:
     @staticmethod
-    def analyze_problem_basic(problem_statement):
+    def _chat_json(call_type, messages, max_tokens, deadline=None, **params):
         """
-        Basic analysis using GPT-5 for nonprofit problem statements
+        Run a JSON-mode completion and return the schema-validated result.
+        Malformed output is repaired locally; regeneration is the last resort.
+        Results shortened to fit the deadline are marked with degraded=True.
+        Only calls of CACHED_CALL_TYPES (the analysis calls) are answered from
+        the response cache, and only their full results are stored in it.
+        """
+        cache_key = None
+        if call_type in CACHED_CALL_TYPES:
+            cache_key = llm_cache.key(call_type, messages, max_tokens, params)
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        attempt = 0
+        while True:
+            content, degraded, call = OpenAIService._chat_completion(
+                call_type, messages, max_tokens, deadline=deadline, **params
+            )
+            try:
+                result = parse_llm_json(call_type, content)
+                prompt_experiments.record(call_type, call, degraded=degraded)
+                if degraded:
+                    result['degraded'] = True
+                elif cache_key is not None:
+                    llm_cache.put(cache_key, result)
+                return result
+            except LLMResponseParseError as e:
+                prompt_experiments.record(call_type, call, degraded=degraded, parse_failed=True)
+                if attempt >= MAX_PARSE_REGENERATIONS:
+                    metrics.increment(f'llm.parse_failures.{call_type}')
+                    raise
+                attempt += 1
+                metrics.increment(f'llm.regenerations.{call_type}')
+                logger.warning("Regenerating %s response after parse failure: %s", call_type, e)
+
+    @staticmethod
+    def _chat_completion(call_type, messages, max_tokens, deadline=None, **params):
         """
+        Run a JSON-mode chat completion on the model routed for this call type.
+        Falls back to the next candidate model if a call fails. Each attempt
+        goes to a backend chosen by weight and health, and may be hedged
+        (see llm_backends).
+
+        With a deadline, each attempt is bounded by the remaining budget, and when
+        the model's observed p95 exceeds it the generation is shortened (lower
+        max_tokens plus a brevity instruction). Returns (content, degraded, call)
+        where call holds the model, backend, latency and token usage.
+
+        Calls are short-circuited with CircuitOpenError while the LLM circuit
+        is open, i.e. after repeated calls where every candidate model failed.
+        Running out of time does not count as a failure.
+        Each call waits for a slot in the per-tenant fair queue first.
+        """
+        if not llm_circuit.allow():
+            metrics.increment('llm.circuit_rejections')
+            raise CircuitOpenError("AI service is temporarily unavailable, please try again shortly")
         try:
-            system_prompt = """You are an experienced nonprofit technology consultant specializing in identifying core operational challenges. Analyze problem statements and provide practical insights.
+            with llm_limiter.slot(deadline):
+                last_error = None
+                for model in model_router.candidates(call_type):
+                    call_messages, call_max_tokens, degraded = messages, max_tokens, False
+                    if deadline is not None:
+                        remaining = deadline.check()
+                        params['timeout'] = remaining
+                        expected_ms = model_router.p95_ms(call_type, model)
+                        if expected_ms and expected_ms > remaining * 1000:
+                            call_max_tokens = max(MIN_DEGRADED_TOKENS, int(max_tokens * remaining * 1000 / expected_ms))
+                            call_messages = messages + [{"role": "system", "content": BRIEF_INSTRUCTION}]
+                            degraded = True
+                            metrics.increment(f'llm.degraded.{call_type}')
+                    started = time.perf_counter()
+                    try:
+                        completion = llm_backends.complete(call_type, model, call_messages, call_max_tokens, **params)
+                        # An answer without content is a failed attempt like any other
+                        content = completion['content']
+                        if content is None:
+                            raise Exception("No response choices from AI model")
+                        if not content or content.strip() == "":
+                            raise Exception("Empty response from AI model - please try again")
+                    except Exception as e:
+                        model_router.record_failure(call_type, model)
+                        logger.warning("Model %s failed for %s: %s", model, call_type, e)
+                        last_error = e
+                        continue
+                    latency_ms = (time.perf_counter() - started) * 1000
+                    model_router.record_latency(call_type, model, latency_ms)
+                    llm_circuit.record_success()
+
+                    call = {
+                        'model': model,
+                        'backend': completion['backend'],
+                        'latency_ms': latency_ms,
+                        'prompt_tokens': completion['prompt_tokens'],
+                        'completion_tokens': completion['completion_tokens'],
+                    }
+                    for kind in ('prompt_tokens', 'completion_tokens'):
+                        if call[kind] is not None:
+                            metrics.observe(f'llm.{kind}.{call_type}', call[kind])
+                    return content, degraded, call
+                llm_circuit.record_failure()
+                raise last_error
+        except DeadlineExceeded:
+            # Out of time before the model answered, which says nothing about
+            # its health; a half-open probe must not hold the circuit shut
+            llm_circuit.release_probe()
+            raise
+
+    @staticmethod
+    def seed_analysis(problem_statement, analysis_mode, result):
+        """
+        Cache a known analysis of a statement (e.g. a stored one) as the
+        model's answer to the /analyze call for it
+        """
+        call_type, max_tokens, params = ANALYSIS_CALLS[analysis_mode]
+        if analysis_mode == 'enhanced':
+            messages = OpenAIService._enhanced_analysis_messages(problem_statement)
+        else:
+            messages = OpenAIService._basic_analysis_messages(problem_statement)
+        llm_cache.put(llm_cache.key(call_type, messages, max_tokens, params), result)
+
+    @staticmethod
+    def _basic_analysis_messages(problem_statement):
+        system_prompt = """You are an experienced nonprofit technology consultant specializing in identifying core operational challenges. Analyze problem statements and provide practical insights.
 
 Respond with JSON in this exact format:
 {
@@ -29,7 +320,7 @@ IMPORTANT: Use empty array [] for clarifying_questions if the problem statement
 
 Focus on practical, implementation-ready insights. Keep clarifying questions minimal and targeted."""
 
-            user_prompt = f"""Analyze this nonprofit problem statement:
+        user_prompt = f"""Analyze this nonprofit problem statement:
 
 "{problem_statement}"
 
@@ -38,43 +329,41 @@ Provide a concise analysis focusing on:
 2. Key technical gaps that need addressing
 3. Essential clarifying questions (only if critical information is missing)"""
 
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=1000,
-                temperature=0.3
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    @staticmethod
+    def analyze_problem_basic(problem_statement, deadline=None):
+        """
+        Basic analysis using GPT-5 for nonprofit problem statements
+        """
+        try:
+            call_type, max_tokens, params = ANALYSIS_CALLS['basic']
+            result = OpenAIService._chat_json(
+                call_type,
+                OpenAIService._basic_analysis_messages(problem_statement),
+                max_tokens=max_tokens,
+                deadline=deadline,
+                **params
             )
             
-            if not response.choices or len(response.choices) == 0:
-                raise Exception("No response choices from AI model")
-            
-            content = response.choices[0].message.content
-            if not content or content.strip() == "":
-                logger.error(f"Empty content in response: {response}")
-                raise Exception("Empty response content from AI model")
-            
-            result = json.loads(content)
-            logger.info(f"Basic analysis completed successfully")
+            logger.info("Basic analysis completed successfully")
             return result
             
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in basic analysis: {e}")
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in basic analysis: %s", e)
             raise Exception("Failed to parse AI response")
         except Exception as e:
-            logger.error(f"OpenAI API error in basic analysis: {e}")
+            logger.error("OpenAI API error in basic analysis: %s", e)
             raise Exception(f"AI analysis failed: {str(e)}")
 
     @staticmethod
-    def analyze_problem_enhanced(problem_statement, organization_name=None, geographic_location=None):
-        """
-        Enhanced analysis using GPT-5 with advanced strategic reasoning for nonprofit contexts
-        """
-        try:
-            system_prompt = """You are an expert nonprofit technology consultant with deep strategic expertise. Analyze problem statements using advanced reasoning to identify root causes and critical information gaps.
+    def _enhanced_analysis_messages(problem_statement, organization_name=None, geographic_location=None):
+        system_prompt = """You are an expert nonprofit technology consultant with deep strategic expertise. Analyze problem statements using advanced reasoning to identify root causes and critical information gaps.
 
 Your analysis should focus on:
 1. Root causes and systemic issues (not just symptoms)
@@ -103,14 +392,14 @@ Respond with JSON in this exact format:
 
 Rules: Maximum 7 strategic questions. Focus on critical unknowns that dramatically impact solution architecture."""
 
-            # Build context-aware user prompt
-            context_info = ""
-            if organization_name:
-                context_info += f"Organization: {organization_name}\n"
-            if geographic_location:
-                context_info += f"Location: {geographic_location}\n"
-            
-            user_prompt = f"""Analyze this nonprofit problem statement:
+        # Build context-aware user prompt
+        context_info = ""
+        if organization_name:
+            context_info += f"Organization: {organization_name}\n"
+        if geographic_location:
+            context_info += f"Location: {geographic_location}\n"
+
+        user_prompt = f"""Analyze this nonprofit problem statement:
 
 {context_info}
 Problem: "{problem_statement}"
@@ -119,34 +408,40 @@ Focus on root causes, systemic issues, and strategic questions needed for optima
 
 {"When generating clarifying questions, incorporate the organization's location and context to make questions more specific and actionable." if context_info else ""}"""
 
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=2000,
-                temperature=0.3
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    @staticmethod
+    def analyze_problem_enhanced(problem_statement, organization_name=None, geographic_location=None, deadline=None):
+        """
+        Enhanced analysis using GPT-5 with advanced strategic reasoning for nonprofit contexts
+        """
+        try:
+            call_type, max_tokens, params = ANALYSIS_CALLS['enhanced']
+            result = OpenAIService._chat_json(
+                call_type,
+                OpenAIService._enhanced_analysis_messages(problem_statement, organization_name, geographic_location),
+                max_tokens=max_tokens,
+                deadline=deadline,
+                **params
             )
             
-            content = response.choices[0].message.content
-            if not content or content.strip() == "":
-                raise Exception("Empty response from AI model - please try again")
-            
-            result = json.loads(content)
-            logger.info(f"Enhanced analysis completed successfully")
+            logger.info("Enhanced analysis completed successfully")
             return result
             
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in enhanced analysis: {e}")
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in enhanced analysis: %s", e)
             raise Exception("Failed to parse AI response")
         except Exception as e:
-            logger.error(f"OpenAI API error in enhanced analysis: {e}")
+            logger.error("OpenAI API error in enhanced analysis: %s", e)
             raise Exception(f"AI analysis failed: {str(e)}")
 
     @staticmethod
-    def generate_recommendations_basic(problem_id, description, clarifying_questions):
+    def generate_recommendations_basic(problem_id, description, clarifying_questions, deadline=None):
         """
         Generate basic technical recommendations
         """
@@ -173,111 +468,68 @@ Focus on:
 - Quick implementation wins
 - Proven nonprofit technology stacks"""
 
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
+            result = OpenAIService._chat_json(
+                'recommend_basic',
+                [
                     {"role": "system", "content": "You are a practical nonprofit technology consultant. Respond only with valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
-                response_format={"type": "json_object"},
-                max_tokens=1200
+                max_tokens=1200,
+                deadline=deadline
             )
             
-            content = response.choices[0].message.content
-            if not content or content.strip() == "":
-                raise Exception("Empty response from AI model - please try again")
-            
-            result = json.loads(content)
-            logger.info(f"Basic recommendations generated successfully for {problem_id}")
+            logger.info("Basic recommendations generated successfully for %s", problem_id)
             return result
             
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in basic recommendations: {e}")
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in basic recommendations: %s", e)
             raise Exception("Failed to parse AI response")
         except Exception as e:
-            logger.error(f"OpenAI API error in basic recommendations: {e}")
+            logger.error("OpenAI API error in basic recommendations: %s", e)
             raise Exception(f"AI recommendation generation failed: {str(e)}")
 
     @staticmethod
-    def generate_recommendations_enhanced(problem_id, description, clarifying_questions):
+    def generate_recommendations_enhanced(problem_id, description, clarifying_questions, deadline=None):
         """
         Generate comprehensive technology strategy with advanced strategic reasoning
         """
         try:
-            system_prompt = """You are a senior nonprofit technology strategist with expertise in designing comprehensive, sustainable technology solutions. You excel at creating multi-phased implementation strategies that balance organizational readiness with transformational impact.
-
-Your task is to design a complete technology strategy that addresses both immediate needs and long-term organizational transformation. Consider the unique constraints and opportunities within nonprofit environments.
-
-Key principles for your recommendations:
-1. Phased implementation approach (quick wins + strategic transformation)
-2. Integration with existing organizational systems and workflows
-3. Sustainability planning (maintenance, scaling, funding)
-4. Change management and adoption strategy
-5. Measurement framework and success metrics
-6. Risk mitigation and contingency planning
-7. Stakeholder alignment and governance
-
-Technology architecture considerations:
-- Data flow optimization and integration complexity
-- Security, compliance, and privacy requirements
-- Scalability and performance requirements
-- Vendor ecosystem and long-term partnerships
-- Technical debt management and modernization path
-- Disaster recovery and business continuity
-
-Respond with JSON in exactly this format:
-{
-    "solution_summary": "Comprehensive strategic overview including implementation phases, key benefits, and transformation approach (3-4 sentences)",
-    "recommended_tech_stack": ["Tool 1 - Strategic rationale and role in solution", "Tool 2 - Integration approach and benefits", ...],
-    "initial_steps": ["Phase 1 action with timeline and stakeholder requirements", "Phase 2 action with dependencies and success criteria", ...]
-}
-
-Ensure recommendations are:
-- Practical and achievable given nonprofit constraints
-- Strategic in approach with clear ROI and impact metrics  
-- Sustainable with realistic resource requirements
-- Scalable to grow with organizational needs"""
-
-            user_prompt = f"""Design a comprehensive technology strategy for this nonprofit challenge:
-
-Problem ID: {problem_id}
-Core Challenge: {description}
-Strategic Context: {clarifying_questions}
-
-Create a sophisticated, multi-layered technology solution that addresses immediate operational needs while building toward long-term organizational transformation. Consider stakeholder complexity, resource constraints, change management requirements, and sustainability factors unique to nonprofit environments."""
-
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=2500
-            )
-            
-            content = response.choices[0].message.content
-            if not content or content.strip() == "":
-                raise Exception("Empty response from AI model - please try again")
+            with prompt_experiments.arm('recommend_enhanced_prompt', problem_id, RECOMMEND_ENHANCED_PROMPTS) as prompt:
+                system_prompt, user_template = prompt
+                user_prompt = user_template.format(
+                    problem_id=problem_id, description=description, clarifying_questions=clarifying_questions
+                )
+                result = OpenAIService._chat_json(
+                    'recommend_enhanced',
+                    [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    max_tokens=2500,
+                    deadline=deadline
+                )
             
-            result = json.loads(content)
-            logger.info(f"Enhanced recommendations generated successfully for {problem_id}")
+            logger.info("Enhanced recommendations generated successfully for %s", problem_id)
             return result
             
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in enhanced recommendations: {e}")
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in enhanced recommendations: %s", e)
             raise Exception("Failed to parse AI response")
         except Exception as e:
-            logger.error(f"OpenAI API error in enhanced recommendations: {e}")
+            logger.error("OpenAI API error in enhanced recommendations: %s", e)
             raise Exception(f"AI recommendation generation failed: {str(e)}")
 
     @staticmethod
-    def generate_first_strategic_question(problem_statement, organization_name=None, geographic_location=None, structured_statement=None):
+    def _first_question_messages(problem_statement, organization_name=None, geographic_location=None, structured_statement=None, count=1):
         """
-        Generate the first strategic question for interactive questioning
+        Prompt for the opening turn of interactive questioning; with count > 1
+        the model asks that many questions at once, most important first
         """
-        try:
-            system_prompt = """You are an expert nonprofit technology consultant with 15+ years of experience in digital transformation for mission-driven organizations. You excel at strategic questioning that uncovers root causes and critical success factors.
+        system_prompt = """You are an expert nonprofit technology consultant with 15+ years of experience in digital transformation for mission-driven organizations. You excel at strategic questioning that uncovers root causes and critical success factors.
 
 Your approach:
 - Ask penetrating questions that reveal systemic issues, not just surface symptoms
@@ -300,7 +552,9 @@ Your questioning strategy:
 4. Understand their organizational readiness for change
 5. Identify success metrics that align with their mission
 
-Respond with JSON in this format:
+"""
+        if count == 1:
+            system_prompt += """Respond with JSON in this format:
 {
     "question": "Your specific, strategic first question",
     "reasoning": "Why this question reveals the most critical information gap",
@@ -308,17 +562,30 @@ Respond with JSON in this format:
 }
 
 Rules: Ask ONE penetrating question that gets to the heart of their challenge."""
+            ask = "the first strategic question"
+            closing = "This should be the most important question to ask first to understand their challenge deeply."
+        else:
+            system_prompt += """Respond with JSON in this format:
+{
+    "questions": ["Your most critical first question", "The next most important question", ...],
+    "reasoning": "Why these questions reveal the most critical information gaps",
+    "confidence_level": "low"
+}
 
-            # Build comprehensive context-aware user prompt
-            context_info = ""
-            if organization_name:
-                context_info += f"Organization: {organization_name}\n"
-            if geographic_location:
-                context_info += f"Location: {geographic_location}\n"
-            
-            structured_info = ""
-            if structured_statement:
-                structured_info = f"""\n\nStructured Problem Statement:
+""" + f"Rules: Ask exactly {count} distinct, penetrating questions, most important first. They are answered together, so none may depend on the answer to another."
+            ask = f"the first {count} strategic questions"
+            closing = "These should be the most important questions to ask first to understand their challenge deeply, in order of priority."
+
+        # Build comprehensive context-aware user prompt
+        context_info = ""
+        if organization_name:
+            context_info += f"Organization: {organization_name}\n"
+        if geographic_location:
+            context_info += f"Location: {geographic_location}\n"
+
+        structured_info = ""
+        if structured_statement:
+            structured_info = f"""\n\nStructured Problem Statement:
 - We are: {structured_statement['we_are']}
 - We are trying to: {structured_statement['we_are_trying_to']}
 - But: {structured_statement['but']}
@@ -326,56 +593,36 @@ Rules: Ask ONE penetrating question that gets to the heart of their challenge.""
 - Which makes us feel: {structured_statement['which_makes_us_feel']}
 
 Use this structured insight to ask a more targeted question that builds on their self-awareness and digs deeper into the root causes or constraints they've identified."""
-            
-            user_prompt = f"""Conduct strategic questioning for this nonprofit:
+
+        user_prompt = f"""Conduct strategic questioning for this nonprofit:
 
 {context_info}Problem Statement: "{problem_statement}"{structured_info}
 
-Generate the first strategic question that:
+Generate {ask} that:
 1. Addresses the most critical information gap for solution design
 2. Builds on their existing awareness (if structured statement provided)
 3. Incorporates their organizational and geographic context
 4. Gets to root causes, not surface symptoms
 5. Considers nonprofit-specific constraints and mission alignment
 
-This should be the most important question to ask first to understand their challenge deeply."""
-
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=800
-            )
-            
-            content = response.choices[0].message.content
-            if not content or content.strip() == "":
-                raise Exception("Empty response from AI model")
-            
-            result = json.loads(content)
-            logger.info("First strategic question generated successfully")
-            return result
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in first question: {e}")
-            raise Exception("Failed to parse AI response")
-        except Exception as e:
-            logger.error(f"OpenAI API error in first question: {e}")
-            raise Exception(f"AI first question generation failed: {str(e)}")
+{closing}"""
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
 
     @staticmethod
-    def generate_next_strategic_question(problem_statement, previous_answers):
+    def _next_question_messages(problem_statement, previous_answers, count=1):
         """
-        Generate the next strategic question based on previous answers
+        Prompt for a follow-up turn; with count > 1 the model asks up to that
+        many questions at once, most important first
         """
-        try:
-            qa_context = "\n".join([
-                f"Q{i+1}: {qa['question']}\nA{i+1}: {qa['answer']}"
-                for i, qa in enumerate(previous_answers)
-            ])
+        qa_context = "\n".join([
+            f"Q{i+1}: {qa['question']}\nA{i+1}: {qa['answer']}"
+            for i, qa in enumerate(previous_answers)
+        ])
 
+        if count == 1:
             system_prompt = """You are continuing an intelligent questioning session with a nonprofit. Based on their previous answers, determine if you need more information or have enough to provide comprehensive recommendations.
 
 If you need more information, ask the next most strategic question that builds on previous answers.
@@ -388,47 +635,150 @@ Respond with JSON in this format:
     "confidence_level": "low/medium/high",
     "completed": true/false
 }"""
+            limit = ""
+        else:
+            system_prompt = f"""You are continuing an intelligent questioning session with a nonprofit. Based on their previous answers, determine if you need more information or have enough to provide comprehensive recommendations.
+
+If you need more information, ask up to {count} strategic questions that build on previous answers, most important first. They are answered together, so none may depend on the answer to another.
+If you're confident you have enough information, respond with completion signal.
+""" + """
+Respond with JSON in this format:
+{
+    "questions": ["Your most important next question", ...] OR [] if done,
+    "reasoning": "Why these questions are needed" OR "Why you have sufficient information",
+    "confidence_level": "low/medium/high",
+    "completed": true/false
+}"""
+            limit = f"\nQuestions allowed this turn: {count}"
 
-            user_prompt = f"""Continue the questioning session:
+        user_prompt = f"""Continue the questioning session:
 
 Original Problem: {problem_statement}
 
 Previous Questions and Answers:
 {qa_context}
 
-Current question count: {len(previous_answers)} of 7 maximum
+Current question count: {len(previous_answers)} of 7 maximum{limit}
 
 Should you ask another question or do you have sufficient information for comprehensive recommendations?"""
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
 
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=800
+    @staticmethod
+    def generate_first_strategic_question(problem_statement, organization_name=None, geographic_location=None, structured_statement=None, deadline=None):
+        """
+        Generate the first strategic question for interactive questioning
+        """
+        try:
+            result = OpenAIService._chat_json(
+                'first_question',
+                OpenAIService._first_question_messages(
+                    problem_statement, organization_name, geographic_location, structured_statement
+                ),
+                max_tokens=800,
+                deadline=deadline
+            )
+            
+            logger.info("First strategic question generated successfully")
+            return result
+            
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in first question: %s", e)
+            raise Exception("Failed to parse AI response")
+        except Exception as e:
+            logger.error("OpenAI API error in first question: %s", e)
+            raise Exception(f"AI first question generation failed: {str(e)}")
+
+    @staticmethod
+    def generate_first_strategic_questions(problem_statement, count, organization_name=None, geographic_location=None, structured_statement=None, deadline=None):
+        """
+        Generate a prioritized set of `count` opening questions, answered together in one turn
+        """
+        try:
+            result = OpenAIService._chat_json(
+                'first_questions',
+                OpenAIService._first_question_messages(
+                    problem_statement, organization_name, geographic_location, structured_statement, count
+                ),
+                max_tokens=800 + 200 * count,
+                deadline=deadline
             )
+            result['questions'] = result['questions'][:count]
+            
+            logger.info("First %d strategic questions generated successfully", len(result['questions']))
+            return result
             
-            content = response.choices[0].message.content
-            if not content or content.strip() == "":
-                raise Exception("Empty response from AI model")
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in first questions: %s", e)
+            raise Exception("Failed to parse AI response")
+        except Exception as e:
+            logger.error("OpenAI API error in first questions: %s", e)
+            raise Exception(f"AI first question generation failed: {str(e)}")
+
+    @staticmethod
+    def generate_next_strategic_question(problem_statement, previous_answers, deadline=None):
+        """
+        Generate the next strategic question based on previous answers
+        """
+        try:
+            result = OpenAIService._chat_json(
+                'next_question',
+                OpenAIService._next_question_messages(problem_statement, previous_answers),
+                max_tokens=800,
+                deadline=deadline
+            )
             
-            result = json.loads(content)
             logger.info("Next strategic question generated successfully")
             return result
             
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in next question: {e}")
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in next question: %s", e)
             raise Exception("Failed to parse AI response")
         except Exception as e:
-            logger.error(f"OpenAI API error in next question: {e}")
+            logger.error("OpenAI API error in next question: %s", e)
             raise Exception(f"AI next question generation failed: {str(e)}")
 
     @staticmethod
-    def generate_comprehensive_solution(problem_statement, answers):
+    def generate_next_strategic_questions(problem_statement, previous_answers, count, deadline=None):
         """
-        Generate comprehensive solution based on all interactive questioning answers
+        Generate up to `count` follow-up questions from all answers so far,
+        or a completion signal once the combined answers are sufficient
+        """
+        try:
+            result = OpenAIService._chat_json(
+                'next_questions',
+                OpenAIService._next_question_messages(problem_statement, previous_answers, count),
+                max_tokens=800 + 200 * count,
+                deadline=deadline
+            )
+            result['questions'] = result['questions'][:count]
+            
+            logger.info("Next %d strategic questions generated successfully", len(result['questions']))
+            return result
+            
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in next questions: %s", e)
+            raise Exception("Failed to parse AI response")
+        except Exception as e:
+            logger.error("OpenAI API error in next questions: %s", e)
+            raise Exception(f"AI next question generation failed: {str(e)}")
+
+    @staticmethod
+    def generate_comprehensive_solution(problem_statement, answers, deadline=None, parallel=None):
+        """
+        Generate comprehensive solution based on all interactive questioning answers.
+        In parallel mode (COMPREHENSIVE_SOLUTION_MODE=parallel) the sections are
+        generated concurrently and merged into the same schema.
         """
         try:
             qa_context = "\n".join([
@@ -436,83 +786,86 @@ Should you ask another question or do you have sufficient information for compre
                 for i, qa in enumerate(answers)
             ])
 
-            system_prompt = """You are a senior nonprofit AI strategist. 
-Your task is to design a comprehensive, multi-layered AI-driven solution for nonprofits 
-based on detailed interactive questioning.
-
-Focus ONLY on AI-based technologies and methods, including:
-- Generative AI (LLMs, chatbots, content creation, multilingual translation)
-- Reasoning AI (decision support, automated planning, recommendation systems)
-- AI-powered automation (workflow automation, speech-to-text, OCR, predictive analytics)
-- Responsible AI governance (bias, transparency, compliance, digital equity)
-- Sustainable adoption (low-cost SaaS with NGO discounts, open-source AI frameworks, hybrid models)
-
-Guidelines:
-- Frame ALL recommendations as AI-first solutions (not generic IT).
-- Show how AI specifically addresses the nonprofit’s challenges and constraints.
-- Emphasize low-cost, ethical, and scalable AI options suitable for nonprofits.
-- Always include success metrics that show clear nonprofit impact (time saved, beneficiaries reached, cost reduced).
-- Address ethical considerations explicitly: data privacy, fairness, accessibility, digital inclusion, and cultural sensitivity.
-
-Respond with JSON in this format:
-{
-    "analysis_summary": "Deep analysis of root causes and strategic context (3-4 sentences)",
-    "solution_summary": "Comprehensive strategic overview of the AI driven solution with implementation phases (3-4 sentences)",
-    "recommended_tech_stack": ["Tool 1 - Strategic rationale", "Tool 2 - Integration approach", ...],
-    "initial_steps": ["Phase 1 action with timeline", "Phase 2 action with dependencies", ...],
-    "success_metrics": ["Metric 1 - measurement approach", "Metric 2 - timeline", ...],
-    "risk_mitigation": ["Risk 1 - mitigation strategy", "Risk 2 - contingency plan", ...],
-    "ethical_considerations": ["Data privacy and donor confidentiality measures", "Accessibility and digital equity concerns", "Vendor ethics and social responsibility", "Transparency and accountability in technology choices", ...]
-}
-
-Ensure recommendations are practical, strategic, sustainable, scalable, and ethically responsible. Address key nonprofit ethical concerns including data privacy, accessibility, funding transparency, and equitable access to services."""
-
-            user_prompt = f"""Design a comprehensive technology strategy based on this detailed context:
-
-Original Problem: {problem_statement}
-
-Detailed Context from Interactive Questioning:
-{qa_context}
-
-Create a sophisticated, AI driven solution addressing immediate needs and long-term transformation. Consider all constraints and opportunities revealed through questioning.
-
-Pay special attention to ethical considerations relevant to nonprofit operations:
-- Data privacy and confidentiality (donor, client, volunteer information)
-- Digital accessibility for diverse populations
-- Vendor selection based on social responsibility
-- Transparency in technology decision-making
-- Equitable access to digital services
-- Responsible use of AI and automation
-- Environmental impact of technology choices
-- Cultural sensitivity and community representation"""
-
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=3000
-            )
+            if parallel is None:
+                parallel = COMPREHENSIVE_SOLUTION_MODE == 'parallel'
+            if parallel:
+                result = OpenAIService._generate_solution_sections(problem_statement, qa_context, deadline=deadline)
+                logger.info("Comprehensive solution generated successfully from %d sections", len(SOLUTION_SECTIONS))
+                return result
+
+            with prompt_experiments.arm('comprehensive_solution_prompt', problem_statement,
+                                        COMPREHENSIVE_SOLUTION_PROMPTS) as prompt:
+                system_prompt, user_template = prompt
+                user_prompt = user_template.format(problem_statement=problem_statement, qa_context=qa_context)
+                result = OpenAIService._chat_json(
+                    'comprehensive_solution',
+                    [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    max_tokens=3000,
+                    deadline=deadline
+                )
             
-            content = response.choices[0].message.content
-            if not content or content.strip() == "":
-                raise Exception("Empty response from AI model")
-            
-            result = json.loads(content)
             logger.info("Comprehensive solution generated successfully")
             return result
             
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in comprehensive solution: {e}")
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in comprehensive solution: %s", e)
             raise Exception("Failed to parse AI response")
         except Exception as e:
-            logger.error(f"OpenAI API error in comprehensive solution: {e}")
+            logger.error("OpenAI API error in comprehensive solution: %s", e)
             raise Exception(f"AI comprehensive solution generation failed: {str(e)}")
 
     @staticmethod
-    def generate_structuring_prompt(initial_challenge, step, previous_responses=None):
+    def _generate_solution_sections(problem_statement, qa_context, deadline=None):
+        """
+        Generate each section of the comprehensive solution in its own concurrent
+        call. All calls share one compact context, so latency tracks the slowest
+        section rather than the total output. A failed optional section is left
+        empty and the result marked degraded; the summary section is required.
+        """
+        context = [
+            {"role": "system", "content": COMPREHENSIVE_GUIDELINES},
+            {"role": "user", "content": f"""Original Problem: {problem_statement}
+
+Detailed Context from Interactive Questioning:
+{qa_context}"""},
+        ]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(SOLUTION_SECTIONS), thread_name_prefix='solution-section') as executor:
+            futures = [
+                (call_type, executor.submit(
+                    contextvars.copy_context().run, OpenAIService._chat_json, call_type,
+                    context + [{"role": "user", "content": instructions}], max_tokens, deadline=deadline
+                ))
+                for call_type, max_tokens, instructions in SOLUTION_SECTIONS
+            ]
+
+        merged, degraded = {}, False
+        for call_type, future in futures:
+            try:
+                section = future.result()
+            except Exception as e:
+                if call_type == 'solution_section_summary':
+                    raise
+                metrics.increment(f'llm.section_failures.{call_type}')
+                logger.warning("Leaving %s empty after failure: %s", call_type, e)
+                degraded = True
+                continue
+            degraded = section.pop('degraded', False) or degraded
+            merged.update(section)
+        metrics.observe('llm.comprehensive_solution.parallel_ms', (time.perf_counter() - started) * 1000)
+
+        result = validate('comprehensive_solution', merged)
+        if degraded:
+            result['degraded'] = True
+        return result
+
+    @staticmethod
+    def generate_structuring_prompt(initial_challenge, step, previous_responses=None, deadline=None):
         """
         Generate structured prompts for problem statement development
         """
@@ -623,34 +976,88 @@ Respond with JSON:
             
             prompt_config = prompts[step]
             
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
+            result = OpenAIService._chat_json(
+                'structuring_prompt',
+                [
                     {"role": "system", "content": prompt_config['system_prompt']},
                     {"role": "user", "content": prompt_config['user_prompt']}
                 ],
-                response_format={"type": "json_object"},
-                max_tokens=800
+                max_tokens=800,
+                deadline=deadline
             )
             
-            content = response.choices[0].message.content
-            if not content or content.strip() == "":
-                raise Exception("Empty response from AI model")
-            
-            result = json.loads(content)
             result['category'] = prompt_config['category']
-            logger.info(f"Structuring prompt generated for step {step}")
+            logger.info("Structuring prompt generated for step %s", step)
             return result
             
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in structuring prompt: {e}")
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in structuring prompt: %s", e)
             raise Exception("Failed to parse AI response")
         except Exception as e:
-            logger.error(f"OpenAI API error in structuring prompt: {e}")
+            logger.error("OpenAI API error in structuring prompt: %s", e)
             raise Exception(f"AI structuring prompt generation failed: {str(e)}")
 
     @staticmethod
-    def generate_structured_problem_statement(initial_challenge, components):
+    def generate_all_structuring_prompts(initial_challenge, deadline=None):
+        """
+        Generate the prompts of all five structuring steps in one call, from
+        the initial challenge alone (STRUCTURING_MODE=oneshot). Returns the
+        prompt documents keyed by step category.
+        """
+        try:
+            system_prompt = """You are an expert nonprofit consultant helping organizations articulate their challenges clearly. You guide them through five steps that build a structured problem statement: organizational context, what they are trying to achieve, obstacles and barriers, root causes, and impact on mission.
+
+Prepare the prompts for all five steps at once. Each later step should build on the earlier ones, anticipating what the organization is likely to say given their initial challenge."""
+
+            user_prompt = f"""The nonprofit mentioned this initial challenge: "{initial_challenge}"
+
+Create one prompt per step, each with guidance and two example answers:
+1. organization_context: organization type, size and primary mission; who they serve and how; current operational context (answerable in 2-3 sentences)
+2. trying_to_achieve: specific goals and outcomes; who would benefit and how; success metrics they envision
+3. obstacles_barriers: concrete barriers preventing goal achievement; system/process breakdowns; resource or capacity constraints
+4. root_causes: why these obstacles exist; systemic or structural issues; underlying resource, process, or capacity gaps
+5. impact_on_mission: how the challenges affect their mission; impact on beneficiaries or community; consequences of not addressing them
+
+Respond with JSON:
+{{
+    "organization_context": {{"prompt": "Your specific question", "guidance": "What a good answer includes", "examples": ["Example answer 1", "Example answer 2"]}},
+    "trying_to_achieve": {{"prompt": "...", "guidance": "...", "examples": ["...", "..."]}},
+    "obstacles_barriers": {{"prompt": "...", "guidance": "...", "examples": ["...", "..."]}},
+    "root_causes": {{"prompt": "...", "guidance": "...", "examples": ["...", "..."]}},
+    "impact_on_mission": {{"prompt": "...", "guidance": "...", "examples": ["...", "..."]}}
+}}"""
+
+            result = OpenAIService._chat_json(
+                'structuring_prompts',
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                max_tokens=2000,
+                deadline=deadline
+            )
+            
+            prompts = {category: result[category] for category in STRUCTURING_CATEGORIES}
+            for category, prompt in prompts.items():
+                prompt['category'] = category
+                if result.get('degraded'):
+                    prompt['degraded'] = True
+            logger.info("All structuring prompts generated in one call")
+            return prompts
+            
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in structuring prompts: %s", e)
+            raise Exception("Failed to parse AI response")
+        except Exception as e:
+            logger.error("OpenAI API error in structuring prompts: %s", e)
+            raise Exception(f"AI structuring prompt generation failed: {str(e)}")
+
+    @staticmethod
+    def generate_structured_problem_statement(initial_challenge, components, deadline=None):
         """
         Generate final structured problem statement from all components
         """
@@ -688,27 +1095,24 @@ Structured Components:
 
 Synthesize these into a coherent, actionable problem statement that enables strategic technology analysis and recommendations."""
 
-            response = openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
+            result = OpenAIService._chat_json(
+                'structured_statement',
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
-                response_format={"type": "json_object"},
-                max_tokens=1500
+                max_tokens=1500,
+                deadline=deadline
             )
             
-            content = response.choices[0].message.content
-            if not content or content.strip() == "":
-                raise Exception("Empty response from AI model")
-            
-            result = json.loads(content)
             logger.info("Structured problem statement generated successfully")
             return result
             
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in structured problem statement: {e}")
+        except (DeadlineExceeded, CircuitOpenError):
+            raise
+        except LLMResponseParseError as e:
+            logger.error("JSON decode error in structured problem statement: %s", e)
             raise Exception("Failed to parse AI response")
         except Exception as e:
-            logger.error(f"OpenAI API error in structured problem statement: {e}")
+            logger.error("OpenAI API error in structured problem statement: %s", e)
             raise Exception(f"AI structured problem statement generation failed: {str(e)}")
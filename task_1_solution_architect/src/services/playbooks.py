@@ -0,0 +1,272 @@
+import glob
+import logging
+import math
+import os
+import re
+from collections import defaultdict
+
+from src.utils import json_backend
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PLAYBOOK_DIR = os.environ.get(
+    'PLAYBOOK_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'demo_cases')
+)
+# Matches at or above this confidence skip the LLM entirely; 0 disables the fast path
+PLAYBOOK_FAST_PATH_THRESHOLD = float(os.environ.get('PLAYBOOK_FAST_PATH_THRESHOLD', '0'))
+# Minimum confidence for answering from a playbook while the LLM circuit is open
+PLAYBOOK_FALLBACK_THRESHOLD = float(os.environ.get('PLAYBOOK_FALLBACK_THRESHOLD', '0.35'))
+
+# Sector name and extra match phrases for playbooks seeded from demo cases, by file name
+PLAYBOOK_SECTORS = {
+    'food_bank_inventory': (
+        'Food bank inventory management',
+        ['food bank', 'inventory', 'inventory tracking', 'perishable', 'expiration', 'food waste',
+         'stock', 'warehouse', 'donated food', 'spreadsheet'],
+    ),
+    'demo_food_pantry': (
+        'Food pantry volunteer scheduling and distribution',
+        ['food pantry', 'volunteer scheduling', 'scheduling conflicts', 'shift', 'missed shifts',
+         'distribution site', 'volunteer coordination', 'families served'],
+    ),
+    'animal_shelter_management': (
+        'Animal shelter adoptions and volunteer coordination',
+        ['animal shelter', 'adoption', 'adoption tracking', 'foster', 'pet', 'rescue', 'animal',
+         'volunteer coordination', 'follow ups'],
+    ),
+    'community_center_interactive': (
+        'Donor communication and volunteer management',
+        ['donor', 'donor communication', 'donor retention', 'donor management', 'thank you letter',
+         'fundraising', 'volunteer management', 'community center'],
+    ),
+}
+
+STOPWORDS = frozenset("""
+a about across after all also am an and any are as at be because been being but by can could
+do does doing for from get gets getting had has have having help helps how i in into is it its
+just lack lot lots make makes many more most much need needs not of on or our ours out over
+really so some struggle struggles struggling than that the their them then there these they
+this those through to too up us very want was we were what when where which while who will
+with without would yet you your organization organisation nonprofit non profit better improve
+currently use using manage managing trouble problem problems issue issues hard difficult cannot
+keep run running
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token):
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def extract_terms(text):
+    """
+    Index terms for a text: significant words (lightly stemmed) plus adjacent word pairs
+    """
+    words = [_stem(t) for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+    terms = set(words)
+    terms.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    return terms
+
+
+def _find(document, keys):
+    """
+    Depth-first search of a demo case for the first object holding all `keys`
+    """
+    if isinstance(document, dict):
+        if all(key in document for key in keys):
+            return document
+        values = document.values()
+    elif isinstance(document, list):
+        values = document
+    else:
+        return None
+    for value in values:
+        found = _find(value, keys)
+        if found is not None:
+            return found
+    return None
+
+
+def _playbook_from_case(case_id, document):
+    request = _find(document, ('problem_statement',))
+    recommendation = _find(document, ('recommended_tech_stack',))
+    if request is None or recommendation is None:
+        return None
+    analysis = _find(document, ('description', 'clarifying_questions'))
+    if analysis is not None:
+        description = analysis['description']
+        questions = analysis['clarifying_questions']
+    else:
+        # Interactive cases have no analysis step; describe the structured statement instead
+        structured = request.get('structured_problem_statement') or {}
+        if not structured:
+            return None
+        description = (f"The organization is trying to {structured.get('we_are_trying_to', '')}, "
+                       f"but {structured.get('but', '')} because {structured.get('because', '')}.")
+        first_question = _find(document, ('question',))
+        questions = [first_question['question']] if first_question else []
+
+    sector, phrases = PLAYBOOK_SECTORS.get(case_id, (case_id.replace('_', ' ').capitalize(), []))
+    return {
+        'playbook_id': case_id,
+        'sector': sector,
+        'problem_statement': request['problem_statement'],
+        'description': description,
+        'clarifying_questions': list(questions),
+        'solution_summary': recommendation.get('solution_summary', ''),
+        'recommended_tech_stack': list(recommendation['recommended_tech_stack']),
+        'initial_steps': list(recommendation.get('initial_steps', [])),
+        'phrases': phrases,
+    }
+
+
+def load_demo_playbooks(directory=PLAYBOOK_DIR):
+    """
+    Build playbooks from the demo cases that contain a problem statement
+    """
+    playbooks = []
+    for path in sorted(glob.glob(os.path.join(directory, '**', '*.json'), recursive=True)):
+        case_id = os.path.splitext(os.path.basename(path))[0]
+        try:
+            with open(path, encoding='utf-8') as f:
+                document = json_backend.loads(f.read())
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping demo case %s: %s", path, e)
+            continue
+        playbook = _playbook_from_case(case_id, document)
+        if playbook and playbook['description']:
+            playbooks.append(playbook)
+    return playbooks
+
+
+def load_demo_analyses(directory=PLAYBOOK_DIR):
+    """
+    (problem_statement, analysis_mode, analysis) for each demo case that
+    shows an /analyze request and its response
+    """
+    analyses = []
+    for path in sorted(glob.glob(os.path.join(directory, '**', '*.json'), recursive=True)):
+        try:
+            with open(path, encoding='utf-8') as f:
+                document = json_backend.loads(f.read())
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping demo case %s: %s", path, e)
+            continue
+        step = _find(document, ('endpoint', 'request'))
+        analysis = _find(document, ('description', 'clarifying_questions'))
+        if step is None or step['endpoint'] != '/analyze' or analysis is None:
+            continue
+        request = step['request']
+        analyses.append((
+            request['problem_statement'],
+            request.get('analysis_mode', 'basic'),
+            {'description': analysis['description'], 'clarifying_questions': list(analysis['clarifying_questions'])},
+        ))
+    return analyses
+
+
+class PlaybookEngine:
+    """
+    Offline rules-based matcher from problem statements to sector playbooks.
+
+    Each playbook is indexed by the terms of its seed statement, description
+    and curated phrases. The confidence of a match is the share of the
+    statement's IDF-weighted terms that the playbook covers, so a statement
+    made mostly of words the playbook knows scores close to 1.
+    """
+
+    def __init__(self, playbooks):
+        self.reload(playbooks)
+
+    @property
+    def playbooks(self):
+        return self._state[0]
+
+    def reload(self, playbooks):
+        """
+        Rebuild the index for a new set of playbooks. The new index replaces
+        the old one in a single assignment, so concurrent matches see either.
+        """
+        index = defaultdict(set)
+        for position, playbook in enumerate(playbooks):
+            text = ' '.join([playbook['problem_statement'], playbook['description'], *playbook['phrases']])
+            for term in extract_terms(text):
+                index[term].add(position)
+        count = len(playbooks)
+        idf = {term: 1.0 + math.log((count + 1) / (len(postings) + 1)) for term, postings in index.items()}
+        # Words no playbook knows count fully against every playbook
+        unknown_weight = 1.0 + math.log(count + 1)
+        self._state = (playbooks, dict(index), idf, unknown_weight)
+
+    def match(self, text):
+        """
+        Best playbook for the text as (playbook, confidence), or (None, 0.0)
+        """
+        playbooks, index, idf, unknown_weight = self._state
+        terms = extract_terms(text or '')
+        if not terms or not playbooks:
+            return None, 0.0
+        scores = defaultdict(float)
+        total = 0.0
+        for term in terms:
+            postings = index.get(term)
+            if postings is None:
+                # Unknown words count against every playbook; unknown word
+                # pairs do not, as their words are already counted
+                if ' ' not in term:
+                    total += unknown_weight
+                continue
+            # Known word pairs are more specific than single words
+            weight = idf[term] * (1.5 if ' ' in term else 1.0)
+            total += weight
+            for position in postings:
+                scores[position] += weight
+        if not scores:
+            return None, 0.0
+        position, score = max(scores.items(), key=lambda item: item[1])
+        return playbooks[position], score / total
+
+    def analysis(self, text, threshold):
+        """
+        Analysis result (description and clarifying questions) from the best
+        matching playbook, or None below the confidence threshold
+        """
+        playbook, confidence = self.match(text)
+        if playbook is None or confidence < threshold:
+            metrics.increment('playbooks.misses')
+            return None
+        metrics.increment(f'playbooks.hits.{playbook["playbook_id"]}')
+        return {
+            'description': playbook['description'],
+            'clarifying_questions': list(playbook['clarifying_questions']),
+            'playbook_id': playbook['playbook_id'],
+            'confidence': round(confidence, 3),
+        }
+
+    def recommendation(self, text, threshold):
+        """
+        Recommendation result (summary, tech stack and steps) from the best
+        matching playbook, or None below the confidence threshold
+        """
+        playbook, confidence = self.match(text)
+        if playbook is None or confidence < threshold:
+            metrics.increment('playbooks.misses')
+            return None
+        metrics.increment(f'playbooks.hits.{playbook["playbook_id"]}')
+        return {
+            'solution_summary': playbook['solution_summary'],
+            'recommended_tech_stack': list(playbook['recommended_tech_stack']),
+            'initial_steps': list(playbook['initial_steps']),
+            'playbook_id': playbook['playbook_id'],
+            'confidence': round(confidence, 3),
+        }
+
+
+playbook_engine = PlaybookEngine(load_demo_playbooks())
@@ -1,26 +1,66 @@
-import uuid
-import json
+import contextvars
 import logging
-from src.services.openai_service import OpenAIService
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.services.llm_limiter import current_priority
+from src.services.openai_service import STRUCTURING_CATEGORIES, OpenAIService
+from src.utils.deadlines import DeadlineExceeded
+from src.utils.ids import new_id
+from src.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# 'oneshot' generates the prompts of all five steps in one call at start instead of one call per step
+STRUCTURING_MODE = os.environ.get('STRUCTURING_MODE', 'stepwise')
+# In oneshot mode, regenerate later step prompts in the background from the answers received so far
+STRUCTURING_REFINE = os.environ.get('STRUCTURING_REFINE', 'false').lower() in ('1', 'true', 'yes')
+# Threads per worker refining oneshot prompts
+STRUCTURING_REFINE_WORKERS = int(os.environ.get('STRUCTURING_REFINE_WORKERS', '2'))
+
+_refine_executor = None
+_refine_lock = threading.Lock()
+
+
+def _refine_pool():
+    global _refine_executor
+    with _refine_lock:
+        if _refine_executor is None:
+            _refine_executor = ThreadPoolExecutor(max_workers=STRUCTURING_REFINE_WORKERS,
+                                                  thread_name_prefix='structuring-refine')
+        return _refine_executor
+
+
+def _reset_refine_pool():
+    # Executor threads do not survive fork
+    global _refine_executor, _refine_lock
+    _refine_executor = None
+    _refine_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_refine_pool)
+
+
 class ProblemStructuringService:
     # Store structuring sessions in memory (in production, use database)
     structuring_sessions = {}
     
     @classmethod
-    def start_structuring(cls, initial_challenge):
+    def start_structuring(cls, initial_challenge, mode=None, deadline=None):
         """
-        Start guided problem statement structuring for nonprofits
+        Start guided problem statement structuring for nonprofits. In oneshot
+        mode the prompts of all steps are generated now and cached on the
+        session, so later steps need no model call.
         """
         try:
             # Generate unique structuring ID
-            structuring_id = f"PS{str(uuid.uuid4().hex[:8]).upper()}"
+            structuring_id = new_id("PS")
             
             # Initialize structuring session
             cls.structuring_sessions[structuring_id] = {
                 'initial_challenge': initial_challenge,
+                'mode': mode or STRUCTURING_MODE,
                 'current_step': 1,
                 'responses': {},
                 'template_components': {
@@ -31,12 +71,25 @@ class ProblemStructuringService:
                     'impact_on_mission': None
                 }
             }
+            session = cls.structuring_sessions[structuring_id]
             
-            # Generate first structuring prompt
-            first_prompt = OpenAIService.generate_structuring_prompt(initial_challenge, step=1)
+            # Generate first structuring prompt (or all of them)
+            first_prompt = None
+            if session['mode'] == 'oneshot':
+                try:
+                    prompts = OpenAIService.generate_all_structuring_prompts(initial_challenge, deadline=deadline)
+                    session['prompts'] = prompts
+                    first_prompt = prompts[STRUCTURING_CATEGORIES[0]]
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    logger.warning("One-shot structuring prompts failed, generating step by step: %s", e)
+                    session['mode'] = 'stepwise'
+            if first_prompt is None:
+                first_prompt = OpenAIService.generate_structuring_prompt(initial_challenge, step=1, deadline=deadline)
             
             # Store first prompt
-            cls.structuring_sessions[structuring_id]['current_prompt'] = first_prompt
+            session['current_prompt'] = first_prompt
             
             return {
                 'structuring_id': structuring_id,
@@ -48,12 +101,15 @@ class ProblemStructuringService:
                 'examples': first_prompt.get('examples', [])
             }
             
+        except DeadlineExceeded:
+            cls.structuring_sessions.pop(structuring_id, None)
+            raise
         except Exception as e:
-            logger.error(f"Error starting problem structuring: {str(e)}")
+            logger.error("Error starting problem structuring: %s", e)
             raise Exception(f"Failed to start problem structuring: {str(e)}")
     
     @classmethod
-    def continue_structuring(cls, structuring_id, response):
+    def continue_structuring(cls, structuring_id, response, deadline=None):
         """
         Continue the structured problem statement development
         """
@@ -65,8 +121,7 @@ class ProblemStructuringService:
             
             # Store the response for current step
             step = session['current_step']
-            step_categories = ['organization_context', 'trying_to_achieve', 'obstacles_barriers', 'root_causes', 'impact_on_mission']
-            current_category = step_categories[step - 1]
+            current_category = STRUCTURING_CATEGORIES[step - 1]
             
             session['responses'][current_category] = response
             session['template_components'][current_category] = response
@@ -82,14 +137,28 @@ class ProblemStructuringService:
             # Move to next step
             session['current_step'] = step + 1
             next_step = step + 1
-            next_category = step_categories[next_step - 1]
-            
-            # Generate next prompt based on previous responses
-            next_prompt = OpenAIService.generate_structuring_prompt(
-                session['initial_challenge'], 
-                step=next_step,
-                previous_responses=session['responses']
-            )
+            next_category = STRUCTURING_CATEGORIES[next_step - 1]
+            
+            if session.get('mode') == 'oneshot':
+                # Answer from the cached prompts, refined ones where ready
+                next_prompt = session['prompts'][next_category]
+                metrics.increment('structuring.refined_prompts_served' if next_prompt.get('refined')
+                                  else 'structuring.cached_prompts_served')
+                if STRUCTURING_REFINE and next_step < len(STRUCTURING_CATEGORIES):
+                    cls._refine_later(session, next_step + 1)
+            else:
+                # Generate next prompt based on previous responses
+                try:
+                    next_prompt = OpenAIService.generate_structuring_prompt(
+                        session['initial_challenge'], 
+                        step=next_step,
+                        previous_responses=session['responses'],
+                        deadline=deadline
+                    )
+                except DeadlineExceeded:
+                    # Let the client retry the same step
+                    session['current_step'] = step
+                    raise
             
             session['current_prompt'] = next_prompt
             
@@ -103,12 +172,39 @@ class ProblemStructuringService:
                 'completed': False
             }
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            logger.error(f"Error continuing structuring: {str(e)}")
+            logger.error("Error continuing structuring: %s", e)
             raise Exception(f"Failed to continue structuring: {str(e)}")
     
+    @staticmethod
+    def _refine_later(session, step):
+        """
+        Regenerate a cached prompt in the background from the answers so far,
+        replacing it on the session if it is ready before the step is reached
+        """
+        responses = dict(session['responses'])
+        
+        def refine():
+            current_priority.set('bulk')
+            try:
+                prompt = OpenAIService.generate_structuring_prompt(
+                    session['initial_challenge'], step=step, previous_responses=responses
+                )
+            except Exception as e:
+                metrics.increment('structuring.refinement_failures')
+                logger.warning("Refining structuring prompt for step %s failed: %s", step, e)
+                return
+            if session['current_step'] < step and not prompt.get('degraded'):
+                prompt['refined'] = True
+                session['prompts'][STRUCTURING_CATEGORIES[step - 1]] = prompt
+                metrics.increment('structuring.refinements')
+        
+        _refine_pool().submit(contextvars.copy_context().run, refine)
+    
     @classmethod
-    def complete_structuring(cls, structuring_id):
+    def complete_structuring(cls, structuring_id, deadline=None):
         """
         Generate final structured problem statement from all components
         """
@@ -121,12 +217,15 @@ class ProblemStructuringService:
             # Generate structured problem statement
             structured_statement = OpenAIService.generate_structured_problem_statement(
                 session['initial_challenge'],
-                session['template_components']
+                session['template_components'],
+                deadline=deadline
             )
             
-            logger.info(f"Structured problem statement generated for {structuring_id}")
+            logger.info("Structured problem statement generated for %s", structuring_id)
             return structured_statement
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            logger.error(f"Error completing structuring: {str(e)}")
+            logger.error("Error completing structuring: %s", e)
             raise Exception(f"Failed to complete structuring: {str(e)}")
@@ -0,0 +1,256 @@
+import contextvars
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from sqlalchemy import insert, select
+
+from src.models import PromptObservation, db
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds between writes of buffered observations to the database
+PROMPT_EXPERIMENT_FLUSH_S = float(os.environ.get('PROMPT_EXPERIMENT_FLUSH_S', '5'))
+CONTROL = 'control'
+
+# (experiment, variant) that LLM calls made in this context are observed for
+current_arm = contextvars.ContextVar('prompt_experiment_arm', default=None)
+
+
+def _load_experiments():
+    """
+    Running experiments from PROMPT_EXPERIMENTS, a JSON object of variant
+    weights per experiment, e.g. {"recommend_enhanced_prompt": {"control": 50, "concise": 50}}.
+    Experiments not listed always use their control prompt.
+    """
+    raw = os.environ.get('PROMPT_EXPERIMENTS')
+    if not raw:
+        return {}
+    try:
+        experiments = {}
+        for experiment, weights in json.loads(raw).items():
+            arms = [(variant, float(weight)) for variant, weight in weights.items() if float(weight) > 0]
+            if arms:
+                experiments[experiment] = arms
+        return experiments
+    except (ValueError, AttributeError, TypeError):
+        logger.error("Ignoring invalid JSON in PROMPT_EXPERIMENTS")
+        return {}
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _mean(values):
+    values = [value for value in values if value is not None]
+    return sum(values) / len(values) if values else None
+
+
+def _change(value, baseline):
+    if value is None or not baseline:
+        return None
+    return round((value - baseline) / baseline * 100, 1)
+
+
+class PromptExperiments:
+    """
+    A/B experiments between prompt variants of an LLM call.
+
+    Each assignment unit (e.g. a problem ID) is hashed into one variant of a
+    running experiment, so repeated requests for it see the same prompt.
+    Every LLM call made under a variant is recorded with its latency, token
+    usage and whether the response failed to parse. Observations are
+    buffered and written to the database in the background, so the report
+    covers all worker processes.
+    """
+
+    def __init__(self, experiments=None, flush_interval=PROMPT_EXPERIMENT_FLUSH_S):
+        self.experiments = _load_experiments() if experiments is None else experiments
+        self.flush_interval = flush_interval
+        self._app = None
+        self._lock = threading.Lock()
+        self._pending = []
+        self._stopping = threading.Event()
+        self._warned = set()
+
+    def init_app(self, app):
+        """
+        Start the background writer while any experiment is running, and
+        restart it in forked worker processes (threads do not survive fork)
+        """
+        self._app = app
+        if not self.experiments:
+            return
+        self.start()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    def start(self):
+        self._stopping.clear()
+        threading.Thread(target=self._flush_loop, name='prompt-experiments', daemon=True).start()
+
+    def _restart_after_fork(self):
+        self._lock = threading.Lock()
+        self._pending = []
+        self._stopping = threading.Event()
+        self.start()
+
+    def _flush_loop(self):
+        while not self._stopping.wait(self.flush_interval):
+            try:
+                with self._app.app_context():
+                    self.flush()
+            except Exception as e:
+                logger.error("Writing prompt experiment observations failed: %s", e)
+
+    def variant(self, experiment, unit):
+        """
+        Variant of an experiment for an assignment unit; always the same for
+        the same unit, and 'control' while the experiment is not running
+        """
+        arms = self.experiments.get(experiment)
+        if not arms:
+            return CONTROL
+        digest = hashlib.sha256(f"{experiment}:{unit}".encode('utf-8')).digest()
+        point = int.from_bytes(digest[:8], 'big') / 2 ** 64 * sum(weight for _, weight in arms)
+        for variant, weight in arms:
+            point -= weight
+            if point < 0:
+                return variant
+        return arms[-1][0]
+
+    @contextmanager
+    def arm(self, experiment, unit, variants):
+        """
+        Pick the variant for `unit` from `variants` (variant name to prompt)
+        and observe the LLM calls made in the block for it; yields the prompt
+        """
+        variant = self.variant(experiment, unit)
+        if variant not in variants:
+            if (experiment, variant) not in self._warned:
+                self._warned.add((experiment, variant))
+                logger.warning("Unknown variant %s of prompt experiment %s, using control", variant, experiment)
+            variant = CONTROL
+        token = current_arm.set((experiment, variant) if experiment in self.experiments else None)
+        try:
+            yield variants[variant]
+        finally:
+            current_arm.reset(token)
+
+    def record(self, call_type, call, degraded=False, parse_failed=False):
+        """
+        Observe one completed LLM call for the variant of the current context
+        """
+        arm = current_arm.get()
+        if arm is None:
+            return
+        experiment, variant = arm
+        metrics.increment(f'prompt_experiments.{experiment}.{variant}.calls')
+        if parse_failed:
+            metrics.increment(f'prompt_experiments.{experiment}.{variant}.parse_failures')
+        with self._lock:
+            self._pending.append({
+                'experiment': experiment,
+                'variant': variant,
+                'call_type': call_type,
+                'model': call.get('model'),
+                'latency_ms': call['latency_ms'],
+                'prompt_tokens': call.get('prompt_tokens'),
+                'completion_tokens': call.get('completion_tokens'),
+                'parse_failed': parse_failed,
+                'degraded': degraded,
+            })
+
+    def flush(self):
+        """
+        Write buffered observations on a connection of their own, so a
+        request's open transaction is never committed along with them
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(insert(PromptObservation), pending)
+        except Exception:
+            with self._lock:
+                self._pending[:0] = pending
+            raise
+        return len(pending)
+
+    def report(self, experiment=None, since=None):
+        """
+        Per-variant comparison of recorded calls: latency percentiles, mean
+        token usage and parse failure rate, with each variant's change
+        relative to control
+        """
+        self.flush()
+        query = select(
+            PromptObservation.experiment, PromptObservation.variant, PromptObservation.latency_ms,
+            PromptObservation.prompt_tokens, PromptObservation.completion_tokens,
+            PromptObservation.parse_failed, PromptObservation.degraded,
+        )
+        if experiment:
+            query = query.where(PromptObservation.experiment == experiment)
+        if since:
+            query = query.where(PromptObservation.created_at >= since)
+        grouped = defaultdict(lambda: defaultdict(list))
+        for row in db.session.execute(query):
+            grouped[row.experiment][row.variant].append(row)
+
+        report = {}
+        for name, variants in sorted(grouped.items()):
+            summaries = {variant: self._summarize(rows) for variant, rows in sorted(variants.items())}
+            baseline = summaries.get(CONTROL)
+            comparison = {}
+            if baseline:
+                for variant, summary in summaries.items():
+                    if variant == CONTROL:
+                        continue
+                    comparison[variant] = {
+                        'latency_p50_change_pct': _change(summary['latency_ms']['p50'], baseline['latency_ms']['p50']),
+                        'latency_p95_change_pct': _change(summary['latency_ms']['p95'], baseline['latency_ms']['p95']),
+                        'prompt_tokens_change_pct': _change(summary['prompt_tokens'], baseline['prompt_tokens']),
+                        'completion_tokens_change_pct': _change(summary['completion_tokens'], baseline['completion_tokens']),
+                        'parse_failure_rate_change': round(
+                            summary['parse_failure_rate'] - baseline['parse_failure_rate'], 4
+                        ),
+                    }
+            report[name] = {
+                'running': name in self.experiments,
+                'variants': summaries,
+                'vs_control': comparison,
+            }
+        return report
+
+    @staticmethod
+    def _summarize(rows):
+        latencies = sorted(row.latency_ms for row in rows)
+        prompt_tokens = _mean(row.prompt_tokens for row in rows)
+        completion_tokens = _mean(row.completion_tokens for row in rows)
+        return {
+            'calls': len(rows),
+            'latency_ms': {
+                'mean': round(_mean(latencies), 1),
+                'p50': round(_percentile(latencies, 0.5), 1),
+                'p95': round(_percentile(latencies, 0.95), 1),
+            },
+            'prompt_tokens': round(prompt_tokens, 1) if prompt_tokens is not None else None,
+            'completion_tokens': round(completion_tokens, 1) if completion_tokens is not None else None,
+            'parse_failures': sum(1 for row in rows if row.parse_failed),
+            'parse_failure_rate': round(sum(1 for row in rows if row.parse_failed) / len(rows), 4),
+            'degraded_rate': round(sum(1 for row in rows if row.degraded) / len(rows), 4),
+        }
+
+
+prompt_experiments = PromptExperiments()
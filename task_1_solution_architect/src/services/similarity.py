@@ -0,0 +1,188 @@
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from array import array
+from functools import lru_cache
+
+from sqlalchemy import select
+
+from src.models import ProblemAnalysis, db
+from src.services.playbooks import extract_terms
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Estimated Jaccard similarity a stored statement needs to be reported as a match
+SIMILARITY_MIN_JACCARD = float(os.environ.get('SIMILARITY_MIN_JACCARD', '0.5'))
+# At or above this similarity /analyze returns the earlier analysis instead of
+# calling the model; 0 disables reuse
+SIMILARITY_REUSE_THRESHOLD = float(os.environ.get('SIMILARITY_REUSE_THRESHOLD', '0'))
+# Most recent statements kept in each process' index
+SIMILARITY_MAX_ENTRIES = int(os.environ.get('SIMILARITY_MAX_ENTRIES', '50000'))
+# How often a background thread picks up statements analyzed by other worker
+# processes; 0 disables the refresh
+SIMILARITY_REFRESH_S = float(os.environ.get('SIMILARITY_REFRESH_S', '5'))
+SIMILARITY_MAX_MATCHES = 3
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+# Fixed seed so signatures are comparable across processes and restarts
+_rng = random.Random(20240917)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+
+@lru_cache(maxsize=65536)
+def _term_hash(term):
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def minhash(text):
+    """
+    MinHash signature of a statement's index terms (significant words and
+    word pairs), or None if it has no terms
+    """
+    hashes = [_term_hash(term) for term in extract_terms(text or '')]
+    if not hashes:
+        return None
+    return array('I', (min(((a * h + b) % _PRIME) & _MASK for h in hashes) for a, b in _PERMUTATIONS))
+
+
+def _band_keys(signature):
+    return [hash((band, tuple(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])))
+            for band in range(BANDS)]
+
+
+def estimated_jaccard(first, second):
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERMUTATIONS
+
+
+class SimilarityIndex:
+    """
+    In-memory near-duplicate index of stored problem statements.
+
+    Statements are reduced to MinHash signatures and bucketed by locality
+    sensitive hashing (16 bands of 4 rows), so a lookup only compares
+    against statements sharing at least one band. Pairs with a Jaccard
+    similarity of about 0.5 or more are likely to collide.
+    """
+
+    def __init__(self, max_entries=SIMILARITY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._buckets = {}
+        self._last_row_id = 0
+        self._refresher = None
+        self.ready = threading.Event()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, problem_id, problem_statement):
+        signature = minhash(problem_statement)
+        if signature is None:
+            return
+        keys = _band_keys(signature)
+        with self._lock:
+            if problem_id in self._entries:
+                return
+            self._entries[problem_id] = (signature, keys)
+            for key in keys:
+                self._buckets.setdefault(key, []).append(problem_id)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+
+    def _evict_oldest(self):
+        problem_id = next(iter(self._entries))
+        _, keys = self._entries.pop(problem_id)
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.remove(problem_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def query(self, problem_statement, min_similarity=SIMILARITY_MIN_JACCARD, limit=SIMILARITY_MAX_MATCHES):
+        """
+        Stored statements similar to this one, best first, as
+        [{'problem_id': ..., 'similarity': ...}]. Purely in memory; the index
+        is kept current by the refresh thread.
+        """
+        started = time.perf_counter()
+        signature = minhash(problem_statement)
+        if signature is None:
+            return []
+        with self._lock:
+            candidates = set()
+            for key in _band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            scored = []
+            for problem_id in candidates:
+                similarity = estimated_jaccard(signature, self._entries[problem_id][0])
+                if similarity >= min_similarity:
+                    scored.append((similarity, problem_id))
+        scored.sort(reverse=True)
+        metrics.observe('similarity.lookup_ms', (time.perf_counter() - started) * 1000)
+        metrics.increment('similarity.matches' if scored else 'similarity.misses')
+        return [{'problem_id': problem_id, 'similarity': round(similarity, 3)}
+                for similarity, problem_id in scored[:limit]]
+
+    def load(self):
+        """
+        Index the most recent stored statements (run by the warm-up in an app
+        context)
+        """
+        try:
+            self.refresh(initial=True)
+            logger.info("Similarity index loaded with %s statements", len(self))
+        finally:
+            self.ready.set()
+
+    def refresh(self, initial=False):
+        """
+        Index statements stored since the last refresh, including those
+        analyzed by other worker processes
+        """
+        query = select(ProblemAnalysis.id, ProblemAnalysis.problem_id, ProblemAnalysis.problem_statement)
+        if initial:
+            newest = db.session.execute(select(db.func.max(ProblemAnalysis.id))).scalar() or 0
+            query = query.where(ProblemAnalysis.id > max(self._last_row_id, newest - self.max_entries))
+        else:
+            query = query.where(ProblemAnalysis.id > self._last_row_id)
+        for row_id, problem_id, problem_statement in db.session.execute(query.order_by(ProblemAnalysis.id)):
+            self.add(problem_id, problem_statement)
+            self._last_row_id = max(self._last_row_id, row_id)
+
+    def start_refreshing(self, app):
+        """
+        Refresh the index every SIMILARITY_REFRESH_S in a background thread,
+        started once per process (threads do not survive fork)
+        """
+        if SIMILARITY_REFRESH_S <= 0:
+            return
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, args=(app,), name='similarity-refresh', daemon=True
+            )
+            self._refresher.start()
+
+    def _refresh_loop(self, app):
+        while True:
+            time.sleep(SIMILARITY_REFRESH_S)
+            with app.app_context():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.warning("Similarity index refresh failed: %s", e)
+                    db.session.rollback()
+
+
+similarity_index = SimilarityIndex()
@@ -0,0 +1,230 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from src.models import ProblemAnalysis, db
+from src.services.llm_backends import llm_backends
+from src.services.llm_cache import llm_cache
+from src.services.llm_transport import LLM_HTTP_WARM_CONNECTIONS
+from src.services.openai_service import ANALYSIS_CALLS, OpenAIService
+from src.services.playbooks import load_demo_analyses, load_demo_playbooks, playbook_engine
+from src.services.similarity import similarity_index
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Most frequent recent statements whose stored analyses seed the LLM response cache
+WARMUP_TOP_STATEMENTS = int(os.environ.get('WARMUP_TOP_STATEMENTS', '50'))
+# How far back statements are counted for WARMUP_TOP_STATEMENTS
+WARMUP_LOOKBACK_DAYS = int(os.environ.get('WARMUP_LOOKBACK_DAYS', '7'))
+# Seconds between scheduled warm-ups after the one at startup; 0 disables the schedule
+WARMUP_INTERVAL_S = float(os.environ.get('WARMUP_INTERVAL_S', '3600'))
+# Warm up as soon as the app is imported (e.g. in a gunicorn --preload master)
+# instead of when a process serves its first request. Off by default so CLI
+# commands and scripts importing the app make no outbound connections.
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', 'false').lower() in ('1', 'true', 'yes')
+
+
+def _utc_iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+
+
+class WarmupService:
+    """
+    Background warm-up of the per-process caches and indexes: the LLM
+    connection pools, the playbook index, the similarity index and the LLM
+    response cache. It starts when a process serves its first request (or
+    at import with WARMUP_ON_START, again in each forked worker) and then
+    runs on a schedule, without holding up requests, which are served cold
+    until it finishes.
+    """
+
+    STEPS = ('llm_transport', 'playbooks', 'similarity_index', 'llm_cache')
+
+    def __init__(self, interval=WARMUP_INTERVAL_S):
+        self.interval = interval
+        self._app = None
+        self._started_pid = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._runs = 0
+        self._state = 'pending'
+        self._started_at = None
+        self._finished_at = None
+        self._steps = {name: {'state': 'pending', 'done': 0, 'total': None} for name in self.STEPS}
+        # LLM cache lookups up to the end of the first warm-up in this process
+        self._cache_at_warm = None
+
+    def init_app(self, app):
+        """
+        Warm up in a background thread once the process serves requests, or
+        right away with WARMUP_ON_START, and again in forked worker processes
+        (threads do not survive fork)
+        """
+        self._app = app
+        app.before_request(self._start_serving)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+        if WARMUP_ON_START:
+            self.start()
+
+    def _start_serving(self):
+        if self._started_pid != os.getpid():
+            with self._lock:
+                if self._started_pid != os.getpid():
+                    self.start()
+
+    def start(self):
+        self._started_pid = os.getpid()
+        self._stopping.clear()
+        threading.Thread(target=self._loop, name='cache-warmup', daemon=True).start()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _restart_after_fork(self):
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._cache_at_warm = None
+        if WARMUP_ON_START:
+            self.start()
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            self.run()
+            if self.interval <= 0 or self._stopping.wait(self.interval):
+                return
+
+    def run(self):
+        """
+        Run every warm-up step once; a failing step does not stop the others
+        """
+        with self._lock:
+            self._runs += 1
+            self._state = 'running'
+            self._started_at = time.time()
+            self._finished_at = None
+            self._steps = {name: {'state': 'pending', 'done': 0, 'total': None} for name in self.STEPS}
+        failed = False
+        with self._app.app_context():
+            for name in self.STEPS:
+                self._update(name, state='running')
+                try:
+                    getattr(self, f'_warm_{name}')()
+                    self._update(name, state='done')
+                except Exception as e:
+                    failed = True
+                    logger.error("Warm-up step %s failed: %s", name, e)
+                    self._update(name, state='failed', error=str(e))
+                    db.session.rollback()
+                finally:
+                    metrics.set_gauge('warmup.progress', self.progress())
+        with self._lock:
+            self._state = 'failed' if failed else 'done'
+            self._finished_at = time.time()
+            if self._cache_at_warm is None:
+                self._cache_at_warm = llm_cache.stats()
+        metrics.increment('warmup.runs')
+        logger.info("Warm-up finished in %.2f s (%s LLM cache entries)",
+                    self._finished_at - self._started_at, len(llm_cache))
+
+    def _update(self, name, **fields):
+        with self._lock:
+            self._steps[name].update(fields)
+
+    def _warm_llm_transport(self):
+        warmed = {name: opened for name, opened in llm_backends.warm().items() if opened is not None}
+        self._update('llm_transport', done=sum(warmed.values()), total=LLM_HTTP_WARM_CONNECTIONS * len(warmed))
+
+    def _warm_playbooks(self):
+        playbooks = load_demo_playbooks()
+        playbook_engine.reload(playbooks)
+        self._update('playbooks', done=len(playbooks), total=len(playbooks))
+
+    def _warm_similarity_index(self):
+        similarity_index.load()
+        similarity_index.start_refreshing(self._app)
+        self._update('similarity_index', done=len(similarity_index), total=len(similarity_index))
+
+    def _warm_llm_cache(self):
+        """
+        Seed /analyze results for the demo cases and for the statements
+        analyzed most often recently, from their stored analyses
+        """
+        if not llm_cache.enabled:
+            self._update('llm_cache', total=0)
+            return
+        seeds = load_demo_analyses() + self._frequent_analyses()
+        self._update('llm_cache', total=len(seeds))
+        for done, (problem_statement, analysis_mode, analysis) in enumerate(seeds, 1):
+            OpenAIService.seed_analysis(problem_statement, analysis_mode, analysis)
+            self._update('llm_cache', done=done)
+
+    @staticmethod
+    def _frequent_analyses():
+        if WARMUP_TOP_STATEMENTS <= 0:
+            return []
+        since = datetime.utcnow() - timedelta(days=WARMUP_LOOKBACK_DAYS)
+        latest_ids = db.session.execute(
+            select(func.max(ProblemAnalysis.id))
+            .where(ProblemAnalysis.created_at >= since, ProblemAnalysis.analysis_mode.in_(ANALYSIS_CALLS))
+            .group_by(ProblemAnalysis.problem_statement, ProblemAnalysis.analysis_mode)
+            .order_by(func.count().desc(), func.max(ProblemAnalysis.id).desc())
+            .limit(WARMUP_TOP_STATEMENTS)
+        ).scalars().all()
+        if not latest_ids:
+            return []
+        return [
+            (record.problem_statement, record.analysis_mode,
+             {'description': record.description or '', 'clarifying_questions': record.clarifying_questions or []})
+            for record in ProblemAnalysis.query.filter(ProblemAnalysis.id.in_(latest_ids))
+        ]
+
+    def progress(self):
+        with self._lock:
+            finished = sum(1 for step in self._steps.values() if step['state'] in ('done', 'failed'))
+        return round(finished / len(self.STEPS), 3)
+
+    def status(self):
+        """
+        Progress of the current or last warm-up, and the LLM cache hit ratio
+        before and after the first warm-up in this process finished
+        """
+        cache = llm_cache.stats()
+        with self._lock:
+            steps = {name: dict(step) for name, step in self._steps.items()}
+            state, runs = self._state, self._runs
+            started_at, finished_at = self._started_at, self._finished_at
+            before = self._cache_at_warm
+        if before is None:
+            before, after = cache, None
+        else:
+            hits = cache['hits'] - before['hits']
+            misses = cache['misses'] - before['misses']
+            after = {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+            }
+        return {
+            'state': state,
+            'runs': runs,
+            'progress': self.progress(),
+            'started_at': _utc_iso(started_at),
+            'finished_at': _utc_iso(finished_at),
+            'steps': steps,
+            'llm_transport': {backend['name']: backend['transport'] for backend in llm_backends.status()
+                              if backend['transport'] is not None},
+            'llm_cache': {
+                'entries': cache['entries'],
+                'before_warmup': {key: before[key] for key in ('hits', 'misses', 'hit_ratio')},
+                'after_warmup': after,
+            },
+        }
+
+
+warmup = WarmupService()
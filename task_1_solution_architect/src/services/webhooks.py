@@ -0,0 +1,188 @@
+import hashlib
+import hmac
+import ipaddress
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+import httpx
+
+from src.models import BackgroundJob, WebhookDeadLetter, db
+from src.services.job_queue import PermanentJobError, job_queue
+from src.utils import json_backend
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-Webhook-Signature'
+WEBHOOK_SIGNING_SECRET = os.environ.get('WEBHOOK_SIGNING_SECRET', '')
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', '6'))
+WEBHOOK_RETRY_BACKOFF_S = float(os.environ.get('WEBHOOK_RETRY_BACKOFF_S', '10'))
+WEBHOOK_TIMEOUT_S = float(os.environ.get('WEBHOOK_TIMEOUT_S', '10'))
+# Callbacks to loopback and private addresses are refused unless enabled
+# (e.g. for a local test receiver)
+WEBHOOK_ALLOW_PRIVATE_HOSTS = os.environ.get('WEBHOOK_ALLOW_PRIVATE_HOSTS', '').lower() in ('1', 'true', 'yes')
+# Receivers answering these statuses may recover, so delivery is retried
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """
+    Shared pooled HTTP client, created lazily so each forked worker gets its own connections
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    timeout=WEBHOOK_TIMEOUT_S,
+                    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                    follow_redirects=False,
+                    headers={'User-Agent': 'nonprofit-ai-architect-webhooks/1.0'},
+                )
+    return _client
+
+
+def _reset_client_after_fork():
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_client_after_fork)
+
+
+def validate_callback_url(url):
+    """
+    Check a client-supplied callback URL. Returns an error message, or None if it is acceptable
+    """
+    if not WEBHOOK_SIGNING_SECRET:
+        return "Webhook callbacks are not enabled on this server"
+    if not isinstance(url, str) or len(url) > 2048:
+        return "callback_url must be a string of at most 2048 characters"
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        return "callback_url must be an absolute http(s) URL"
+    return None
+
+
+def _check_destination(url):
+    hostname = urlparse(url).hostname
+    if WEBHOOK_ALLOW_PRIVATE_HOSTS:
+        return
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(hostname, None)}
+    except socket.gaierror as e:
+        raise Exception(f"Cannot resolve callback host {hostname}: {str(e)}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved or ip.is_multicast:
+            raise PermanentJobError(f"Callback host {hostname} resolves to a non-public address")
+
+
+def sign_payload(body, timestamp, secret=None):
+    """
+    HMAC-SHA256 signature over "<timestamp>.<body>", sent as "t=<timestamp>,v1=<hex digest>"
+    """
+    secret = WEBHOOK_SIGNING_SECRET if secret is None else secret
+    message = f"{timestamp}.".encode('utf-8') + body
+    digest = hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(body, header, secret, tolerance_s=300):
+    """
+    Receiver-side check of an X-Webhook-Signature header
+    """
+    try:
+        parts = dict(part.split('=', 1) for part in header.split(','))
+        timestamp = int(parts['t'])
+    except (KeyError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance_s:
+        return False
+    expected = sign_payload(body, timestamp, secret)
+    return hmac.compare_digest(expected, header)
+
+
+def _queue_delivery(job):
+    """
+    Completion listener: queue a callback for a finished job that registered one
+    """
+    if not job.callback_url or job.job_type == 'webhook_delivery':
+        return
+    job_queue.enqueue('webhook_delivery', {
+        'job_id': job.job_id,
+        'callback_url': job.callback_url,
+        'event': f"job.{job.status}",
+        'delivery_id': uuid.uuid4().hex,
+    }, commit=False)
+
+
+def _deliver(payload):
+    """
+    Background job: POST the signed job result to its callback URL
+    """
+    job = BackgroundJob.query.filter_by(job_id=payload['job_id']).first()
+    if job is None:
+        raise PermanentJobError(f"Job {payload['job_id']} no longer exists")
+    url = payload['callback_url']
+    _check_destination(url)
+
+    timestamp = int(time.time())
+    body = json_backend.dumps_bytes({
+        'event': payload['event'],
+        'delivery_id': payload['delivery_id'],
+        'job': job.to_dict(),
+    })
+    headers = {
+        'Content-Type': 'application/json',
+        'X-Webhook-Event': payload['event'],
+        'X-Webhook-Delivery': payload['delivery_id'],
+        SIGNATURE_HEADER: sign_payload(body, timestamp),
+    }
+
+    start = time.perf_counter()
+    try:
+        response = _get_client().post(url, content=body, headers=headers)
+    except httpx.HTTPError as e:
+        metrics.increment('webhooks.errors')
+        raise Exception(f"Callback request failed: {str(e)}")
+    metrics.observe('webhooks.latency_ms', (time.perf_counter() - start) * 1000)
+
+    if response.is_success:
+        metrics.increment('webhooks.delivered')
+        logger.info("Delivered %s for %s to %s", payload['event'], job.job_id, url)
+        return {'status_code': response.status_code}
+    metrics.increment('webhooks.errors')
+    error = f"Callback returned HTTP {response.status_code}"
+    if response.status_code < 500 and response.status_code not in RETRYABLE_STATUS_CODES:
+        raise PermanentJobError(error)
+    raise Exception(error)
+
+
+def _dead_letter(delivery_job):
+    payload = delivery_job.payload or {}
+    db.session.add(WebhookDeadLetter(
+        job_id=payload.get('job_id', ''),
+        callback_url=payload.get('callback_url', ''),
+        event=payload.get('event', ''),
+        attempts=delivery_job.attempts,
+        last_error=delivery_job.error,
+    ))
+    metrics.increment('webhooks.dead_lettered')
+    logger.error("Webhook for %s dead-lettered after %s attempts: %s",
+                 payload.get('job_id'), delivery_job.attempts, delivery_job.error)
+
+
+job_queue.register('webhook_delivery', _deliver, max_attempts=WEBHOOK_MAX_ATTEMPTS,
+                   retry_backoff=WEBHOOK_RETRY_BACKOFF_S, on_failure=_dead_letter)
+job_queue.add_completion_listener(_queue_delivery)
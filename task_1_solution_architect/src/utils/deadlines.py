@@ -0,0 +1,85 @@
+import json
+import logging
+import os
+import time
+
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_HEADER = 'X-Request-Timeout-Ms'
+
+# Per-endpoint default budgets in seconds; override with REQUEST_DEADLINE_DEFAULTS (JSON)
+DEFAULT_DEADLINES = {
+    '/analyze': 20,
+    '/recommend': 30,
+    '/analyze/interactive': 15,
+    '/analyze/interactive/continue': 15,
+    '/analyze/interactive/complete': 60,
+    '/problem/structure/start': 15,
+    '/problem/structure/continue': 15,
+    '/problem/structure/complete': 30,
+}
+FALLBACK_DEADLINE = 30
+MAX_DEADLINE = float(os.environ.get('REQUEST_DEADLINE_MAX_S', '120'))
+# Below this many seconds an LLM call is not attempted at all
+MIN_LLM_BUDGET = float(os.environ.get('LLM_MIN_BUDGET_S', '1.5'))
+
+
+def _load_defaults():
+    defaults = dict(DEFAULT_DEADLINES)
+    raw = os.environ.get('REQUEST_DEADLINE_DEFAULTS')
+    if raw:
+        try:
+            defaults.update(json.loads(raw))
+        except ValueError:
+            logger.error("Ignoring invalid JSON in REQUEST_DEADLINE_DEFAULTS")
+    return defaults
+
+
+ENDPOINT_DEADLINES = _load_defaults()
+
+
+class DeadlineExceeded(Exception):
+    """
+    Not enough of the request's time budget is left to do the work
+    """
+
+
+class Deadline:
+    """
+    Absolute point in time by which a request must be answered
+    """
+
+    def __init__(self, seconds):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def from_request(cls):
+        """
+        Build the deadline for the current request from the X-Request-Timeout-Ms
+        header, or the endpoint's default budget
+        """
+        seconds = ENDPOINT_DEADLINES.get(request.path, FALLBACK_DEADLINE)
+        header = request.headers.get(DEADLINE_HEADER)
+        if header:
+            try:
+                seconds = float(header) / 1000
+            except ValueError:
+                logger.warning("Ignoring invalid %s header: %s", DEADLINE_HEADER, header)
+        return cls(min(max(seconds, 0.0), MAX_DEADLINE))
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self, minimum=MIN_LLM_BUDGET):
+        """
+        Raise DeadlineExceeded unless at least `minimum` seconds remain
+        """
+        remaining = self.remaining()
+        if remaining < minimum:
+            raise DeadlineExceeded(
+                f"Request deadline exceeded ({remaining:.1f}s of {self.budget:.1f}s budget left)"
+            )
+        return remaining
@@ -1,6 +1,6 @@
+import hmac
 import logging
-import os
-from flask import jsonify
+from flask import jsonify, request
 
 logger = logging.getLogger(__name__)
 
@@ -24,20 +24,54 @@ def create_success_response(data, status_code=200):
     }
     return jsonify(response_data), status_code
 
+def create_job_accepted_response(job):
+    """
+    Create the 202 response for a request that was queued as a background job
+    """
+    status_url = f"/jobs/{job.job_id}"
+    response, status_code = create_success_response({
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": status_url
+    }, status_code=202)
+    response.headers['Location'] = status_url
+    return response, status_code
+
+def is_async_request(data):
+    """
+    Whether the client asked for the job mode, via "async": true or a
+    callback_url in the body, or a Prefer: respond-async header
+    """
+    if isinstance(data, dict) and (data.get('async') is True or 'callback_url' in data):
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '')
+
+def has_bearer_token(expected):
+    """
+    Whether the request carries `Authorization: Bearer <expected>` (constant-time comparison)
+    """
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    return hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8'))
+
 def log_request_info(endpoint, data):
     """
-    Log request information for debugging
+    Log request information for debugging (skipped entirely when INFO is disabled)
     """
-    logger.info(f"Request to {endpoint}: {type(data).__name__} with keys: {list(data.keys()) if isinstance(data, dict) else 'N/A'}")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    keys = list(data.keys()) if isinstance(data, dict) else 'N/A'
+    logger.info("Request to %s: %s with keys: %s", endpoint, type(data).__name__, keys)
 
 def validate_openai_key():
     """
-    Validate that OpenAI API key is available
+    Validate that the API keys of the configured LLM backends are available
     """
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        raise Exception("OPENAI_API_KEY environment variable is not set")
-    return api_key
+    # Imported here so that utilities do not load the LLM clients at import time
+    from src.services.llm_backends import llm_backends
+
+    missing = llm_backends.missing_api_keys()
+    if missing:
+        raise Exception(f"{missing[0]} environment variable is not set")
 
 def clean_unicode(text):
     """
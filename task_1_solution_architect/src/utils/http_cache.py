@@ -0,0 +1,93 @@
+import gzip
+import hashlib
+import os
+
+from flask import current_app, request
+
+from src.utils import json_backend
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+STATIC_CACHE_CONTROL = f"public, max-age={os.environ.get('STATIC_CACHE_MAX_AGE', '3600')}"
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+# Comma-separated list of encodings to offer; empty disables compression
+COMPRESSION_ENCODINGS = [
+    encoding.strip()
+    for encoding in os.environ.get('HTTP_COMPRESSION', 'br,gzip').split(',')
+    if encoding.strip() in ('gzip', 'br') and (encoding.strip() != 'br' or brotli is not None)
+]
+# Dynamic responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+def _compress(body, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level)
+
+
+def _negotiate_encoding(available):
+    for encoding in COMPRESSION_ENCODINGS:
+        if encoding in available and request.accept_encodings[encoding]:
+            return encoding
+    return 'identity'
+
+
+def _build_response(body, etag, encoding, cache_control):
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def _serialize(payload):
+    # Same shape as Flask's JSON provider output (sorted keys, trailing newline)
+    return json_backend.dumps_bytes(payload, sort_keys=True) + b"\n"
+
+
+class PrecomputedResponse:
+    """
+    JSON response serialized, hashed and compressed once at startup
+    """
+
+    def __init__(self, payload, cache_control=STATIC_CACHE_CONTROL):
+        self.cache_control = cache_control
+        body = _serialize(payload)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {'identity': (body, digest)}
+        for encoding in COMPRESSION_ENCODINGS:
+            self.variants[encoding] = (_compress(body, encoding, level=9 if encoding == 'gzip' else 11),
+                                       f"{digest}-{encoding}")
+
+    def serve(self):
+        encoding = _negotiate_encoding(self.variants)
+        body, etag = self.variants[encoding]
+        return _build_response(body, etag, encoding, self.cache_control)
+
+
+def conditional_json_response(payload, cache_control):
+    """
+    Serve a dynamic JSON payload with a strong ETag, If-None-Match handling
+    and optional compression
+    """
+    body = _serialize(payload)
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    encoding = 'identity'
+    if len(body) >= MIN_COMPRESS_SIZE:
+        encoding = _negotiate_encoding(COMPRESSION_ENCODINGS)
+    if encoding != 'identity':
+        etag = f"{etag}-{encoding}"
+        if not request.if_none_match.contains_weak(etag):
+            body = _compress(body, encoding, level=5)
+    return _build_response(body, etag, encoding, cache_control)
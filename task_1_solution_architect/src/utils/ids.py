@@ -0,0 +1,56 @@
+import os
+import re
+import threading
+import time
+
+# Optional shard tag (e.g. a region or node name) placed between an ID's type prefix and its ULID
+ID_SHARD = re.sub(r'[^A-Z0-9]', '', os.environ.get('ID_SHARD', '').upper())[:8]
+
+# Crockford base32: no I, L, O or U, so IDs stay unambiguous when read aloud or retyped
+ENCODING = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ULID_LENGTH = 26
+_TIME_LENGTH = 10
+_RANDOM_BITS = 80
+_MAX_RANDOM = (1 << _RANDOM_BITS) - 1
+
+_lock = threading.Lock()
+_last_ms = -1
+_last_random = 0
+
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        chars.append(ENCODING[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def ulid():
+    """
+    26-character ULID: 48-bit millisecond timestamp then 80 random bits.
+
+    IDs sort by creation time. Within one millisecond the random part is
+    incremented rather than redrawn, so IDs made by this process are strictly
+    increasing and database inserts land at the end of the index.
+    """
+    global _last_ms, _last_random
+    now_ms = time.time_ns() // 1_000_000
+    with _lock:
+        if now_ms <= _last_ms and _last_random < _MAX_RANDOM:
+            now_ms = _last_ms
+            _last_random += 1
+        else:
+            _last_random = int.from_bytes(os.urandom(10), 'big')
+        _last_ms = now_ms
+        random_part = _last_random
+    return _encode(now_ms, _TIME_LENGTH) + _encode(random_part, ULID_LENGTH - _TIME_LENGTH)
+
+
+def new_id(prefix, qualifier='', shard=None):
+    """
+    Build an ID from a type prefix (P, I, PS, J), an optional qualifier such
+    as the organization abbreviation, the shard tag and a ULID
+    """
+    return f"{prefix}{qualifier}{ID_SHARD if shard is None else shard}{ulid()}"
+
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can catch this for both backends
+JSONDecodeError = json.JSONDecodeError
+
+
+class _StdlibBackend:
+    name = 'json'
+
+    @staticmethod
+    def dumps(obj, default=None, sort_keys=False, indent=None):
+        separators = None if indent else (',', ':')
+        return json.dumps(obj, default=default, sort_keys=sort_keys, indent=indent,
+                          separators=separators, ensure_ascii=False)
+
+    @staticmethod
+    def dumps_bytes(obj, default=None, sort_keys=False, indent=None):
+        return _StdlibBackend.dumps(obj, default, sort_keys, indent).encode('utf-8')
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+
+class _OrjsonBackend:
+    name = 'orjson'
+
+    @staticmethod
+    def _options(sort_keys, indent):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    @staticmethod
+    def dumps(obj, default=None, sort_keys=False, indent=None):
+        return _OrjsonBackend.dumps_bytes(obj, default, sort_keys, indent).decode('utf-8')
+
+    @staticmethod
+    def dumps_bytes(obj, default=None, sort_keys=False, indent=None):
+        return orjson.dumps(obj, default=default, option=_OrjsonBackend._options(sort_keys, indent))
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+
+BACKENDS = {'json': _StdlibBackend}
+if orjson is not None:
+    BACKENDS['orjson'] = _OrjsonBackend
+
+
+def _select_backend():
+    """
+    Pick the JSON backend: JSON_BACKEND env var if set, else orjson when installed
+    """
+    requested = os.environ.get('JSON_BACKEND')
+    if requested:
+        if requested in BACKENDS:
+            return BACKENDS[requested]
+        logger.warning("JSON_BACKEND=%s is not available, falling back", requested)
+    return BACKENDS.get('orjson', _StdlibBackend)
+
+
+backend = _select_backend()
+
+
+def dumps(obj, default=None, sort_keys=False, indent=None):
+    """
+    Serialize to a str using the active backend
+    """
+    return backend.dumps(obj, default=default, sort_keys=sort_keys, indent=indent)
+
+
+def dumps_bytes(obj, default=None, sort_keys=False, indent=None):
+    """
+    Serialize to UTF-8 bytes using the active backend
+    """
+    return backend.dumps_bytes(obj, default=default, sort_keys=sort_keys, indent=indent)
+
+
+def loads(data):
+    """
+    Deserialize a str or bytes document using the active backend
+    """
+    return backend.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by the active backend.
+
+    Keeps Flask's defaults (sorted keys, Flask's `default` for dates/UUIDs/dataclasses,
+    indented output in debug mode) but skips the str round trip when building responses.
+    Calls with extra json.dumps keyword arguments fall back to the stdlib implementation.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, default=self.default, sort_keys=self.sort_keys)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        body = dumps_bytes(obj, default=self.default, sort_keys=self.sort_keys, indent=indent)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
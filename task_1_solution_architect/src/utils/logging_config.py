@@ -0,0 +1,201 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, request
+
+from src.utils.metrics import metrics
+
+# Request-scoped values; set on the request thread so the queue listener never needs them
+request_id_var = contextvars.ContextVar('request_id', default=None)
+_log_overhead_var = contextvars.ContextVar('log_overhead', default=None)
+
+_listener = None
+_queue_handler = None
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Attach the current request ID to every record
+    """
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class InfoSamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of INFO/DEBUG records; warnings and errors always pass
+    """
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        if random.random() < self.rate:
+            return True
+        metrics.increment('logging.records_sampled_out')
+        return False
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Render records as single-line JSON documents
+    """
+    def format(self, record):
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class TimedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues records untouched, so message formatting,
+    exception text and JSON rendering all happen on the listener thread,
+    and accounts the time spent on the calling thread per request.
+    Log arguments are formatted late: pass values, not objects that are
+    modified after the call.
+    """
+    def prepare(self, record):
+        return record
+
+    def handle(self, record):
+        start = time.perf_counter()
+        try:
+            # The queue is thread-safe, so the handler lock is not needed
+            rv = self.filter(record)
+            if isinstance(rv, logging.LogRecord):
+                record = rv
+            if rv:
+                self.enqueue(record)
+            return rv
+        finally:
+            overhead = _log_overhead_var.get()
+            if overhead is not None:
+                overhead[0] += time.perf_counter() - start
+
+
+def _build_output_handler(log_format):
+    handler = logging.StreamHandler(sys.stderr)
+    if log_format == 'json':
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s'
+        ))
+    return handler
+
+
+def _start_listener(output_handler):
+    global _listener
+    _listener = logging.handlers.QueueListener(
+        _queue_handler.queue, output_handler, respect_handler_level=False
+    )
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def configure_logging():
+    """
+    Route all logging through a queue to a background listener thread.
+
+    Environment:
+        LOG_LEVEL             root level (default INFO)
+        LOG_FORMAT            'json' (default) or 'text'
+        LOG_INFO_SAMPLE_RATE  fraction of INFO/DEBUG records to keep (default 1.0)
+    """
+    global _queue_handler
+    if _queue_handler is not None:
+        return
+
+    level = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    log_format = os.environ.get('LOG_FORMAT', 'json').lower()
+    raw_sample_rate = os.environ.get('LOG_INFO_SAMPLE_RATE', '1.0')
+    try:
+        sample_rate = float(raw_sample_rate)
+    except ValueError:
+        sample_rate = None
+
+    _queue_handler = TimedQueueHandler(queue.SimpleQueue())
+    # Filters run on the request thread before the record is enqueued
+    if sample_rate is not None and sample_rate < 1.0:
+        _queue_handler.addFilter(InfoSamplingFilter(sample_rate))
+    _queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    output_handler = _build_output_handler(log_format)
+    _start_listener(output_handler)
+    atexit.register(_stop_listener)
+
+    # Listener threads do not survive fork (e.g. gunicorn --preload)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=lambda: _start_listener(output_handler))
+
+    if sample_rate is None:
+        logging.getLogger(__name__).warning(
+            "Ignoring invalid LOG_INFO_SAMPLE_RATE %r, keeping all records", raw_sample_rate
+        )
+
+
+def init_request_logging(app):
+    """
+    Register request ID propagation and per-request logging overhead accounting
+    """
+    request_logger = logging.getLogger('src.requests')
+
+    @app.before_request
+    def _start_request_logging():
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.request_id = request_id
+        g.request_started = time.perf_counter()
+        g.log_tokens = (request_id_var.set(request_id), _log_overhead_var.set([0.0]))
+
+    @app.after_request
+    def _finish_request_logging(response):
+        request_id = g.get('request_id')
+        if request_id is None:
+            return response
+        response.headers['X-Request-ID'] = request_id
+        elapsed_ms = (time.perf_counter() - g.request_started) * 1000
+        request_logger.info("%s %s -> %s in %.1fms", request.method, request.path,
+                            response.status_code, elapsed_ms)
+        overhead = _log_overhead_var.get()
+        if overhead is not None:
+            metrics.observe('logging.overhead_ms_per_request', overhead[0] * 1000)
+        return response
+
+    @app.teardown_request
+    def _reset_request_logging(exc):
+        tokens = g.pop('log_tokens', None)
+        if tokens:
+            request_id_var.reset(tokens[0])
+            _log_overhead_var.reset(tokens[1])
@@ -0,0 +1,62 @@
+import threading
+from collections import defaultdict
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics store (counters, gauges and timing summaries)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        self._timings = {}
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, value):
+        """
+        Record a single observation (e.g. a duration in milliseconds)
+        """
+        with self._lock:
+            summary = self._timings.get(name)
+            if summary is None:
+                summary = self._timings[name] = {'count': 0, 'total': 0.0, 'max': 0.0}
+            summary['count'] += 1
+            summary['total'] += value
+            if value > summary['max']:
+                summary['max'] = value
+
+    def counter(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self):
+        """
+        Return a JSON-serializable copy of all metrics
+        """
+        with self._lock:
+            timings = {
+                name: {
+                    'count': s['count'],
+                    'avg': s['total'] / s['count'] if s['count'] else 0.0,
+                    'max': s['max'],
+                    'total': s['total'],
+                }
+                for name, s in self._timings.items()
+            }
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'timings': timings,
+            }
+
+
+metrics = MetricsRegistry()
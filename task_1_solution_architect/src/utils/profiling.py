@@ -0,0 +1,229 @@
+import cProfile
+import hashlib
+import hmac
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, request
+
+from src.utils.ids import ulid
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile-Request'
+
+# Frames are attributed to the innermost matching category. Markers match
+# file names, or function names for C built-ins in cProfile output (such as
+# '<built-in method orjson.dumps>' or '<orjson.dumps>', file name '~')
+CATEGORY_MARKERS = (
+    ('json_encoding', (os.sep + 'json' + os.sep, 'orjson', os.sep + 'flask' + os.sep + 'json',
+                       'json_backend.py')),
+    ('database', (os.sep + 'sqlalchemy' + os.sep, os.sep + 'flask_sqlalchemy' + os.sep)),
+    ('llm', (os.sep + 'openai' + os.sep, 'openai_service.py', 'llm_backends.py', 'llm_transport.py')),
+)
+
+
+def _categorize_frame(filename, function_name=''):
+    for category, markers in CATEGORY_MARKERS:
+        if any(marker in filename or marker in function_name for marker in markers):
+            return category
+    return None
+
+
+def make_profile_token(secret, ttl_seconds=300):
+    """
+    Build a value for the X-Profile-Request header: "<expires>.<hmac>"
+    """
+    expires = str(int(time.time()) + ttl_seconds)
+    signature = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_token(secret, token):
+    try:
+        expires, signature = token.split('.', 1)
+        if int(expires) < time.time():
+            return False
+    except ValueError:
+        return False
+    expected = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+class SamplingProfiler:
+    """
+    Periodically sample the stack of one thread and aggregate folded stacks
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.categories = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed_ms, last = (now - last) * 1000, now
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            category = None
+            while frame is not None:
+                code = frame.f_code
+                if category is None:
+                    category = _categorize_frame(code.co_filename)
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            # Weight by real elapsed time since timer wake-ups drift from the interval
+            self.categories[category or 'other'] += elapsed_ms
+
+    def write(self, base_path):
+        with open(base_path + '.folded', 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return dict(self.categories)
+
+
+class DeterministicProfiler:
+    """
+    cProfile wrapper; writes pstats output that flamegraph tools can convert
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, base_path):
+        self.profile.dump_stats(base_path + '.pstats')
+        stats = pstats.Stats(self.profile).stats
+        resolved = {}
+
+        def category(function, seen=()):
+            # Own category, else that of the nearest categorized caller along
+            # the heaviest call path
+            if function in resolved:
+                return resolved[function]
+            filename, _, function_name = function
+            found = _categorize_frame(filename, function_name)
+            if found is None and function in stats and function not in seen:
+                callers = sorted(stats[function][4].items(), key=lambda item: item[1][3], reverse=True)
+                if callers:
+                    found = category(callers[0][0], (*seen, function))
+            resolved[function] = found
+            return found
+
+        breakdown = Counter()
+        for function, (_, _, tottime, _, callers) in stats.items():
+            own = _categorize_frame(function[0], function[2])
+            if own is not None or not callers:
+                breakdown[own or 'other'] += tottime * 1000
+                continue
+            # Time in uncategorized code (socket reads, cursor.execute and
+            # other built-ins) belongs to whoever called it, split per caller
+            for caller, (_, _, edge_tottime, _) in callers.items():
+                breakdown[category(caller) or 'other'] += edge_tottime * 1000
+        return dict(breakdown)
+
+
+def init_profiling(app):
+    """
+    Register opt-in request profiling hooks.
+
+    Nothing is registered unless one of these is set:
+        PROFILE_SAMPLE_RATE  fraction of requests to profile (default 0)
+        PROFILE_SECRET       enables profiling of requests carrying a valid
+                             X-Profile-Request token (see make_profile_token)
+    Optional:
+        PROFILE_MODE         'sampling' (default, folded stacks) or 'deterministic' (cProfile)
+        PROFILE_INTERVAL_MS  sampling interval (default 5)
+        PROFILE_DIR          output directory (default <instance>/profiles)
+    """
+    sample_rate = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+    secret = os.environ.get('PROFILE_SECRET')
+    if sample_rate <= 0 and not secret:
+        return
+
+    mode = os.environ.get('PROFILE_MODE', 'sampling')
+    interval = float(os.environ.get('PROFILE_INTERVAL_MS', '5')) / 1000
+    output_dir = os.environ.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+    os.makedirs(output_dir, exist_ok=True)
+
+    def _should_profile():
+        token = request.headers.get(PROFILE_HEADER)
+        if token and secret and verify_profile_token(secret, token):
+            return True
+        return sample_rate > 0 and random.random() < sample_rate
+
+    @app.before_request
+    def _start_profiler():
+        if not _should_profile():
+            return
+        if mode == 'deterministic':
+            profiler = DeterministicProfiler()
+        else:
+            profiler = SamplingProfiler(threading.get_ident(), interval)
+        g.profiler = profiler
+        g.profile_started = time.perf_counter()
+        profiler.start()
+
+    @app.after_request
+    def _finish_profiler(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.stop()
+        # The request ID may come from a client header; keep it filename-safe,
+        # and unique, since clients can reuse an X-Request-ID
+        request_id = re.sub(r'[^A-Za-z0-9_-]', '', g.get('request_id') or '')[:64]
+        profile_id = f"{request_id}-{ulid()}" if request_id else ulid()
+        base_path = os.path.join(output_dir, profile_id)
+        try:
+            breakdown = profiler.write(base_path)
+            summary = {
+                'profile_id': profile_id,
+                'method': request.method,
+                'path': request.path,
+                'status_code': response.status_code,
+                'mode': mode,
+                'wall_time_ms': (time.perf_counter() - g.profile_started) * 1000,
+                'breakdown_ms': breakdown,
+            }
+            with open(base_path + '.json', 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+            response.headers['X-Profile-Id'] = profile_id
+        except OSError as e:
+            logger.error("Failed to write request profile %s: %s", profile_id, e)
+        return response
+
+    @app.teardown_request
+    def _stop_profiler(exc):
+        # after_request does not run when the request raised
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
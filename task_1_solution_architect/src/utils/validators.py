@@ -1,106 +1,21 @@
-from flask import request
-import json
+from functools import wraps
+from flask import Request, current_app, request
+from werkzeug.exceptions import RequestEntityTooLarge
 import logging
+import os
+
+from src.utils import json_backend
+from src.utils.helpers import create_error_response
 
 logger = logging.getLogger(__name__)
 
-class RequestValidator:
-    @staticmethod
-    def validate_analyze_request():
-        """
-        Validate /analyze endpoint request
-        """
-        try:
-            if not request.is_json:
-                return False, "Request must be JSON"
-            
-            data = request.get_json()
-            
-            if not data:
-                return False, "Request body cannot be empty"
-            
-            if 'problem_statement' not in data:
-                return False, "Missing required field: problem_statement"
-            
-            problem_statement = data['problem_statement']
-            
-            if not isinstance(problem_statement, str):
-                return False, "problem_statement must be a string"
-            
-            if not problem_statement.strip():
-                return False, "problem_statement cannot be empty"
-            
-            if len(problem_statement.strip()) < 10:
-                return False, "problem_statement must be at least 10 characters long"
-            
-            if len(problem_statement) > 5000:
-                return False, "problem_statement must be less than 5000 characters"
-            
-            # Validate analysis_mode if provided
-            analysis_mode = data.get('analysis_mode', 'basic')
-            if analysis_mode not in ['basic', 'enhanced']:
-                return False, "analysis_mode must be either 'basic' or 'enhanced'"
-            
-            return True, None
-            
-        except Exception as e:
-            logger.error(f"Validation error: {e}")
-            return False, "Invalid request format"
+# Default upper bound for JSON request bodies; schemas may set a lower one
+REQUEST_MAX_BODY_BYTES = int(os.environ.get('REQUEST_MAX_BODY_BYTES', str(64 * 1024)))
 
-    @staticmethod
-    def validate_recommend_request():
-        """
-        Validate /recommend endpoint request
-        """
-        try:
-            if not request.is_json:
-                return False, "Request must be JSON"
-            
-            data = request.get_json()
-            
-            if not data:
-                return False, "Request body cannot be empty"
-            
-            # Required fields
-            required_fields = ['problem_id', 'description', 'clarifying_questions']
-            
-            for field in required_fields:
-                if field not in data:
-                    return False, f"Missing required field: {field}"
-            
-            # Validate types
-            if not isinstance(data['problem_id'], str):
-                return False, "problem_id must be a string"
-            
-            if not isinstance(data['description'], str):
-                return False, "description must be a string"
-            
-            if not isinstance(data['clarifying_questions'], list):
-                return False, "clarifying_questions must be an array"
-            
-            # Validate values
-            if not data['problem_id'].strip():
-                return False, "problem_id cannot be empty"
-            
-            if not data['description'].strip():
-                return False, "description cannot be empty"
-            
-            # Validate clarifying_questions array
-            for i, question in enumerate(data['clarifying_questions']):
-                if not isinstance(question, str):
-                    return False, f"clarifying_questions[{i}] must be a string"
-            
-            # Validate analysis_mode if provided
-            analysis_mode = data.get('analysis_mode', 'basic')
-            if analysis_mode not in ['basic', 'enhanced']:
-                return False, "analysis_mode must be either 'basic' or 'enhanced'"
-            
-            return True, None
-            
-        except Exception as e:
-            logger.error(f"Validation error: {e}")
-            return False, "Invalid request format"
+_MISSING = object()
 
+
+class RequestValidator:
     @staticmethod
     def sanitize_input(text):
         """
@@ -108,6 +23,265 @@ class RequestValidator:
         """
         if not isinstance(text, str):
             return text
-        
+
         # Single operation for strip and normalize whitespace
         return ' '.join(text.split())
+
+
+class Field:
+    """
+    Declarative description of one JSON body field.
+
+    Strings are sanitized (whitespace normalized) unless sanitize=False;
+    `items` validates list elements and `fields` nested objects.
+    """
+
+    def __init__(self, kind, required=True, default=_MISSING, min_length=None, max_length=None,
+                 choices=None, items=None, max_items=None, fields=None, label=None, sanitize=True,
+                 allow_empty=False):
+        self.kind = kind
+        self.required = required
+        self.default = default
+        self.min_length = min_length
+        self.max_length = max_length
+        self.choices = choices
+        self.items = items
+        self.max_items = max_items
+        self.fields = fields
+        self.label = label
+        self.sanitize = sanitize
+        self.allow_empty = allow_empty
+
+    def clean(self, name, value):
+        """
+        Validate and sanitize a value in one pass; returns (value, error)
+        """
+        if self.kind is str:
+            if not isinstance(value, str):
+                return None, f"{name} must be a string"
+            if self.max_length is not None and len(value) > self.max_length:
+                return None, f"{name} must be less than {self.max_length} characters"
+            cleaned = RequestValidator.sanitize_input(value) if self.sanitize else value.strip()
+            if not cleaned and not self.allow_empty:
+                return None, f"{name} cannot be empty"
+            if self.min_length is not None and len(cleaned) < self.min_length:
+                return None, f"{name} must be at least {self.min_length} characters long"
+            if self.choices is not None and cleaned not in self.choices:
+                return None, f"{name} must be one of: {', '.join(self.choices)}"
+            return cleaned, None
+        if self.kind is int:
+            if isinstance(value, bool) or not isinstance(value, int):
+                return None, f"{name} must be an integer"
+            if self.choices is not None and value not in self.choices:
+                return None, f"{name} must be one of: {', '.join(map(str, self.choices))}"
+            return value, None
+        if self.kind is bool:
+            if not isinstance(value, bool):
+                return None, f"{name} must be a boolean"
+            return value, None
+        if self.kind is list:
+            if not isinstance(value, list):
+                return None, f"{name} must be an array"
+            if self.max_items is not None and len(value) > self.max_items:
+                return None, f"{name} must have at most {self.max_items} items"
+            if self.items is None:
+                return value, None
+            cleaned = []
+            for i, item in enumerate(value):
+                item_value, error = self.items.clean(f"{name}[{i}]", item)
+                if error:
+                    return None, error
+                cleaned.append(item_value)
+            return cleaned, None
+        if self.kind is dict:
+            if not isinstance(value, dict):
+                return None, f"{name} must be an object"
+            if self.fields is None:
+                return value, None
+            missing = [key for key, field in self.fields.items() if field.required and not value.get(key)]
+            if missing:
+                return None, f"Missing {self.label or name} fields: {', '.join(missing)}"
+            return _clean_fields(self.fields, value, prefix=f"{name}.")
+        raise TypeError(f"Unsupported field kind: {self.kind}")
+
+
+def _clean_fields(fields, data, prefix=''):
+    payload = {}
+    for name, field in fields.items():
+        value = data.get(name, _MISSING)
+        if value is _MISSING or value is None:
+            if field.required:
+                return None, f"Missing required field: {prefix}{name}"
+            if field.default is not _MISSING:
+                payload[name] = field.default
+            continue
+        cleaned, error = field.clean(f"{prefix}{name}", value)
+        if error:
+            return None, error
+        payload[name] = cleaned
+    return payload, None
+
+
+class RequestSchema:
+    """
+    JSON request body schema: enforces the size limit from Content-Length
+    before reading the body, parses it once, then validates and sanitizes
+    every declared field in a single pass. Undeclared fields are dropped.
+    """
+
+    def __init__(self, fields, max_body_bytes=REQUEST_MAX_BODY_BYTES):
+        self.fields = fields
+        self.max_body_bytes = max_body_bytes
+
+    def _read_body(self):
+        """
+        Read the body, stopping one byte past the limit so bodies sent without
+        a Content-Length are bounded too; None if it is too large
+        """
+        chunks = []
+        size = 0
+        try:
+            while size <= self.max_body_bytes:
+                chunk = request.stream.read(self.max_body_bytes + 1 - size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+        except RequestEntityTooLarge:
+            # The stream also stops at the app-wide MAX_CONTENT_LENGTH
+            return None
+        if size > self.max_body_bytes:
+            return None
+        return b''.join(chunks)
+
+    def parse(self):
+        """
+        Returns (payload, error_message, status_code)
+        """
+        if request.content_length is not None and request.content_length > self.max_body_bytes:
+            return None, f"Request body must be at most {self.max_body_bytes} bytes", 413
+        if not request.is_json:
+            return None, "Request must be JSON", 400
+        body = self._read_body()
+        if body is None:
+            return None, f"Request body must be at most {self.max_body_bytes} bytes", 413
+        if not body:
+            return None, "Request body cannot be empty", 400
+        try:
+            data = json_backend.loads(body)
+        except ValueError:
+            return None, "Invalid request format", 400
+        if not isinstance(data, dict):
+            return None, "Request body must be a JSON object", 400
+        if not data:
+            return None, "Request body cannot be empty", 400
+        payload, error = _clean_fields(self.fields, data)
+        if error:
+            return None, error, 400
+        return payload, None, 200
+
+
+def validated_json(schema):
+    """
+    Route decorator: validate the JSON body against `schema` and pass the
+    sanitized payload to the handler as its first argument
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            payload, error, status_code = schema.parse()
+            if error:
+                error_type = "payload_too_large" if status_code == 413 else "validation_error"
+                return create_error_response(error, status_code=status_code, error_type=error_type)
+            return view(payload, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def body_limit(max_bytes):
+    """
+    View decorator: accept bodies up to `max_bytes` on this endpoint instead
+    of the app-wide MAX_CONTENT_LENGTH (e.g. for file uploads)
+    """
+    def decorator(view):
+        view.max_body_bytes = max_bytes
+        return view
+    return decorator
+
+
+class BodyLimitedRequest(Request):
+    """
+    Request class honouring per-endpoint body_limit overrides
+    """
+
+    @property
+    def max_content_length(self):
+        view = current_app.view_functions.get(self.endpoint) if self.endpoint else None
+        return getattr(view, 'max_body_bytes', None) or current_app.config["MAX_CONTENT_LENGTH"]
+
+
+ANALYSIS_MODE = Field(str, required=False, default='basic', choices=('basic', 'enhanced'))
+ASYNC_FIELDS = {
+    'async': Field(bool, required=False),
+    'callback_url': Field(str, required=False, max_length=2048, sanitize=False),
+}
+
+ANALYZE_REQUEST = RequestSchema({
+    'problem_statement': Field(str, min_length=10, max_length=5000),
+    'analysis_mode': ANALYSIS_MODE,
+}, max_body_bytes=32 * 1024)
+
+SOLVE_REQUEST = RequestSchema({
+    'problem_statement': Field(str, min_length=10, max_length=5000),
+    'stop_on_questions': Field(bool, required=False, default=True),
+    'stream': Field(bool, required=False, default=False),
+}, max_body_bytes=32 * 1024)
+
+RECOMMEND_REQUEST = RequestSchema({
+    'problem_id': Field(str, max_length=64),
+    'description': Field(str, max_length=5000),
+    'clarifying_questions': Field(list, items=Field(str, max_length=2000, allow_empty=True), max_items=20),
+    'analysis_mode': ANALYSIS_MODE,
+    **ASYNC_FIELDS,
+})
+
+INTERACTIVE_START_REQUEST = RequestSchema({
+    'problem_statement': Field(str, max_length=5000),
+    'organization_name': Field(str, max_length=200),
+    'geographic_location': Field(str, max_length=200),
+    'structured_problem_statement': Field(dict, required=False, label='structured problem statement', fields={
+        'we_are': Field(str, max_length=1000),
+        'we_are_trying_to': Field(str, max_length=1000),
+        'but': Field(str, max_length=1000),
+        'because': Field(str, max_length=1000),
+        'which_makes_us_feel': Field(str, max_length=1000),
+    }),
+    'questions_per_turn': Field(int, required=False, choices=(1, 2, 3)),
+})
+
+# One `answer`, or `answers` in question order when a turn asked several questions
+INTERACTIVE_CONTINUE_REQUEST = RequestSchema({
+    'problem_id': Field(str, max_length=64),
+    'answer': Field(str, required=False, max_length=5000),
+    'answers': Field(list, required=False, items=Field(str, max_length=5000), max_items=3),
+}, max_body_bytes=32 * 1024)
+
+INTERACTIVE_COMPLETE_REQUEST = RequestSchema({
+    'problem_id': Field(str, max_length=64),
+    **ASYNC_FIELDS,
+}, max_body_bytes=8 * 1024)
+
+STRUCTURE_START_REQUEST = RequestSchema({
+    'initial_challenge': Field(str, max_length=5000),
+    'mode': Field(str, required=False, choices=('stepwise', 'oneshot')),
+}, max_body_bytes=32 * 1024)
+
+STRUCTURE_CONTINUE_REQUEST = RequestSchema({
+    'structuring_id': Field(str, max_length=64),
+    'response': Field(str, max_length=5000),
+}, max_body_bytes=32 * 1024)
+
+STRUCTURE_COMPLETE_REQUEST = RequestSchema({
+    'structuring_id': Field(str, max_length=64),
+    **ASYNC_FIELDS,
+}, max_body_bytes=8 * 1024)